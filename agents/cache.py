@@ -0,0 +1,293 @@
+# agents/cache.py
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+# Default lifetimes per kind of cached value (seconds)
+LLM_TTL = 6 * 3600
+PLACES_TTL = 24 * 3600
+NEIGHBORHOODS_TTL = 24 * 3600
+PLAN_TTL = 15 * 60
+
+_MISSING = object()
+
+
+class Cache:
+    """Key/value store shared by every worker on a node.
+
+    Values are anything JSON-serializable; ``get_raw``/``set_raw`` store
+    already-encoded bytes as-is. ``get_or_compute`` is the main
+    entry point: on a miss exactly one caller (across threads and worker
+    processes) runs ``compute`` while the others wait for its result, so a
+    cold key never stampedes the upstream API.
+    """
+
+    def get_raw(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set_raw(self, key: str, payload: bytes, ttl: float):
+        raise NotImplementedError
+
+    def get(self, key: str, default: Any = None) -> Any:
+        payload = self.get_raw(key)
+        return default if payload is None else json.loads(payload)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.set_raw(key, json.dumps(value, separators=(",", ":")).encode("utf-8"), ttl)
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def _acquire(self, key: str, owner: str, lease: float) -> bool:
+        raise NotImplementedError
+
+    def _release(self, key: str, owner: str):
+        raise NotImplementedError
+
+    @contextmanager
+    def try_lock(self, key: str, lease: float = 30.0) -> Iterator[bool]:
+        """Hold the cross-worker lock ``key`` for the block if it's free.
+
+        Yields whether it was acquired; never waits. As in ``get_or_compute``,
+        a holder that dies keeps others out for at most ``lease`` seconds.
+        """
+        owner = uuid.uuid4().hex
+        acquired = self._acquire(key, owner, lease)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._release(key, owner)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: float,
+                       lease: float = 30.0, poll: float = 0.05) -> Any:
+        """Return the cached value, computing and storing it once on a miss.
+
+        The computing caller holds a lock with a ``lease`` expiry, so a worker
+        that dies mid-compute only delays the others by at most ``lease``. If
+        ``compute`` raises, nothing is stored and the exception propagates.
+        """
+        owner = uuid.uuid4().hex
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if self._acquire(key, owner, lease):
+                try:
+                    # Another worker may have finished between our miss and the lock
+                    value = self.get(key, _MISSING)
+                    if value is _MISSING:
+                        value = compute()
+                        self.set(key, value, ttl)
+                    return value
+                finally:
+                    self._release(key, owner)
+            time.sleep(poll)
+
+
+class NullCache(Cache):
+    """Cache that never stores anything"""
+
+    def get_raw(self, key):
+        return None
+
+    def set_raw(self, key, payload, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    @contextmanager
+    def try_lock(self, key, lease=30.0):
+        # Nothing is shared, so there's nobody to exclude
+        yield True
+
+    def get_or_compute(self, key, compute, ttl, lease=30.0, poll=0.05):
+        return compute()
+
+
+class SQLiteCache(Cache):
+    """Node-local cache in a SQLite file in WAL mode.
+
+    Every process opens its own connection per thread; WAL lets readers run
+    alongside the single writer. Entries expire after their TTL and the
+    least recently used ones are evicted once ``max_entries`` or
+    ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50_000, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_raw(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now))
+            return None
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set_raw(self, key, payload, ttl):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, payload, len(payload), now + ttl, now),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.evict()
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones beyond the bounds"""
+        conn = self._connect()
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        while size > self.max_bytes and count:
+            # Evict a tenth at a time rather than re-summing after every row
+            batch = max(1, count // 10)
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (batch,),
+            )
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+    def _acquire(self, key, owner, lease):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO locks (key, owner, expires_at) VALUES (?, ?, ?)", (key, owner, now + lease)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def _release(self, key, owner):
+        self._connect().execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+
+class RedisCache(Cache):
+    """Adapter for any client speaking the redis-py API (``get``/``set``/``delete``/``eval``).
+
+    Works with a real Redis or any compatible server; tests can pass an
+    in-memory stand-in implementing the same methods. Size bounds are left to
+    the server's ``maxmemory`` policy.
+    """
+
+    # Delete the lock only if we still own it
+    _RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, client, prefix: str = "nextmove:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get_raw(self, key):
+        payload = self.client.get(self.prefix + key)
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        return payload
+
+    def set_raw(self, key, payload, ttl):
+        self.client.set(self.prefix + key, payload, ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def _acquire(self, key, owner, lease):
+        return bool(self.client.set(f"{self.prefix}lock:{key}", owner, nx=True, px=int(lease * 1000)))
+
+    def _release(self, key, owner):
+        self.client.eval(self._RELEASE_SCRIPT, 1, f"{self.prefix}lock:{key}", owner)
+
+
+def cache_from_url(url: str) -> Cache:
+    """Build a cache from ``sqlite:///path``, ``redis://host:port/db`` or ``none``"""
+    if not url or url == "none":
+        return NullCache()
+    if url.startswith("sqlite:///"):
+        return SQLiteCache(
+            url[len("sqlite:///"):],
+            max_entries=int(os.getenv("NEXTMOVE_CACHE_MAX_ENTRIES", "50000")),
+            max_bytes=int(os.getenv("NEXTMOVE_CACHE_MAX_MB", "256")) * 1024 * 1024,
+        )
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("NEXTMOVE_CACHE_URL points at Redis but the 'redis' package is not installed")
+        return RedisCache(redis.Redis.from_url(url))
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+def default_cache_url() -> str:
+    return os.getenv(
+        "NEXTMOVE_CACHE_URL",
+        "sqlite:///" + os.path.join(tempfile.gettempdir(), "nextmove-cache.sqlite3"),
+    )
+
+
+_cache: Optional[Cache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    """Process-wide shared cache, configured from NEXTMOVE_CACHE_URL"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = cache_from_url(default_cache_url())
+        return _cache
+
+
+def set_cache(cache: Optional[Cache]):
+    global _cache
+    with _cache_lock:
+        _cache = cache
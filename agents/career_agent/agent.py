@@ -1,55 +1,90 @@
 # agents/career_agent/agent.py
-import os
+import asyncio
+import heapq
+import itertools
 import json
-import requests
-from google import genai
-from google.genai.types import GenerateContentConfig, HttpOptions
-from ..models import UserProfile, CareerOutput, JobRecommendations, JobMatch
+import re
+import time
+from typing import Optional, Tuple
+from ..metrics import registry
+from ..transport import get_transport
+from ..snapshot import experience_band, normalize
+from ..salary_index import salary_index_for
+from ..records import JobRecord
+from ..models import UserProfile, CareerOutput, JobRecommendations
+
+# Jobs returned per plan
+TOP_K = 15
+# Once every kept job scores at least this, lower-priority sources aren't consulted
+STRONG_MATCH = 75
+# A search strategy result with this many relevant, complete listings ends the race
+GOOD_ENOUGH_JOBS = 3
+# How long after the winning strategy other strategies' results are still merged in
+GRACE_SECONDS = 0.5
+
+
+_SALARY_NUMBER = re.compile(r"\d[\d,]*")
+
+
+def parse_salary(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    """"$70,000 - $95,000" -> (70000, 95000); None when there aren't two numbers"""
+    numbers = _SALARY_NUMBER.findall(text or "")
+    if len(numbers) < 2:
+        return None
+    return int(numbers[0].replace(",", "")), int(numbers[1].replace(",", ""))
+
+
+def format_salary(salary: Optional[Tuple[int, int]]) -> Optional[str]:
+    return f"${salary[0]:,} - ${salary[1]:,}" if salary else None
+
+
+class TopJobs:
+    """The ``k`` best-scoring jobs seen so far, deduplicated by (title, company)"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []
+        self._keys = set()
+        self._sequence = itertools.count()
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._heap) >= self.k
+
+    @property
+    def floor(self) -> int:
+        """Lowest score currently kept"""
+        return self._heap[0][0] if self._heap else 0
+
+    def is_new(self, job: JobRecord) -> bool:
+        key = (normalize(job.title), normalize(job.company))
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def offer(self, score: int, job: JobRecord):
+        # Earlier (higher-priority) arrivals win ties
+        entry = (score, -next(self._sequence), job)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def ranked(self) -> list:
+        """(score, job) pairs, best first"""
+        return [(score, job) for score, _, job in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+
 class CareerAgent:
     def __init__(self):
-        self.client = genai.Client(
-            api_key=os.getenv("GOOGLE_API_KEY"),
-            http_options=HttpOptions(api_version="v1")
-        )
-        self.linkedin_api_key = os.getenv("LINKED_IN_API")
+        self.transport = get_transport()
+        self.linkedin_api_key = self.transport.credential("LINKED_IN_API")
         self.harvest_base_url = "https://api.harvest-api.com"
 
     async def run(self, profile: UserProfile) -> CareerOutput:
-        # First, try to get real job data from LinkedIn API
-        jobs_data = await self._search_linkedin_jobs(profile)
-
-        # If LinkedIn API fails or returns insufficient results, enhance with Gemini
-        if len(jobs_data) < 3:
-            gemini_jobs = await self._enhance_with_gemini(profile, jobs_data)
-            jobs_data.extend(gemini_jobs)
-
-        # Ensure we have exactly 15 jobs
-        while len(jobs_data) < 15:
-            fallback_jobs = self._generate_fallback_jobs(profile)
-            for job in fallback_jobs:
-                if len(jobs_data) < 15:
-                    # Add some variation to avoid duplicates
-                    job["title"] = f"{job['title']} #{len(jobs_data) + 1}"
-                    jobs_data.append(job)
-                else:
-                    break
-
-        # Ensure salary diversity and calculate match scores
-        jobs_data = self._ensure_salary_diversity(jobs_data, profile)
-
-        # Convert to JobMatch objects with match scores
-        job_matches = []
-        for job in jobs_data[:15]:  # Exactly 15 jobs
-            match_score = self._calculate_job_match_score(job, profile)
-            job_match = JobMatch(
-                title=job["title"],
-                company=job["company"],
-                location=job["location"],
-                salary_range=job.get("salary_range"),
-                apply_url=job.get("apply_url"),
-                match_score=match_score
-            )
-            job_matches.append(job_match)
+        # The selection state is gone by the time the response models are built
+        job_matches = [job.to_model(score, format_salary(job.salary)) for score, job in await self._top_jobs(profile)]
 
         job_recommendations = JobRecommendations(
             job_matches=job_matches
@@ -57,6 +92,134 @@ class CareerAgent:
 
         return CareerOutput(job_recommendations=job_recommendations)
 
+    async def _top_jobs(self, profile: UserProfile) -> list:
+        """(score, job) pairs for the TOP_K best distinct jobs, best first"""
+        # Sources in priority order; each is only started if the ones before it
+        # didn't already fill the top-k with strong matches
+        sources = [
+            ("search", self._searched_jobs(profile), False),
+            ("fallback", self._fallback_jobs(profile), True),
+        ]
+        top = TopJobs(TOP_K)
+        seen_ranges = set()
+
+        for name, source, fill_only in sources:
+            if top.is_full and (fill_only or top.floor >= STRONG_MATCH):
+                registry.counter("career_sources_skipped_total", source=name).inc()
+                await source.aclose()
+                continue
+            try:
+                async for job in source:
+                    job = JobRecord.from_dict(job)
+                    if not top.is_new(job):
+                        continue
+                    # Salaries are made distinct and the job scored as it arrives
+                    self._diversify_salary(job, seen_ranges, profile)
+                    top.offer(self._calculate_job_match_score(job, profile), job)
+                    if top.is_full and (fill_only or top.floor >= STRONG_MATCH):
+                        break
+            finally:
+                await source.aclose()
+
+        return top.ranked()
+
+    async def _searched_jobs(self, profile: UserProfile):
+        for job in await self._search_jobs(profile):
+            yield job
+
+    async def _search_jobs(self, profile: UserProfile) -> list:
+        """Race the search strategies; the first good-enough result wins.
+
+        Gemini is only asked when the Harvest searches have not produced a
+        good-enough result within GRACE_SECONDS (or can't run at all).
+        Results that land within GRACE_SECONDS of the winner are merged in,
+        the rest are abandoned. Strategies run in threads since the upstream
+        calls block, so an abandoned one finishes its request in the
+        background and its result is dropped.
+        """
+        # Without a key the Harvest searches would return nothing; don't spend a thread on them
+        searches = {
+            "company_search": self._company_search_jobs,
+            "job_search": self._job_search_jobs,
+        } if self.linkedin_api_key else {}
+        strategies = {**searches, "gemini": lambda profile: self._enhance_with_gemini(profile, [])}
+        started = time.monotonic()
+        grace_ends = started + GRACE_SECONDS
+        tasks = {
+            asyncio.create_task(self._timed_strategy(name, strategy, profile)): name
+            for name, strategy in searches.items()
+        }
+        results = {}
+        winner = None
+        pending = set(tasks)
+        try:
+            while True:
+                gemini_started = "gemini" in tasks.values()
+                if not gemini_started and winner is None and (not pending or time.monotonic() >= grace_ends):
+                    task = asyncio.create_task(self._timed_strategy("gemini", strategies["gemini"], profile))
+                    tasks[task] = "gemini"
+                    pending.add(task)
+                    gemini_started = True
+                if not pending:
+                    break
+                waiting_on_grace = winner is not None or not gemini_started
+                timeout = max(0.0, grace_ends - time.monotonic()) if waiting_on_grace else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done and winner is not None:
+                    break
+                for task in done:
+                    name = tasks[task]
+                    results[name] = task.result()
+                    if winner is None and self._good_enough(results[name], profile):
+                        winner = name
+                        grace_ends = time.monotonic() + GRACE_SECONDS
+                        print(f"Job search won by {name} after {time.monotonic() - started:.2f}s")
+        finally:
+            for task in pending:
+                task.cancel()
+
+        for name in strategies:
+            if name == winner:
+                outcome = "won"
+            elif name not in tasks.values():
+                outcome = "skipped"
+            elif name not in results:
+                outcome = "abandoned"
+            else:
+                outcome = "merged" if results[name] else "empty"
+            registry.counter("career_strategy_total", strategy=name, outcome=outcome).inc()
+
+        # Winner first, then the others in priority order
+        order = sorted(results, key=lambda name: (name != winner, list(strategies).index(name)))
+        return [job for name in order for job in results[name]]
+
+    async def _timed_strategy(self, name: str, strategy, profile: UserProfile) -> list:
+        started = time.monotonic()
+        try:
+            return await asyncio.to_thread(strategy, profile)
+        except Exception as e:
+            print(f"Job search strategy {name} failed: {e}")
+            return []
+        finally:
+            registry.histogram("career_strategy_seconds", strategy=name).observe(time.monotonic() - started)
+
+    def _good_enough(self, jobs: list, profile: UserProfile) -> bool:
+        """At least GOOD_ENOUGH_JOBS complete listings relevant to the career path"""
+        relevant = [
+            job for job in jobs
+            if job.get("title") and job.get("company")
+            and self._calculate_career_relevance(job["title"], profile.career_path) >= 70
+        ]
+        return len(relevant) >= GOOD_ENOUGH_JOBS
+
+    async def _fallback_jobs(self, profile: UserProfile):
+        """Template jobs, numbered from the second round on so they stay distinct"""
+        base_jobs = self._generate_fallback_jobs(profile)
+        for round_number in range(TOP_K // len(base_jobs) + 2):
+            for job in base_jobs:
+                # Consumers copy the fields out, so only renumbered jobs need a new dict
+                yield {**job, "title": f"{job['title']} #{round_number + 1}"} if round_number else job
+
     def _generate_fallback_jobs(self, profile: UserProfile) -> list:
         """Generate fallback job data if Gemini fails"""
         base_jobs = [
@@ -90,95 +253,85 @@ class CareerAgent:
             job["location"] = profile.city
             experience_years = profile.experience_years or 0
             if experience_years < 2:
-                job["salary_range"] = "$45,000 - $65,000"
+                job["salary"] = (45000, 65000)
             elif experience_years < 5:
-                job["salary_range"] = "$65,000 - $85,000"
+                job["salary"] = (65000, 85000)
             else:
-                job["salary_range"] = "$85,000 - $120,000"
+                job["salary"] = (85000, 120000)
 
         return base_jobs
 
-    async def _search_linkedin_jobs(self, profile: UserProfile) -> list:
-        """Search for real jobs using Harvest LinkedIn API based on user profile"""
+    def _company_search_jobs(self, profile: UserProfile) -> list:
+        """Jobs at companies Harvest finds in the user's city and industry"""
         if not self.linkedin_api_key:
             return []
 
         headers = {"X-API-Key": self.linkedin_api_key}
+        company_url = f"{self.harvest_base_url}/linkedin/company-search"
+        # Improve search query to find companies hiring for the user's career path
+        company_search_terms = []
+
+        # Add location
+        if "new york" in profile.city.lower():
+            company_search_terms.extend(["New York", "NYC", "Manhattan"])
+        elif "houston" in profile.city.lower():
+            company_search_terms.extend(["Houston", "Texas"])
+        elif "austin" in profile.city.lower():
+            company_search_terms.extend(["Austin", "Texas"])
+        else:
+            company_search_terms.append(profile.city)
+
+        # Add career-relevant industries
+        if "marketing" in profile.career_path.lower():
+            company_search_terms.extend(["marketing", "advertising", "digital agency"])
+        elif "software" in profile.career_path.lower():
+            company_search_terms.extend(["technology", "software", "tech"])
+        elif "data" in profile.career_path.lower():
+            company_search_terms.extend(["analytics", "data", "business intelligence"])
+
+        # Use the best search term
+        search_term = company_search_terms[0] if company_search_terms else profile.city
+        company_params = {"search": search_term}
+
+        print(f"Searching companies: {company_url} with search='{search_term}'")
+        company_response = self.transport.get(company_url, headers=headers, params=company_params, timeout=10)
+        if company_response.status_code != 200:
+            print(f"Harvest API error: {company_response.status_code} - {company_response.text[:200]}")
+            return []
 
-        # Construct personalized search parameters
-        search_query = profile.career_path
-
-        try:
-            # First, search for relevant companies in the user's city and industry
-            company_url = f"{self.harvest_base_url}/linkedin/company-search"
-            # Improve search query to find companies hiring for the user's career path
-            company_search_terms = []
-
-            # Add location
-            if "new york" in profile.city.lower():
-                company_search_terms.extend(["New York", "NYC", "Manhattan"])
-            elif "houston" in profile.city.lower():
-                company_search_terms.extend(["Houston", "Texas"])
-            elif "austin" in profile.city.lower():
-                company_search_terms.extend(["Austin", "Texas"])
-            else:
-                company_search_terms.append(profile.city)
-
-            # Add career-relevant industries
-            if "marketing" in profile.career_path.lower():
-                company_search_terms.extend(["marketing", "advertising", "digital agency"])
-            elif "software" in profile.career_path.lower():
-                company_search_terms.extend(["technology", "software", "tech"])
-            elif "data" in profile.career_path.lower():
-                company_search_terms.extend(["analytics", "data", "business intelligence"])
-
-            # Use the best search term
-            search_term = company_search_terms[0] if company_search_terms else profile.city
-            company_params = {"search": search_term}
-
-            print(f"Searching companies: {company_url} with search='{search_term}'")
-            company_response = requests.get(company_url, headers=headers, params=company_params, timeout=10)
-
-            if company_response.status_code == 200:
-                companies_data = company_response.json()
-                companies = companies_data.get('elements', [])
-                print(f"Found {len(companies)} companies")
-
-                # Extract job opportunities from company data
-                jobs = self._extract_jobs_from_companies(companies_data, profile)
-
-                if jobs:
-                    return jobs
-
-            # If company search doesn't yield jobs, try job-specific search
-            job_url = f"{self.harvest_base_url}/linkedin/job-search"
-            job_params = {
-                "keywords": search_query,
-                "location": profile.city,
-                "limit": 10
-            }
-
-            print(f"Searching jobs: {job_url}")
-            job_response = requests.get(job_url, headers=headers, params=job_params, timeout=10)
+        companies_data = company_response.json()
+        print(f"Found {len(companies_data.get('elements', []))} companies")
+        return self._extract_jobs_from_companies(companies_data, profile)
 
-            if job_response.status_code == 200:
-                jobs_data = job_response.json()
-                print(f"Job search successful: {len(jobs_data.get('jobs', []))} jobs found")
-                return self._parse_harvest_job_response(jobs_data, profile)
-            else:
-                print(f"Harvest API error: {job_response.status_code} - {job_response.text[:200]}")
-                return []
+    def _job_search_jobs(self, profile: UserProfile) -> list:
+        """Harvest job-search listings for the career path in the user's city"""
+        if not self.linkedin_api_key:
+            return []
 
-        except Exception as e:
-            print(f"Harvest API call failed: {e}")
+        headers = {"X-API-Key": self.linkedin_api_key}
+        job_url = f"{self.harvest_base_url}/linkedin/job-search"
+        job_params = {
+            "keywords": profile.career_path,
+            "location": profile.city,
+            "limit": 10
+        }
+
+        print(f"Searching jobs: {job_url}")
+        job_response = self.transport.get(job_url, headers=headers, params=job_params, timeout=10)
+        if job_response.status_code != 200:
+            print(f"Harvest API error: {job_response.status_code} - {job_response.text[:200]}")
             return []
 
-    async def _enhance_with_gemini(self, profile: UserProfile, existing_jobs: list) -> list:
+        jobs_data = job_response.json()
+        print(f"Job search successful: {len(jobs_data.get('jobs', []))} jobs found")
+        return self._parse_harvest_job_response(jobs_data, profile)
+
+    def _enhance_with_gemini(self, profile: UserProfile, existing_jobs: list) -> list:
         """Use Gemini to generate additional personalized job opportunities"""
         existing_companies = [job.get("company", "") for job in existing_jobs]
 
         prompt = f"""
-        Generate {10 - len(existing_jobs)} additional job opportunities in {profile.city} for:
+        Generate {max(5, 10 - len(existing_jobs))} additional job opportunities in {profile.city} for:
         - Career: {profile.career_path}
         - Experience: {profile.experience_years} years
         - Salary expectation: ${profile.salary}
@@ -205,19 +358,24 @@ class CareerAgent:
         """
 
         try:
-            response = self.client.models.generate_content(
+            response = self.transport.generate_content(
                 model="gemini-1.5-pro",
                 contents=prompt,
-                config=GenerateContentConfig(
-                    temperature=0.7,
-                    max_output_tokens=1000,
-                    response_mime_type="application/json"
-                )
+                config={
+                    "temperature": 0.7,
+                    "max_output_tokens": 1000,
+                    "response_mime_type": "application/json"
+                }
             )
             result = json.loads(response.text.strip())
-            return result.get("jobs", [])
+            jobs = [job for job in result.get("jobs", []) if job.get("title") and job.get("company")]
+            for job in jobs:
+                # Parsed once here; everything downstream works on numbers
+                job["salary"] = parse_salary(job.pop("salary_range", None))
+            return jobs
         except Exception:
-            return self._generate_fallback_jobs(profile)[:5 - len(existing_jobs)]
+            # The fallback source fills whatever is left
+            return []
 
     def _get_experience_level(self, years: int) -> str:
         """Convert years of experience to LinkedIn experience level"""
@@ -264,7 +422,7 @@ class CareerAgent:
                     "title": title,
                     "company": company_name,
                     "location": profile.city,
-                    "salary_range": self._estimate_salary_range(profile, title)
+                    "salary": self._estimate_salary_range(profile, title)
                 }
                 jobs.append(job)
 
@@ -302,19 +460,19 @@ class CareerAgent:
                 "title": job_listing.get("title", ""),
                 "company": job_listing.get("company", {}).get("name", ""),
                 "location": job_listing.get("location", profile.city),
-                "salary_range": self._extract_salary_from_job(job_listing, profile),
+                "salary": self._extract_salary_from_job(job_listing, profile),
                 "apply_url": job_listing.get("apply_url")
             }
             jobs.append(job)
 
         return jobs
 
-    def _extract_salary_from_job(self, job_listing: dict, profile: UserProfile) -> str:
+    def _extract_salary_from_job(self, job_listing: dict, profile: UserProfile) -> Tuple[int, int]:
         """Extract or estimate salary from job listing"""
         # Try to find salary in job posting
         salary_info = job_listing.get("salary", {})
         if salary_info and "min" in salary_info and "max" in salary_info:
-            return f"${salary_info['min']:,} - ${salary_info['max']:,}"
+            return int(salary_info["min"]), int(salary_info["max"])
 
         # Fall back to estimation
         return self._estimate_salary_range(profile, job_listing.get("title", ""))
@@ -328,26 +486,29 @@ class CareerAgent:
             job_details = job_element.get("jobPostingInfo", {})
             company_info = job_element.get("companyDetails", {})
 
-            # Extract salary range if available
-            salary_range = self._estimate_salary_range(profile, job_details.get("title", ""))
-
             job = {
                 "title": job_details.get("title", ""),
                 "company": company_info.get("companyName", ""),
                 "location": job_details.get("formattedLocation", profile.city),
-                "salary_range": salary_range,
+                "salary": self._estimate_salary_range(profile, job_details.get("title", "")),
                 "apply_url": job_details.get("apply_url")
             }
             jobs.append(job)
 
         return jobs
 
-    def _estimate_salary_range(self, profile: UserProfile, job_title: str) -> str:
+    def _estimate_salary_range(self, profile: UserProfile, job_title: str) -> Tuple[int, int]:
         """Estimate salary range based on profile and job title"""
         base_salary = profile.salary
 
+        # Market range precomputed for this title, or else the career path, in this city
+        index = salary_index_for(self.transport.snapshot)
+        band = experience_band(profile.experience_years)
+        market = index.lookup(job_title, profile.city, band) or index.lookup(profile.career_path, profile.city, band)
+        if market:
+            min_sal, max_sal = market
         # Adjust based on experience and job level
-        if profile.experience_years < 2:
+        elif profile.experience_years < 2:
             min_sal = int(base_salary * 0.8)
             max_sal = int(base_salary * 1.2)
         elif profile.experience_years < 5:
@@ -366,20 +527,44 @@ class CareerAgent:
             min_sal = int(min_sal * 1.4)
             max_sal = int(max_sal * 1.4)
 
-        return f"${min_sal:,} - ${max_sal:,}"
+        return min_sal, max_sal
+
+    def _fetch_market_salary(self, city: str, career_path: str, band: str) -> dict:
+        """Ask Gemini for the typical salary range of a career path in a city"""
+        prompt = f"""
+        What is the typical annual base salary range in USD for a {band}-level {career_path} in {city}?
+
+        Respond with ONLY a JSON object in this exact format:
+        {{"min": 70000, "max": 95000}}
+        """
 
-    def _calculate_job_match_score(self, job: dict, profile: UserProfile) -> int:
+        response = self.transport.generate_content(
+            model="gemini-1.5-pro",
+            contents=prompt,
+            config={
+                "temperature": 0.2,
+                "max_output_tokens": 100,
+                "response_mime_type": "application/json"
+            }
+        )
+        result = json.loads(response.text.strip())
+        min_sal, max_sal = int(result["min"]), int(result["max"])
+        if not 0 < min_sal <= max_sal:
+            raise ValueError(f"Implausible salary range {min_sal}-{max_sal}")
+        return {"min": min_sal, "max": max_sal}
+
+    def _calculate_job_match_score(self, job: JobRecord, profile: UserProfile) -> int:
         """Calculate match score using formula: 0.6*career_relevance + 0.25*salary_score + 0.15*distance_score"""
         import random
 
         # Career relevance (60% weight)
-        career_relevance = self._calculate_career_relevance(job["title"], profile.career_path)
+        career_relevance = self._calculate_career_relevance(job.title, profile.career_path)
 
         # Salary score (25% weight) - higher salaries get higher scores
-        salary_score = self._calculate_salary_score(job.get("salary_range", ""), profile)
+        salary_score = self._calculate_salary_score(job.salary, profile)
 
         # Distance score (15% weight) - assume all jobs in same city get high score
-        distance_score = 90 if job["location"].lower() == profile.city.lower() else 50
+        distance_score = 90 if job.location.lower() == profile.city.lower() else 50
 
         # Combine scores with weights
         match = (0.6 * career_relevance + 0.25 * salary_score + 0.15 * distance_score)
@@ -414,70 +599,46 @@ class CareerAgent:
 
         return 50  # Base relevance
 
-    def _calculate_salary_score(self, salary_range: str, profile: UserProfile) -> float:
+    def _calculate_salary_score(self, salary: Optional[Tuple[int, int]], profile: UserProfile) -> float:
         """Calculate salary score - higher salaries get higher scores within reasonable bounds"""
-        if not salary_range or not profile.salary:
+        if not salary or not profile.salary:
             return 50  # neutral score
 
-        try:
-            # Extract numeric values from salary range
-            import re
-            numbers = re.findall(r'[\d,]+', salary_range.replace(',', ''))
-            if len(numbers) >= 2:
-                min_sal = int(numbers[0])
-                max_sal = int(numbers[1])
-                avg_salary = (min_sal + max_sal) / 2
-
-                # Score based on how salary compares to user expectation
-                if avg_salary >= profile.salary:
-                    # Higher than expected - good score
-                    ratio = min(1.5, avg_salary / profile.salary)  # Cap at 1.5x
-                    return min(100, 60 + ((ratio - 1) * 80))  # 60-100 range
-                else:
-                    # Lower than expected - reduced score
-                    ratio = avg_salary / profile.salary
-                    return max(20, ratio * 60)  # 20-60 range
-        except:
-            pass
-
-        return 50  # Default score
+        min_sal, max_sal = salary
+        avg_salary = (min_sal + max_sal) / 2
+
+        # Score based on how salary compares to user expectation
+        if avg_salary >= profile.salary:
+            # Higher than expected - good score
+            ratio = min(1.5, avg_salary / profile.salary)  # Cap at 1.5x
+            return min(100, 60 + ((ratio - 1) * 80))  # 60-100 range
+        else:
+            # Lower than expected - reduced score
+            ratio = avg_salary / profile.salary
+            return max(20, ratio * 60)  # 20-60 range
 
     def _ensure_salary_diversity(self, jobs_data: list, profile: UserProfile) -> list:
         """Ensure all jobs have unique salary ranges with jitter"""
-        import random
-
         seen_ranges = set()
         for job in jobs_data:
-            original_range = job.get("salary_range")
-            if not original_range:
-                # Generate salary if missing
-                job["salary_range"] = self._estimate_salary_range(profile, job["title"])
-
-            # Add jitter to avoid duplicates
-            salary_range = job["salary_range"]
-            counter = 0
-            while salary_range in seen_ranges and counter < 10:
-                # Extract numbers and add jitter
-                try:
-                    import re
-                    numbers = re.findall(r'[\d,]+', salary_range.replace(',', ''))
-                    if len(numbers) >= 2:
-                        min_sal = int(numbers[0])
-                        max_sal = int(numbers[1])
-
-                        # Add ±5-10% jitter
-                        jitter_pct = (random.random() - 0.5) * 0.2  # ±10%
-                        min_sal = int(min_sal * (1 + jitter_pct))
-                        max_sal = int(max_sal * (1 + jitter_pct))
-
-                        salary_range = f"${min_sal:,} - ${max_sal:,}"
-                        counter += 1
-                except:
-                    # Fallback: add suffix
-                    salary_range = f"{original_range} (Negotiable)"
-                    break
+            self._diversify_salary(job, seen_ranges, profile)
+        return jobs_data
 
-            job["salary_range"] = salary_range
-            seen_ranges.add(salary_range)
+    def _diversify_salary(self, job: JobRecord, seen_ranges: set, profile: UserProfile):
+        """Give ``job`` a salary range not in ``seen_ranges`` (jittering duplicates) and record it"""
+        import random
 
-        return jobs_data
+        if not job.salary:
+            # Generate salary if missing
+            job.salary = self._estimate_salary_range(profile, job.title)
+
+        # Add ±5-10% jitter to avoid duplicates
+        salary = original = job.salary
+        counter = 0
+        while salary in seen_ranges and counter < 10:
+            jitter_pct = (random.random() - 0.5) * 0.2  # ±10%
+            salary = (int(original[0] * (1 + jitter_pct)), int(original[1] * (1 + jitter_pct)))
+            counter += 1
+
+        job.salary = salary
+        seen_ranges.add(salary)
@@ -0,0 +1,191 @@
+# agents/dedup.py
+"""Near-duplicate listing detection in roughly linear time.
+
+Addresses are normalized ("Street" -> "st", "Apt 4" / "#4" -> "unit 4"),
+shingled into character 3-grams and MinHashed, all in NumPy. Listings are
+bucketed by each LSH band of their signature together with a coordinate
+grid cell, so only listings that agree on a band *and* sit near each other
+are ever compared. House and unit numbers are part of the bucket key, so
+"123 Main St" never meets "125 Main St". Candidates are confirmed on the
+estimated Jaccard and merged with union-find; nothing is compared
+pairwise across the whole set.
+"""
+import re
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+# Signature length = BANDS * ROWS; a pair with Jaccard s shares a band with probability 1-(1-s**ROWS)**BANDS
+BANDS = 16
+ROWS = 4
+# Estimated Jaccard of two address shingle sets for them to be the same place
+SIMILARITY = 0.6
+# Grid cell size in degrees (~550m of latitude); listings a cell or more apart on either axis never merge
+CELL_DEGREES = 0.005
+# Members of one bucket each listing is compared with
+WINDOW = 16
+# Listings per MinHash chunk, bounding the (permutations x shingles) temporary
+CHUNK = 256
+
+# Multiply-shift hashes: the top 32 bits of (a * x + b) mod 2**64, with odd a
+_rng = np.random.default_rng(0x5EED)
+_A = (_rng.integers(0, 1 << 63, BANDS * ROWS, dtype=np.uint64) | np.uint64(1))[:, None]
+_B = _rng.integers(0, 1 << 63, BANDS * ROWS, dtype=np.uint64)[:, None]
+_SHIFT = np.uint64(32)
+# Odd multiplier for folding values into one wrapping 64-bit key
+_MIX = np.int64(0x100000001B3)
+
+_ABBREVIATIONS = {
+    "street": "st", "str": "st", "avenue": "ave", "av": "ave", "boulevard": "blvd", "road": "rd",
+    "drive": "dr", "lane": "ln", "court": "ct", "place": "pl", "parkway": "pkwy", "highway": "hwy",
+    "square": "sq", "terrace": "ter", "north": "n", "south": "s", "east": "e", "west": "w",
+    "apartment": "unit", "apt": "unit", "suite": "unit", "ste": "unit", "no": "unit",
+}
+_PUNCTUATION = re.compile(r"[^\w\s]")
+# House number ("123", "123b") and unit ("unit 4", "unit 12a") of a normalized address; zip codes don't count
+_HOUSE = re.compile(r"^\d+\w*")
+_UNIT = re.compile(r"\bunit (\w+)")
+
+
+def _words(text: str) -> list:
+    text = _PUNCTUATION.sub(" ", text.lower().replace("#", " unit "))
+    return [_ABBREVIATIONS.get(word, word) for word in text.split()]
+
+
+@lru_cache(maxsize=64)
+def _city_words(city: str) -> frozenset:
+    return frozenset(_words(city))
+
+
+def normalize_address(address: str, city: str = "") -> str:
+    """Lowercase, unpunctuated, abbreviated; a trailing ``city`` ("Houston, TX") and zip code are dropped"""
+    words = _words(address)
+    city_words = _city_words(city)
+    # "Main St" and "Main St, Houston, TX 77002" are the same listing when searching Houston
+    while len(words) > 1 and (words[-1] in city_words or (len(words[-1]) == 5 and words[-1].isdigit())):
+        words.pop()
+    # "unit unit 4" from "Apt #4"
+    return " ".join(word for i, word in enumerate(words) if not (word == "unit" and i and words[i - 1] == "unit"))
+
+
+def _numbers(normalized: str) -> tuple:
+    house = _HOUSE.match(normalized)
+    return house.group() if house else "", tuple(_UNIT.findall(normalized))
+
+
+def _minhash(normalized: List[str]) -> np.ndarray:
+    """(n, BANDS * ROWS) signatures over each address's byte 3-grams; hashes are 32-bit"""
+    signatures = np.empty((len(normalized), BANDS * ROWS), dtype=np.uint32)
+    for start in range(0, len(normalized), CHUNK):
+        chunk = normalized[start:start + CHUNK]
+        # Padded with NUL on both sides so short addresses still have grams; NUL also separates them
+        encoded = [f"\0{text}\0".encode("utf-8") for text in chunk]
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        grams = (data[:-2] << np.uint64(16)) | (data[1:-1] << np.uint64(8)) | data[2:]
+        # Gram i starts in the address whose bytes contain i; drop grams spanning two addresses
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        valid = np.ones(len(grams), dtype=bool)
+        valid[np.concatenate([ends[:-1] - 2, ends[:-1] - 1])] = False
+        grams = grams[valid]
+        gram_starts = starts - 2 * np.arange(len(chunk))
+        hashed = (_A * grams + _B) >> _SHIFT
+        signatures[start:start + len(chunk)] = np.minimum.reduceat(hashed, gram_starts, axis=1).T
+    return signatures
+
+
+def _cells(lat: np.ndarray, lng: np.ndarray):
+    """Cell ids in four grids shifted by half a cell, so any two points closer than
+    half a cell on each axis share a cell in at least one grid"""
+    for shift_lat in (0.0, 0.5):
+        for shift_lng in (0.0, 0.5):
+            row = np.floor(lat / CELL_DEGREES + shift_lat).astype(np.int64)
+            col = np.floor(lng / CELL_DEGREES + shift_lng).astype(np.int64)
+            yield row * 1_000_003 + col
+
+
+def _find(parent: np.ndarray, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def duplicate_groups(addresses: List[str], lat, lng, city: str = "") -> np.ndarray:
+    """Group id per listing: the index of the first listing it duplicates, or its own.
+
+    ``city`` is the city the listings were searched in; it's dropped from the
+    end of addresses so "Main St" and "Main St, Houston" compare equal.
+    """
+    n = len(addresses)
+    parent = np.arange(n)
+    if n < 2:
+        return parent
+
+    normalized = [normalize_address(address, city) or "?" for address in addresses]
+    # House and unit numbers must match exactly; "123 Main St" and "125 Main St" are near in every other way
+    numbers = np.fromiter((hash(_numbers(text)) for text in normalized), dtype=np.int64, count=n)
+    signatures = _minhash(normalized)
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+
+    # One 64-bit key per band (collisions only add candidates, which are checked below)
+    band_keys = [numbers.copy() for _ in range(BANDS)]
+    for band in range(BANDS):
+        for row in range(ROWS):
+            band_keys[band] = band_keys[band] * _MIX + signatures[:, band * ROWS + row].astype(np.int64)
+
+    # Candidates: listings sharing a (band, cell) bucket, each paired with the next WINDOW - 1
+    # members in sorted order (every pair in buckets up to WINDOW; anything larger is one building
+    # listed over and over, where near neighbours chain the group together). True duplicates turn
+    # up in most of the 64 (grid, band) passes, so pairs are deduplicated after each grid.
+    pairs = np.empty(0, dtype=np.int64)
+    for cells in _cells(lat, lng):
+        candidates = [pairs]
+        for keys in band_keys:
+            bucket = keys * _MIX + cells
+            order = np.argsort(bucket)
+            ordered = bucket[order]
+            # Positions whose next member is in the same bucket; the run shrinks with each offset
+            starts = np.flatnonzero(ordered[1:] == ordered[:-1])
+            for offset in range(1, WINDOW):
+                if not len(starts):
+                    break
+                first, second = order[starts], order[starts + offset]
+                candidates.append(np.minimum(first, second) * n + np.maximum(first, second))
+                starts = starts[(starts + offset + 1 < n)]
+                starts = starts[ordered[starts + offset + 1] == ordered[starts]]
+        pairs = np.unique(np.concatenate(candidates))
+    if not len(pairs):
+        return parent
+    a, b = pairs // n, pairs % n
+
+    # Sharing a cell already bounds the distance; confirm the addresses are alike
+    similar = (signatures[a] == signatures[b]).mean(axis=1) >= SIMILARITY
+    for i, j in zip(a[similar].tolist(), b[similar].tolist()):
+        root_i, root_j = _find(parent, i), _find(parent, j)
+        if root_i != root_j:
+            # The earlier listing stays the representative
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    # Point every listing straight at its root
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            return parent
+        parent = grand
+
+
+def dedupe_listings(listings: list, city: str = "") -> list:
+    """``listings`` (ListingRecord) without near-duplicates; the first of each group is kept, in order"""
+    if len(listings) < 2:
+        return list(listings)
+    groups = duplicate_groups(
+        [listing.address for listing in listings],
+        [listing.lat for listing in listings],
+        [listing.lng for listing in listings],
+        city,
+    )
+    return [listing for i, listing in enumerate(listings) if groups[i] == i]
@@ -1,44 +1,82 @@
 # agents/finance_agent/agent.py
-import os
-from google import genai
-from google.genai.types import GenerateContentConfig, HttpOptions
+from ..transport import get_transport
+from ..rent_sketch import get_rent_sketches
 from ..models import UserProfile, FinanceOutput, AffordabilityInfo, MoveCashNeeded
 
+# Affordability rules, shared with the vectorized scenario grid in backend.scenarios
+RENT_SHARE = 0.30        # of gross income
+NEAR_LOW, NEAR_HIGH = 0.9, 1.1  # budget within this band of the recommended rent is "near"
+DEPOSIT_MONTHS = 2       # first + last month
+MOVING_COST = 800
+SETUP_COST = 300         # utilities, internet setup
+BUFFER_MONTHS = 0.5
+
 class FinanceAgent:
     def __init__(self):
-        self.client = genai.Client(
-            api_key=os.getenv("GOOGLE_API_KEY"),
-            http_options=HttpOptions(api_version="v1")
-        )
+        self.transport = get_transport()
 
-    async def run(self, profile: UserProfile) -> FinanceOutput:
+    async def run(self, profile: UserProfile, with_tips: bool = True) -> FinanceOutput:
+        """Affordability and move-in cash; ``with_tips=False`` skips the LLM tips (empty list)"""
         # Calculate recommended max rent (30% rule)
         # If salary is 0 or not provided, estimate from budget (reverse 30% rule)
         if profile.salary and profile.salary > 0:
-            recommended_max_rent = int(profile.salary * 0.30 / 12)
+            recommended_max_rent = int(profile.salary * RENT_SHARE / 12)
         else:
             # Estimate annual salary from monthly budget (budget should be ~30% of monthly income)
-            estimated_monthly_income = profile.budget / 0.30
+            estimated_monthly_income = profile.budget / RENT_SHARE
             estimated_annual_salary = estimated_monthly_income * 12
-            recommended_max_rent = int(estimated_annual_salary * 0.30 / 12)
+            recommended_max_rent = int(estimated_annual_salary * RENT_SHARE / 12)
 
         # Determine budget vs recommended comparison
-        if profile.budget < recommended_max_rent * 0.9:
+        if profile.budget < recommended_max_rent * NEAR_LOW:
             budget_vs_recommended = "below"
-        elif profile.budget <= recommended_max_rent * 1.1:
+        elif profile.budget <= recommended_max_rent * NEAR_HIGH:
             budget_vs_recommended = "near"
         else:
             budget_vs_recommended = "above"
 
+        market_percentile, market_median_rent = self.market_position(profile)
+
         # Calculate move-in costs
-        deposits = profile.budget * 2  # first + last month
-        moving = 800  # estimated moving costs
-        setup = 300   # utilities, internet setup
-        buffer = int(profile.budget * 0.5)  # emergency buffer
+        deposits = profile.budget * DEPOSIT_MONTHS
+        moving = MOVING_COST  # estimated moving costs
+        setup = SETUP_COST
+        buffer = int(profile.budget * BUFFER_MONTHS)  # emergency buffer
         total = deposits + moving + setup + buffer
 
-        # Use Gemini to generate personalized financial tips
         display_salary = profile.salary if profile.salary > 0 else int(estimated_annual_salary) if 'estimated_annual_salary' in locals() else "not provided"
+        tips = self._generate_tips(profile, display_salary) if with_tips else []
+
+        affordability = AffordabilityInfo(
+            recommended_max_rent=recommended_max_rent,
+            credit_band=profile.credit_band,
+            budget_vs_recommended=budget_vs_recommended,
+            market_percentile=market_percentile,
+            market_median_rent=market_median_rent
+        )
+
+        move_cash_needed = MoveCashNeeded(
+            deposits=deposits,
+            moving=moving,
+            setup=setup,
+            buffer=buffer,
+            total=total
+        )
+
+        return FinanceOutput(
+            affordability=affordability,
+            move_cash_needed=move_cash_needed,
+            tips=tips
+        )
+
+    def market_position(self, profile: UserProfile) -> tuple:
+        """(budget percentile, median rent) among rents the housing agent has seen in the city"""
+        sketches = get_rent_sketches()
+        percentile = sketches.percentile(profile.city, profile.budget)
+        return percentile, sketches.median(profile.city) if percentile is not None else None
+
+    def _generate_tips(self, profile: UserProfile, display_salary) -> list:
+        # Use Gemini to generate personalized financial tips
         prompt = f"""
         Generate 2-3 concise financial tips for someone moving to {profile.city} with:
         - Budget: ${profile.budget}/month
@@ -50,13 +88,13 @@ class FinanceAgent:
         """
 
         try:
-            response = self.client.models.generate_content(
+            response = self.transport.generate_content(
                 model="gemini-1.5-pro",
                 contents=prompt,
-                config=GenerateContentConfig(
-                    temperature=0.7,
-                    max_output_tokens=200
-                )
+                config={
+                    "temperature": 0.7,
+                    "max_output_tokens": 200
+                }
             )
             tips_text = response.text.strip()
             # Parse the response into individual tips
@@ -71,22 +109,4 @@ class FinanceAgent:
                 "Budget for unexpected moving expenses."
             ]
 
-        affordability = AffordabilityInfo(
-            recommended_max_rent=recommended_max_rent,
-            credit_band=profile.credit_band,
-            budget_vs_recommended=budget_vs_recommended
-        )
-
-        move_cash_needed = MoveCashNeeded(
-            deposits=deposits,
-            moving=moving,
-            setup=setup,
-            buffer=buffer,
-            total=total
-        )
-
-        return FinanceOutput(
-            affordability=affordability,
-            move_cash_needed=move_cash_needed,
-            tips=tips
-        )
+        return tips
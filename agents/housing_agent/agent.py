@@ -1,29 +1,50 @@
 # agents/housing_agent/agent.py
-import os
 import json
-from typing import Dict, Any
-from google import genai
-from google.genai.types import GenerateContentConfig, HttpOptions
-from ..models import UserProfile, FinanceOutput, LifestyleOutput, HousingOutput, HousingRecommendation, Coordinates
+from ..transport import get_transport
+from ..snapshot import market_listings_key
+from ..matching import interest_matcher
+from ..dedup import dedupe_listings
+from ..rent_sketch import get_rent_sketches
+from ..records import ListingRecord
+from ..models import UserProfile, FinanceOutput, LifestyleOutput, HousingOutput
+
+# Rents the listing search asks for, relative to the budget it searched with
+SEARCH_BELOW = 300
+SEARCH_ABOVE = 500
+# Listings in a city's market sample, spread over its whole rent range
+MARKET_SAMPLE = 40
+
+
+def search_covers(search_budget: int, budget: int) -> bool:
+    """Whether listings searched for ``search_budget`` still suit ``budget``, so rescoring is enough"""
+    return search_budget - SEARCH_BELOW <= budget <= search_budget + SEARCH_ABOVE
+
 
 class HousingAgent:
     def __init__(self):
-        self.client = genai.Client(
-            api_key=os.getenv("GOOGLE_API_KEY"),
-            http_options=HttpOptions(api_version="v1")
-        )
+        self.transport = get_transport()
 
     async def run(self, profile: UserProfile, finance_results: FinanceOutput, lifestyle_results: LifestyleOutput) -> HousingOutput:
-        # Extract relevant data for scoring
+        listings_data = self.search_listings(profile, lifestyle_results)
+        return self.score_listings(listings_data, profile, finance_results, lifestyle_results)
+
+    def rescore(self, profile: UserProfile, finance_results: FinanceOutput, lifestyle_results: LifestyleOutput,
+                housing_results: HousingOutput) -> HousingOutput:
+        """Score previously found listings again for a changed credit band, or a budget ``search_covers``"""
+        listings = [ListingRecord.from_model(rec) for rec in housing_results.housing_recommendations]
+        return self.score_listings(listings, profile, finance_results, lifestyle_results)
+
+    def search_listings(self, profile: UserProfile, lifestyle_results: LifestyleOutput) -> list:
+        """Generate candidate listings (ListingRecord) near the preferred neighborhoods"""
+        self._observe_market(profile.city)
         max_budget = profile.budget
-        credit_score = self._get_credit_score_estimate(profile.credit_band)
         preferred_neighborhoods = [lifestyle_results.primary_fit.name] + [n.name for n in lifestyle_results.alternatives]
         user_interests = profile.interests
 
         # Use Gemini to generate realistic apartment listings
         prompt = f"""
         Generate 15 realistic apartment listings for {profile.city} with this criteria:
-        - Budget range: ${max_budget-300} to ${max_budget+500}/month. each rent price is different
+        - Budget range: ${max_budget-SEARCH_BELOW} to ${max_budget+SEARCH_ABOVE}/month. each rent price is different
         - Target neighborhoods: {', '.join(preferred_neighborhoods)}
         - User interests: {', '.join(user_interests)}
 
@@ -50,14 +71,14 @@ class HousingAgent:
         """
 
         try:
-            response = self.client.models.generate_content(
+            response = self.transport.generate_content(
                 model="gemini-1.5-pro",
                 contents=prompt,
-                config=GenerateContentConfig(
-                    temperature=0.5,
-                    max_output_tokens=1000,
-                    response_mime_type="application/json"
-                )
+                config={
+                    "temperature": 0.5,
+                    "max_output_tokens": 1000,
+                    "response_mime_type": "application/json"
+                }
             )
             result = json.loads(response.text.strip())
             listings_data = result.get("listings", [])
@@ -70,28 +91,72 @@ class HousingAgent:
                 {"address": f"321 Premium Blvd, {profile.city}", "rent": max_budget + 100, "min_credit_score": 700, "amenities": ["fitness center", "concierge"], "lat": 29.75, "lng": -95.35},
             ]
 
-        # Score each listing
-        recommendations = []
-        for listing in listings_data:
-            match_score, reason = self._calculate_match_score(
-                listing, profile, finance_results, lifestyle_results, credit_score
-            )
+            return [ListingRecord.from_dict(listing) for listing in listings_data]
 
-            recommendation = HousingRecommendation(
-                address=listing["address"],
-                rent=listing["rent"],
-                min_credit_score=listing["min_credit_score"],
-                amenities=listing["amenities"],
-                coords=Coordinates(lat=listing["lat"], lng=listing["lng"]),
-                match_score=match_score,
-                reason=reason
-            )
-            recommendations.append(recommendation)
+        # Sources repeat the same unit under slightly different addresses; keep the first of each
+        # (Generated rents are asked for around this user's budget, so they don't feed the market rent sketches)
+        return dedupe_listings([ListingRecord.from_dict(listing) for listing in listings_data], profile.city)
+
+    def _observe_market(self, city: str):
+        """Feed the snapshot's market sample for ``city`` to the rent sketches, once per snapshot"""
+        snapshot = self.transport.snapshot
+        if market_listings_key(city) not in snapshot:
+            return
+        get_rent_sketches().observe_once(
+            city, f"snapshot:{snapshot.built_at}",
+            lambda: [listing.get("rent") for listing in snapshot.get(market_listings_key(city))],
+        )
+
+    def _fetch_market_listings(self, city: str) -> list:
+        """Ask Gemini for a sample of the city's listings priced like its whole market (for the snapshot)"""
+        prompt = f"""
+        Generate {MARKET_SAMPLE} realistic apartment listings currently on the market in {city}.
+        Sample the whole rental market, from the cheapest studios to luxury units, with each price
+        range appearing about as often as it does in {city}. Do not aim at any particular budget.
+
+        Respond with ONLY a JSON object in this exact format:
+        {{
+            "listings": [
+                {{
+                    "address": "123 Main St, {city}",
+                    "rent": 1500,
+                    "min_credit_score": 650,
+                    "amenities": ["gym", "pool", "parking"],
+                    "lat": 29.7604,
+                    "lng": -95.3698
+                }}
+            ]
+        }}
+        """
+        response = self.transport.generate_content(
+            model="gemini-1.5-pro",
+            contents=prompt,
+            config={
+                "temperature": 0.5,
+                "max_output_tokens": 4000,
+                "response_mime_type": "application/json"
+            }
+        )
+        listings = json.loads(response.text.strip()).get("listings", [])
+        return [listing.as_dict() for listing in dedupe_listings([ListingRecord.from_dict(l) for l in listings], city)]
+
+    def score_listings(self, listings: list, profile: UserProfile, finance_results: FinanceOutput,
+                       lifestyle_results: LifestyleOutput) -> HousingOutput:
+        """Score and rank listings against the profile's budget, credit and interests"""
+        credit_score = self._get_credit_score_estimate(profile.credit_band)
+
+        # Score each listing; records only become models once ranked
+        scored = [
+            (*self._calculate_match_score(listing, profile, finance_results, lifestyle_results, credit_score), listing)
+            for listing in listings
+        ]
 
         # Sort by match score
-        recommendations.sort(key=lambda x: x.match_score, reverse=True)
+        scored.sort(key=lambda x: x[0], reverse=True)
 
-        return HousingOutput(housing_recommendations=recommendations)
+        return HousingOutput(housing_recommendations=[
+            listing.to_model(match_score, reason) for match_score, reason, listing in scored
+        ])
 
     def _get_credit_score_estimate(self, credit_band: str) -> int:
         """Convert credit band to estimated numeric score"""
@@ -103,7 +168,7 @@ class HousingAgent:
         }
         return credit_map.get(credit_band, 650)
 
-    def _calculate_match_score(self, listing: Dict[str, Any], profile: UserProfile,
+    def _calculate_match_score(self, listing: ListingRecord, profile: UserProfile,
                              finance_results: FinanceOutput, lifestyle_results: LifestyleOutput,
                              credit_score: int) -> tuple[int, str]:
         """Calculate match score and reason for a listing"""
@@ -111,35 +176,29 @@ class HousingAgent:
         reasons = []
 
         # Affordability (40% of score)
-        if listing["rent"] <= profile.budget:
-            if listing["rent"] <= finance_results.affordability.recommended_max_rent:
+        if listing.rent <= profile.budget:
+            if listing.rent <= finance_results.affordability.recommended_max_rent:
                 score += 40
                 reasons.append("within recommended budget")
             else:
                 score += 25
                 reasons.append("within your budget")
-        elif listing["rent"] <= profile.budget * 1.1:
+        elif listing.rent <= profile.budget * 1.1:
             score += 15
             reasons.append("slightly above budget")
 
         # Credit requirements (25% of score)
-        if credit_score >= listing["min_credit_score"]:
+        if credit_score >= listing.min_credit_score:
             score += 25
             reasons.append("meets credit requirements")
-        elif credit_score >= listing["min_credit_score"] - 30:
+        elif credit_score >= listing.min_credit_score - 30:
             score += 15
             reasons.append("close to credit requirements")
 
         # Lifestyle fit (25% of score)
-        user_interests_lower = [i.lower() for i in profile.interests]
-        amenity_keywords = [amenity.lower() for amenity in listing["amenities"]]
-
-        lifestyle_matches = 0
-        for interest in user_interests_lower:
-            for amenity in amenity_keywords:
-                if interest in amenity or any(word in amenity for word in interest.split()):
-                    lifestyle_matches += 1
-                    break
+        lifestyle_matches = interest_matcher(profile.interests).count(
+            amenity.lower() for amenity in listing.amenities
+        )
 
         if lifestyle_matches > 0:
             lifestyle_score = min(25, lifestyle_matches * 8)
@@ -148,7 +207,8 @@ class HousingAgent:
 
         # Location bonus (10% of score)
         # Simple heuristic: closer to city center is better
-        if "downtown" in listing["address"].lower() or "center" in listing["address"].lower():
+        address = listing.address.lower()
+        if "downtown" in address or "center" in address:
             score += 10
             reasons.append("prime location")
 
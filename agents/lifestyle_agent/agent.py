@@ -1,55 +1,83 @@
 # agents/lifestyle_agent/agent.py
-import os
 import json
-from google import genai
-from google.genai.types import GenerateContentConfig, HttpOptions
-from ..models import UserProfile, LifestyleOutput, NeighborhoodFit, Place, Coordinates
+from typing import Optional
+from ..cache import PLACES_TTL, NEIGHBORHOODS_TTL
+from ..snapshot import neighborhoods_key, places_key
+from ..matching import KeywordTable, interest_matcher
+from ..vectors import best_similarity, relevance
+from ..transport import get_transport, digest
+from ..records import PlaceRecord
+from ..models import UserProfile, LifestyleOutput, NeighborhoodFit
+
+
+# Interest keyword -> Places text query; also the vocabulary the city snapshot precomputes
+INTEREST_QUERIES = {
+    "gym": "gym fitness center",
+    "fitness": "gym fitness center",
+    "workout": "gym fitness center",
+    "coffee": "coffee shop cafe",
+    "food": "restaurant",
+    "dining": "restaurant",
+    "vegan": "vegan restaurant",
+    "nightlife": "bar nightclub",
+    "music": "music venue concert hall",
+    "art": "art gallery museum",
+    "gallery": "art gallery",
+    "park": "park outdoor recreation",
+    "hiking": "hiking trail park",
+    "outdoor": "park outdoor recreation",
+    "shopping": "shopping mall store",
+    "yoga": "yoga studio",
+    "spa": "spa wellness center"
+}
+
+# Queries used to fill remaining POI slots
+GENERAL_QUERIES = ["restaurant", "coffee shop", "park", "gym", "shopping"]
+
+_INTEREST_QUERY_TABLE = KeywordTable(INTEREST_QUERIES)
+
+# Cosine at which a neighborhood tag counts as matching an interest
+TAG_MATCH = 0.5
+
+
+class PlacesStatusError(Exception):
+    """Places API answered with a non-200 status"""
+
 
 class LifestyleAgent:
     def __init__(self):
-        self.client = genai.Client(
-            api_key=os.getenv("GOOGLE_API_KEY"),
-            http_options=HttpOptions(api_version="v1")
-        )
+        self.transport = get_transport()
+        self.maps_api_key = self.transport.credential("GOOGLE_MAPS_API_KEY")
 
-    async def run(self, profile: UserProfile) -> LifestyleOutput:
-        # Use Gemini to analyze neighborhoods based on user profile
-        prompt = f"""
-        You are analyzing neighborhoods in {profile.city} for someone with these characteristics:
-        - Interests: {', '.join(profile.interests)}
-        - Lifestyle: {profile.lifestyle}
-        - Hobbies: {profile.hobbies}
-        - Career: {profile.career_path}
+    async def run(self, profile: UserProfile, include_places: bool = True) -> LifestyleOutput:
+        neighborhoods = self._analyze_neighborhoods(profile)
 
-        Research and recommend 4 real neighborhoods in {profile.city}. For each neighborhood, identify relevant tags/characteristics that match the user's profile.
+        primary_fit = neighborhoods[0] if neighborhoods else NeighborhoodFit(name="Downtown", tags=["walkable"], match_score=50)
+        alternatives = neighborhoods[1:4] if len(neighborhoods) > 1 else []
 
-        Respond with ONLY a JSON object in this exact format:
-        {{
-            "neighborhoods": [
-                {{"name": "Neighborhood Name", "tags": ["tag1", "tag2", "tag3"], "match_score": 85}},
-                {{"name": "Another Neighborhood", "tags": ["tag1", "tag2"], "match_score": 78}}
-            ]
-        }}
+        # Get 10 POIs using Google Places, unless the caller only needs the neighborhoods
+        places = await self._get_places_of_interest(profile) if include_places else []
 
-        Score each neighborhood 0-100 based on how well it matches the user's interests and lifestyle.
-        Include 3-5 relevant tags per neighborhood (e.g., "nightlife", "vegan-friendly", "walkable", "art scene", "parks").
-        """
+        return LifestyleOutput(
+            primary_fit=primary_fit,
+            alternatives=alternatives,
+            explanation=f"Ranked neighborhoods by overlap between your interests ({', '.join(profile.interests)}) and neighborhood characteristics.",
+            places=places
+        )
+
+    def _analyze_neighborhoods(self, profile: UserProfile) -> list:
+        """Rank neighborhoods for the profile with Gemini, falling back to mock data"""
+        precomputed = self.transport.snapshot.get(neighborhoods_key(profile.city))
+        if precomputed:
+            return self._rank_precomputed_neighborhoods(precomputed, profile)
 
         try:
-            response = self.client.models.generate_content(
-                model="gemini-1.5-pro",
-                contents=prompt,
-                config=GenerateContentConfig(
-                    temperature=0.5,
-                    max_output_tokens=800,
-                    response_mime_type="application/json"
-                )
+            # Analyses are shared across workers; only successful Gemini answers are cached
+            neighborhoods_data = self.transport.cache.get_or_compute(
+                self._neighborhood_cache_key(profile),
+                lambda: self._fetch_neighborhoods(profile),
+                NEIGHBORHOODS_TTL,
             )
-            result = json.loads(response.text.strip())
-            neighborhoods_data = result.get("neighborhoods", [])
-
-            # Sort by match score
-            neighborhoods_data.sort(key=lambda x: x.get("match_score", 0), reverse=True)
 
             # Convert to NeighborhoodFit objects
             neighborhoods = [
@@ -69,11 +97,13 @@ class LifestyleAgent:
                 {"name": "University Area", "tags": ["young-professionals", "affordable", "transit"], "match_score": 72}
             ]
 
-            # Score based on interest overlap for fallback
-            user_interests_lower = [i.lower() for i in profile.interests]
+            # Score based on interest overlap for fallback: tags similar to any interest,
+            # so "coffee" counts for "cafes" and exact matches still do
+            tags = [[tag] for n in mock_neighborhoods for tag in n["tags"]]
+            similar = iter(best_similarity(profile.interests, tags) >= TAG_MATCH)
             for neighborhood in mock_neighborhoods:
-                overlap = len(set(neighborhood["tags"]).intersection(user_interests_lower))
-                neighborhood["match_score"] = min(100, 50 + overlap * 15)
+                overlap = sum(next(similar) for _ in neighborhood["tags"])
+                neighborhood["match_score"] = min(100, 50 + int(overlap) * 15)
 
             mock_neighborhoods.sort(key=lambda x: x["match_score"], reverse=True)
             neighborhoods = [
@@ -84,25 +114,80 @@ class LifestyleAgent:
                 ) for n in mock_neighborhoods
             ]
 
-        primary_fit = neighborhoods[0] if neighborhoods else NeighborhoodFit(name="Downtown", tags=["walkable"], match_score=50)
-        alternatives = neighborhoods[1:4] if len(neighborhoods) > 1 else []
+        return neighborhoods
 
-        # Get 10 POIs using Google Places
-        places = await self._get_places_of_interest(profile)
+    def _rank_precomputed_neighborhoods(self, neighborhoods_data: list, profile: UserProfile) -> list:
+        """Re-rank a city-wide snapshot analysis by how many tags are similar to the profile's interests"""
+        tags = [[tag] for n in neighborhoods_data for tag in n["tags"]]
+        similar = iter(best_similarity(profile.interests, tags) >= TAG_MATCH)
 
-        return LifestyleOutput(
-            primary_fit=primary_fit,
-            alternatives=alternatives,
-            explanation=f"Ranked neighborhoods by overlap between your interests ({', '.join(profile.interests)}) and neighborhood characteristics.",
-            places=places
+        neighborhoods = []
+        for n in neighborhoods_data:
+            overlap = sum(next(similar) for _ in n["tags"])
+            neighborhoods.append(NeighborhoodFit(
+                name=n["name"],
+                tags=n["tags"],
+                match_score=min(100, n["match_score"] + int(overlap) * 5)
+            ))
+
+        neighborhoods.sort(key=lambda n: n.match_score, reverse=True)
+        return neighborhoods
+
+    def _fetch_neighborhoods(self, profile: UserProfile) -> list:
+        """Ask Gemini for neighborhoods that fit the profile, best first"""
+        # Use Gemini to analyze neighborhoods based on user profile
+        prompt = f"""
+        You are analyzing neighborhoods in {profile.city} for someone with these characteristics:
+        - Interests: {', '.join(profile.interests)}
+        - Lifestyle: {profile.lifestyle}
+        - Hobbies: {profile.hobbies}
+        - Career: {profile.career_path}
+
+        Research and recommend 4 real neighborhoods in {profile.city}. For each neighborhood, identify relevant tags/characteristics that match the user's profile.
+
+        Respond with ONLY a JSON object in this exact format:
+        {{
+            "neighborhoods": [
+                {{"name": "Neighborhood Name", "tags": ["tag1", "tag2", "tag3"], "match_score": 85}},
+                {{"name": "Another Neighborhood", "tags": ["tag1", "tag2"], "match_score": 78}}
+            ]
+        }}
+
+        Score each neighborhood 0-100 based on how well it matches the user's interests and lifestyle.
+        Include 3-5 relevant tags per neighborhood (e.g., "nightlife", "vegan-friendly", "walkable", "art scene", "parks").
+        """
+
+        response = self.transport.generate_content(
+            model="gemini-1.5-pro",
+            contents=prompt,
+            config={
+                "temperature": 0.5,
+                "max_output_tokens": 800,
+                "response_mime_type": "application/json"
+            }
         )
+        result = json.loads(response.text.strip())
+        neighborhoods_data = result.get("neighborhoods", [])
+
+        # Sort by match score
+        neighborhoods_data.sort(key=lambda x: x.get("match_score", 0), reverse=True)
+        return neighborhoods_data
+
+    def _neighborhood_cache_key(self, profile: UserProfile) -> str:
+        return "neighborhoods:" + digest({
+            "city": profile.city.strip().lower(),
+            "interests": sorted(i.strip().lower() for i in profile.interests),
+            "lifestyle": profile.lifestyle.strip().lower(),
+            "hobbies": profile.hobbies.strip().lower(),
+            "career": profile.career_path.strip().lower(),
+        })
 
     async def _get_places_of_interest(self, profile: UserProfile) -> list:
         """Get 10 POIs using Google Places API based on user interests"""
         places = []
 
         if not self.maps_api_key:
-            return self._get_fallback_places(profile)
+            return [place.to_model() for place in self._get_fallback_places(profile)]
 
         try:
             city_coords = self._get_city_coordinates(profile.city)
@@ -119,8 +204,7 @@ class LifestyleAgent:
 
             # Fill remaining slots with general categories if needed
             if len(places) < 10:
-                general_queries = ["restaurant", "coffee shop", "park", "gym", "shopping"]
-                for query in general_queries:
+                for query in GENERAL_QUERIES:
                     if len(places) >= 10:
                         break
                     place_results = await self._search_places_by_query(query, profile.city, city_coords)
@@ -128,56 +212,46 @@ class LifestyleAgent:
 
         except Exception as e:
             print(f"Google Places API error: {e}")
-            return self._get_fallback_places(profile)
+            return [place.to_model() for place in self._get_fallback_places(profile)]
 
         # Ensure exactly 10 places with unique match scores
         places = places[:10]
         while len(places) < 10:
             places.extend(self._get_fallback_places(profile, count=10-len(places)))
 
-        # Calculate match scores and ensure uniqueness
+        # Calculate match scores and ensure uniqueness; tag similarity for all places in one batch
+        semantic = relevance(best_similarity(profile.interests, [place.category_tags for place in places[:10]])).tolist()
         for i, place in enumerate(places[:10]):
-            place.match_score = self._calculate_place_match_score(place, profile, i)
+            place.match_score = self._calculate_place_match_score(place, profile, i, semantic[i])
 
-        return places[:10]
+        return [place.to_model() for place in places[:10]]
 
     def _map_interests_to_queries(self, interests: list) -> list:
         """Map user interests to Google Places search queries"""
-        query_map = {
-            "gym": "gym fitness center",
-            "fitness": "gym fitness center",
-            "workout": "gym fitness center",
-            "coffee": "coffee shop cafe",
-            "food": "restaurant",
-            "dining": "restaurant",
-            "vegan": "vegan restaurant",
-            "nightlife": "bar nightclub",
-            "music": "music venue concert hall",
-            "art": "art gallery museum",
-            "gallery": "art gallery",
-            "park": "park outdoor recreation",
-            "hiking": "hiking trail park",
-            "outdoor": "park outdoor recreation",
-            "shopping": "shopping mall store",
-            "yoga": "yoga studio",
-            "spa": "spa wellness center"
-        }
-
-        queries = []
-        for interest in interests:
-            interest_lower = interest.lower()
-            for key, query in query_map.items():
-                if key in interest_lower:
-                    queries.append(query)
-                    break
-            else:
-                # Fallback: use the interest directly
-                queries.append(interest)
+        # Fallback: use the interest directly
+        queries = [_INTEREST_QUERY_TABLE.lookup(interest) or interest for interest in interests]
 
-        return list(set(queries))  # Remove duplicates
+        return list(dict.fromkeys(queries))  # Remove duplicates, keep order stable
 
     async def _search_places_by_query(self, query: str, city: str, city_coords: dict) -> list:
-        """Search Google Places for a specific query"""
+        """Search Google Places for a specific query, snapshot first, then the shared cache"""
+        precomputed = self.transport.snapshot.get(places_key(city, query))
+        if precomputed is not None:
+            return [PlaceRecord.from_dict(place) for place in precomputed]
+
+        try:
+            places = self.transport.cache.get_or_compute(
+                f"places:{city.strip().lower()}:{query.strip().lower()}",
+                lambda: [place.as_dict() for place in self._fetch_places(query, city, city_coords)],
+                PLACES_TTL,
+            )
+        except PlacesStatusError:
+            return []
+
+        return [PlaceRecord.from_dict(place) for place in places]
+
+    def _fetch_places(self, query: str, city: str, city_coords: dict) -> list:
+        """Call the Places text search API for a specific query"""
         places_url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
 
         params = {
@@ -188,25 +262,25 @@ class LifestyleAgent:
             "fields": "name,formatted_address,geometry,types,rating"
         }
 
-        response = requests.get(places_url, params=params, timeout=10)
+        response = self.transport.get(places_url, params=params, timeout=10)
 
-        if response.status_code == 200:
-            data = response.json()
-            results = data.get("results", [])
+        if response.status_code != 200:
+            raise PlacesStatusError(f"Places API returned {response.status_code}")
 
-            places = []
-            for result in results[:3]:  # Max 3 per query to avoid overwhelming
-                if result.get("geometry", {}).get("location"):
-                    place = self._convert_google_place_to_poi(result, query, city_coords)
-                    if place:
-                        places.append(place)
+        data = response.json()
+        results = data.get("results", [])
 
-            return places
+        places = []
+        for result in results[:3]:  # Max 3 per query to avoid overwhelming
+            if result.get("geometry", {}).get("location"):
+                place = self._convert_google_place_to_poi(result, query, city_coords)
+                if place:
+                    places.append(place)
 
-        return []
+        return places
 
-    def _convert_google_place_to_poi(self, place_data: dict, query: str, city_coords: dict) -> Place:
-        """Convert Google Places result to our Place model"""
+    def _convert_google_place_to_poi(self, place_data: dict, query: str, city_coords: dict) -> PlaceRecord:
+        """Convert Google Places result to a place record"""
         location = place_data.get("geometry", {}).get("location", {})
 
         # Extract categories from place types
@@ -219,46 +293,38 @@ class LifestyleAgent:
 
         reason = f"Matches your interest in {query.lower()}"
 
-        return Place(
+        return PlaceRecord(
             name=place_data.get("name", "Unknown Place"),
             category_tags=category_tags[:4],  # Limit to 4 tags
-            coords=Coordinates(
-                lat=location.get("lat", city_coords["lat"]),
-                lng=location.get("lng", city_coords["lng"])
-            ),
+            lat=location.get("lat", city_coords["lat"]),
+            lng=location.get("lng", city_coords["lng"]),
             reason=reason,
             match_score=0  # Will be calculated later
         )
 
-    def _calculate_place_match_score(self, place: Place, profile: UserProfile, index: int) -> int:
-        """Calculate match score using formula: 0.7*interest_relevance + 0.3*distance_score"""
+    def _calculate_place_match_score(self, place: PlaceRecord, profile: UserProfile, index: int,
+                                     semantic: Optional[float] = None) -> int:
+        """Calculate match score using formula: 0.7*interest_relevance + 0.3*distance_score
+
+        ``semantic`` is the place's tag similarity as 0-100 relevance, if already computed in a batch.
+        """
         import random
         from math import sqrt
 
-        # Interest relevance (70% weight)
-        user_interests_lower = [i.lower() for i in profile.interests]
-        place_tags_lower = [tag.lower() for tag in place.category_tags]
-
-        # Calculate overlap
-        interest_terms = set()
-        for interest in user_interests_lower:
-            interest_terms.update(interest.split())
-
-        tag_terms = set()
-        for tag in place_tags_lower:
-            tag_terms.update(tag.split())
-
-        if interest_terms:
-            intersection = len(interest_terms.intersection(tag_terms))
-            union = len(interest_terms.union(tag_terms))
-            interest_relevance = (intersection / union * 100) if union > 0 else 0
-        else:
+        # Interest relevance (70% weight): term overlap with the place's tags, or their
+        # n-gram similarity when that's higher ("climbing" vs "Bouldering Gym")
+        interest_relevance = interest_matcher(profile.interests).jaccard(place.category_tags)
+        if interest_relevance is None:
             interest_relevance = 50  # neutral if no interests
+        else:
+            if semantic is None:
+                semantic = float(relevance(best_similarity(profile.interests, [place.category_tags])[0]))
+            interest_relevance = max(interest_relevance, semantic)
 
         # Distance score (30% weight) - closer is better
         city_coords = self._get_city_coordinates(profile.city)
-        lat_diff = place.coords.lat - city_coords["lat"]
-        lng_diff = place.coords.lng - city_coords["lng"]
+        lat_diff = place.lat - city_coords["lat"]
+        lng_diff = place.lng - city_coords["lng"]
         distance_km = sqrt(lat_diff**2 + lng_diff**2) * 111  # rough km conversion
 
         if distance_km <= 1:
@@ -300,13 +366,11 @@ class LifestyleAgent:
             lat_offset = (i - 5) * 0.01
             lng_offset = (i - 5) * 0.01
 
-            place = Place(
+            place = PlaceRecord(
                 name=fallback["name"],
                 category_tags=fallback["categories"],
-                coords=Coordinates(
-                    lat=city_coords["lat"] + lat_offset,
-                    lng=city_coords["lng"] + lng_offset
-                ),
+                lat=city_coords["lat"] + lat_offset,
+                lng=city_coords["lng"] + lng_offset,
                 reason=fallback["reason"],
                 match_score=75 - (i * 5)  # Decreasing scores
             )
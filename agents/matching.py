@@ -0,0 +1,178 @@
+# agents/matching.py
+"""Interest matching shared by the housing and lifestyle agents.
+
+Patterns are compiled once into an Aho-Corasick automaton, so finding
+every pattern in a candidate's text is a single pass over that text no
+matter how many interests or keywords there are.
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Related words an interest word also matches: amenity substrings here, n-gram vectors in agents.vectors
+SYNONYMS = {
+    "gym": ("fitness",),
+    "fitness": ("gym",),
+    "workout": ("gym", "fitness"),
+    "swimming": ("pool",),
+    "swim": ("pool",),
+    "dog": ("pet",),
+    "dogs": ("pet",),
+    "cat": ("pet",),
+    "cats": ("pet",),
+    "car": ("parking", "garage"),
+    "hiking": ("trail",),
+    "running": ("trail",),
+    "outdoors": ("park", "trail"),
+    "laundry": ("washer",),
+    "climbing": ("bouldering",),
+    "bouldering": ("climbing",),
+    "coffee": ("cafe",),
+    "reading": ("library", "bookstore"),
+    "books": ("library", "bookstore"),
+    "art": ("gallery", "museum"),
+    "music": ("venue", "concert"),
+    "nightlife": ("bar", "nightclub"),
+}
+
+_SUFFIXES = ("ing", "es", "s")
+
+
+def stem(word: str) -> str:
+    """Crude suffix strip so "pets" finds "pet-friendly" and "hiking" finds "hike" """
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(texts: Iterable[str]) -> set:
+    """Lowercased whitespace tokens of all ``texts``"""
+    found = set()
+    for text in texts:
+        found.update(text.lower().split())
+    return found
+
+
+class Automaton:
+    """Aho-Corasick automaton over ``patterns``; ``find`` returns the indices that occur in a text"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail = [0]
+        self._out: List[frozenset] = [frozenset()]
+
+        outputs = [set()]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(index)
+
+        # Breadth first so every failure target is finished before it's used
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                outputs[nxt] |= outputs[self._fail[nxt]]
+        self._out = [frozenset(out) for out in outputs]
+
+    def find(self, text: str) -> set:
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+    def find_in(self, texts: Iterable[str]) -> set:
+        # Joined with a separator no pattern contains, so matches can't span two texts
+        return self.find("\x00".join(texts))
+
+
+class InterestMatcher:
+    """One profile's interests, compiled. Get instances from ``interest_matcher``."""
+
+    def __init__(self, interests: Tuple[str, ...]):
+        self.interests = interests
+        self.terms = frozenset(terms(interests))
+
+        # Pattern -> the interests it stands for. An interest matches a text when any
+        # of its words, their stems or synonyms appears in it as a substring.
+        owners: Dict[str, set] = {}
+        self._always = set()
+        for position, interest in enumerate(interests):
+            words = interest.split()
+            if not words:
+                # "" is a substring of anything
+                self._always.add(position)
+                continue
+            for word in words:
+                for pattern in (word, stem(word), *SYNONYMS.get(word, ())):
+                    owners.setdefault(pattern, set()).add(position)
+        self._automaton = Automaton(list(owners))
+        self._owners = [owners[pattern] for pattern in self._automaton.patterns]
+
+    def matching(self, texts: Iterable[str]) -> set:
+        """Positions of the interests found in any of ``texts`` (already lowercased)"""
+        texts = list(texts)
+        matched = set(self._always) if texts else set()
+        for index in self._automaton.find_in(texts):
+            matched |= self._owners[index]
+        return matched
+
+    def count(self, texts: Iterable[str]) -> int:
+        return len(self.matching(texts))
+
+    def jaccard(self, tags: Iterable[str]) -> Optional[float]:
+        """Term overlap with ``tags`` as a percentage; None when there are no interest terms"""
+        if not self.terms:
+            return None
+        tag_terms = terms(tags)
+        union = len(self.terms.union(tag_terms))
+        return len(self.terms.intersection(tag_terms)) / union * 100 if union else 0
+
+
+# Separates interests in the memo key; a flat string is cheaper to build per call than a tuple
+_KEY_SEPARATOR = "\x1f"
+
+
+@lru_cache(maxsize=1024)
+def _compiled(key: str) -> InterestMatcher:
+    return InterestMatcher(tuple(key.split(_KEY_SEPARATOR)) if key else ())
+
+
+def interest_matcher(interests: Iterable[str]) -> InterestMatcher:
+    """Compiled matcher for this interest list, shared by every agent and request that has it"""
+    return _compiled(_KEY_SEPARATOR.join(interests).lower())
+
+
+class KeywordTable:
+    """Ordered keyword -> value table; ``lookup`` returns the value of the first listed keyword in a text"""
+
+    def __init__(self, table: Dict[str, str]):
+        self.keywords = list(table)
+        self.values = [table[keyword] for keyword in self.keywords]
+        self._automaton = Automaton(self.keywords)
+
+    def lookup(self, text: str) -> Optional[str]:
+        found = self._automaton.find(text.lower())
+        return self.values[min(found)] if found else None
@@ -12,6 +12,7 @@ class UserProfile(BaseModel):
     credit_score: Optional[int] = None
     lifestyle: str = ""
     hobbies: str = ""
+    interests: List[str] = []
     career_path: str
     experience_years: Optional[int] = None
     salary: int = 0
@@ -22,6 +23,9 @@ class AffordabilityInfo(BaseModel):
     recommended_max_rent: int
     credit_band: str
     budget_vs_recommended: Literal["below", "near", "above"]
+    # Where the budget falls among the city's market rents (0-100); None until a market source has fed enough
+    market_percentile: Optional[int] = None
+    market_median_rent: Optional[int] = None
 
 class MoveCashNeeded(BaseModel):
     deposits: int
@@ -55,6 +59,7 @@ class Place(BaseModel):
 
 class LifestyleOutput(BaseModel):
     primary_fit: NeighborhoodFit
+    alternatives: List[NeighborhoodFit] = []
     explanation: str
     places: List[Place] = []
 
@@ -67,6 +72,10 @@ class HousingRecommendation(BaseModel):
     match_score: int
     reason: str
     source_url: Optional[str] = None
+    # Set by the optional commute-aware ranking
+    commute_km: Optional[float] = None
+    commute_job: Optional[str] = None
+    places_nearby: Optional[int] = None
 
 class HousingOutput(BaseModel):
     housing_recommendations: List[HousingRecommendation]
@@ -79,6 +88,8 @@ class JobMatch(BaseModel):
     salary_range: Optional[str] = None
     apply_url: Optional[str] = None
     match_score: int = 0
+    # Workplace position when the job source gives one; commute ranking only uses these
+    coords: Optional[Coordinates] = None
 
 class JobRecommendations(BaseModel):
     job_matches: List[JobMatch]
@@ -0,0 +1,232 @@
+# agents/ratelimit.py
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from .metrics import registry
+
+# Requests per minute and concurrent calls per provider, per worker process.
+# Override with NEXTMOVE_UPSTREAM_LIMITS="gemini=60:8,places=600:16,harvest=60:4".
+DEFAULT_LIMITS = {
+    "gemini": (60, 8),
+    "places": (600, 16),
+    "harvest": (60, 4),
+}
+
+PROVIDER_HOSTS = {
+    "maps.googleapis.com": "places",
+    "api.harvest-api.com": "harvest",
+}
+
+# Absolute time.monotonic() by which the current request wants its answer;
+# set per request, inherited by the agent tasks it gathers
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class NoUpstreamBudget(Exception):
+    """The provider can't take this call before the request's deadline.
+
+    Raised before any network I/O so the agent goes straight to its fallback.
+    """
+
+
+@contextmanager
+def deadline_in(seconds: float):
+    """Give upstream calls made in this context ``seconds`` from now to complete"""
+    token = request_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        request_deadline.reset(token)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def provider_for_url(url: str) -> str:
+    return PROVIDER_HOSTS.get(urlparse(url).hostname or "", "http")
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``; callers hold the limiter's lock"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, count: float, now: float) -> float:
+        """Seconds until ``count`` tokens will have accumulated"""
+        self.refill(now)
+        missing = count - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def drain(self):
+        self.tokens = min(self.tokens, 0.0)
+
+
+class ProviderLimiter:
+    """Token bucket per model plus a concurrency cap for one provider.
+
+    Waiting calls are served earliest deadline first within each model's
+    bucket. A call is refused with NoUpstreamBudget as soon as the tokens it
+    would need (one for itself and one per earlier-deadline call queued
+    ahead) can't accumulate before its deadline.
+    """
+
+    def __init__(self, name: str, per_minute: float, concurrency: int):
+        self.name = name
+        self.rate = per_minute / 60.0
+        # Allow a short burst, but never a whole minute's quota at once
+        self.burst = max(1.0, min(per_minute, math.ceil(per_minute / 6)))
+        self.concurrency = concurrency
+        self.active = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._waiters: Dict[str, list] = {}
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._in_flight = registry.gauge("upstream_in_flight", provider=name)
+
+    def _bucket(self, model: str) -> TokenBucket:
+        bucket = self._buckets.get(model)
+        if bucket is None:
+            bucket = self._buckets[model] = TokenBucket(self.rate, self.burst)
+            self._waiters[model] = []
+        return bucket
+
+    def acquire(self, model: str = "", deadline: Optional[float] = None):
+        deadline = math.inf if deadline is None else deadline
+        started = time.monotonic()
+        with self._cond:
+            bucket = self._bucket(model)
+            waiters = self._waiters[model]
+            entry = (deadline, next(self._sequence))
+            ahead = sum(1 for waiter in waiters if waiter < entry)
+            needed = bucket.time_until(ahead + 1, started)
+            if needed and started + needed > deadline:
+                self._refuse(model)
+            heapq.heappush(waiters, entry)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = bucket.time_until(1, now)
+                    if waiters[0] == entry and wait == 0 and self.active < self.concurrency:
+                        heapq.heappop(waiters)
+                        bucket.tokens -= 1
+                        self.active += 1
+                        self._in_flight.set(self.active)
+                        self._cond.notify_all()
+                        break
+                    if now + wait > deadline:
+                        self._refuse(model)
+                    # Woken early by releases and by other waiters leaving
+                    self._cond.wait(min(deadline - now, wait or 0.05))
+            except BaseException:
+                if entry in waiters:
+                    waiters.remove(entry)
+                    heapq.heapify(waiters)
+                    self._cond.notify_all()
+                raise
+
+        registry.histogram("upstream_wait_seconds", provider=self.name).observe(time.monotonic() - started)
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._in_flight.set(self.active)
+            self._cond.notify_all()
+
+    def throttled(self, model: str = ""):
+        """The provider answered 429: stop spending this bucket until it refills"""
+        registry.counter("upstream_throttled_total", provider=self.name).inc()
+        with self._cond:
+            self._bucket(model).drain()
+
+    def _refuse(self, model: str):
+        registry.counter("upstream_no_budget_total", provider=self.name).inc()
+        raise NoUpstreamBudget(f"{self.name}{'/' + model if model else ''}: no budget before the request deadline")
+
+
+class UpstreamScheduler:
+    """Process-wide limiters shared by every agent's upstream calls"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self._limiters: Dict[str, ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "UpstreamScheduler":
+        limits = dict(DEFAULT_LIMITS)
+        for item in os.getenv("NEXTMOVE_UPSTREAM_LIMITS", "").split(","):
+            if "=" not in item:
+                continue
+            name, spec = item.split("=", 1)
+            per_minute, _, concurrency = spec.partition(":")
+            default_concurrency = limits.get(name.strip(), (0, 8))[1]
+            limits[name.strip()] = (float(per_minute), int(concurrency or default_concurrency))
+        return cls(limits)
+
+    def limiter(self, provider: str) -> Optional[ProviderLimiter]:
+        with self._lock:
+            limiter = self._limiters.get(provider)
+            if limiter is None and provider in self.limits:
+                per_minute, concurrency = self.limits[provider]
+                limiter = self._limiters[provider] = ProviderLimiter(provider, per_minute, concurrency)
+            return limiter
+
+    @contextmanager
+    def slot(self, provider: str, model: str = ""):
+        """Hold a token and a concurrency slot for one upstream call"""
+        limiter = self.limiter(provider)
+        if limiter is None:
+            yield None
+            return
+        deadline = request_deadline.get()
+        if _on_event_loop():
+            # Agents call upstreams synchronously on the loop; waiting here would
+            # stall every request on the worker, so only budget free right now counts
+            now = time.monotonic()
+            deadline = now if deadline is None else min(deadline, now)
+        limiter.acquire(model, deadline)
+        try:
+            yield limiter
+        finally:
+            limiter.release()
+
+
+_scheduler: Optional[UpstreamScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> UpstreamScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = UpstreamScheduler.from_env()
+        return _scheduler
+
+
+def set_scheduler(scheduler: Optional[UpstreamScheduler]):
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
@@ -0,0 +1,123 @@
+# agents/records.py
+"""Compact candidate records used inside the agents.
+
+Listings, places and jobs are scored and ranked as these ``__slots__``
+dataclasses; only the candidates that make it into an agent's output are
+turned into (and validated as) the pydantic models in ``agents.models``.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .models import Coordinates, HousingRecommendation, JobMatch, Place
+
+
+@dataclass(slots=True)
+class ListingRecord:
+    address: str
+    rent: Optional[int]
+    min_credit_score: Optional[int]
+    amenities: List[str]
+    lat: float
+    lng: float
+    source_url: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ListingRecord":
+        """From a generated listing: address, rent, min_credit_score, amenities, lat, lng"""
+        return cls(data["address"], data["rent"], data["min_credit_score"], data["amenities"],
+                   data["lat"], data["lng"], data.get("source_url"))
+
+    def as_dict(self) -> dict:
+        """Same shape ``from_dict`` reads, so snapshots hold listings as generated"""
+        return {
+            "address": self.address,
+            "rent": self.rent,
+            "min_credit_score": self.min_credit_score,
+            "amenities": self.amenities,
+            "lat": self.lat,
+            "lng": self.lng,
+            "source_url": self.source_url,
+        }
+
+    @classmethod
+    def from_model(cls, recommendation: HousingRecommendation) -> "ListingRecord":
+        return cls(recommendation.address, recommendation.rent, recommendation.min_credit_score,
+                   recommendation.amenities, recommendation.coords.lat, recommendation.coords.lng,
+                   recommendation.source_url)
+
+    def to_model(self, match_score: int, reason: str) -> HousingRecommendation:
+        return HousingRecommendation(
+            address=self.address,
+            rent=self.rent,
+            min_credit_score=self.min_credit_score,
+            amenities=self.amenities,
+            coords=Coordinates(lat=self.lat, lng=self.lng),
+            match_score=match_score,
+            reason=reason,
+            source_url=self.source_url,
+        )
+
+
+@dataclass(slots=True)
+class PlaceRecord:
+    name: str
+    category_tags: List[str]
+    lat: float
+    lng: float
+    reason: str
+    match_score: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PlaceRecord":
+        """From the cached/snapshot form, which is ``Place.model_dump()``"""
+        coords = data["coords"]
+        return cls(data["name"], data["category_tags"], coords["lat"], coords["lng"],
+                   data["reason"], data.get("match_score", 0))
+
+    def as_dict(self) -> dict:
+        """Same shape as ``Place.model_dump()``, so caches and snapshots are interchangeable"""
+        return {
+            "name": self.name,
+            "category_tags": self.category_tags,
+            "coords": {"lat": self.lat, "lng": self.lng},
+            "reason": self.reason,
+            "match_score": self.match_score,
+        }
+
+    def to_model(self) -> Place:
+        return Place(
+            name=self.name,
+            category_tags=self.category_tags,
+            coords=Coordinates(lat=self.lat, lng=self.lng),
+            reason=self.reason,
+            match_score=self.match_score,
+        )
+
+
+@dataclass(slots=True)
+class JobRecord:
+    title: str
+    company: str
+    location: str
+    salary: Optional[Tuple[int, int]] = None
+    apply_url: Optional[str] = None
+    # Workplace position, when the source geocodes it
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "JobRecord":
+        """From a search strategy's job dict; a missing title, company or location becomes empty"""
+        return cls(data.get("title") or "", data.get("company") or "", data.get("location") or "",
+                   data.get("salary"), data.get("apply_url"), data.get("lat"), data.get("lng"))
+
+    def to_model(self, match_score: int, salary_range: Optional[str]) -> JobMatch:
+        return JobMatch(
+            title=self.title,
+            company=self.company,
+            location=self.location,
+            salary_range=salary_range,
+            apply_url=self.apply_url,
+            match_score=match_score,
+            coords=Coordinates(lat=self.lat, lng=self.lng) if self.lat is not None and self.lng is not None else None,
+        )
@@ -0,0 +1,282 @@
+# agents/rent_sketch.py
+"""Per-city rent distributions as mergeable KLL quantile sketches.
+
+Rents from a market source are added to their city's sketch with
+``observe``; the finance agent reads where a budget falls in it. Only
+sources priced independently of the asker may feed it: the housing
+agent's generated listings are asked for around the user's own budget, so
+they'd measure past users' budgets, not rents. The snapshot's market
+sample is such a source; ``observe_once`` adds a fixed dataset like it a
+single time across all workers, however many requests see it.
+
+Each worker buffers its own observations and periodically merges them into
+the copy in the shared cache, so all workers on a node converge on the same
+distribution. A sketch of any number of rents stays a few KB.
+"""
+import bisect
+import random
+import struct
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterable, Optional
+
+from .cache import NullCache
+from .snapshot import normalize_city
+from .transport import get_transport
+
+# Compactor size; rank error is roughly 1.7/K (about 1% at 200)
+K = 200
+# Fewer rents than this and the city's distribution isn't worth reporting
+MIN_SAMPLES = 30
+# Buffered observations are merged into the shared sketch after this many or this long
+FLUSH_EVERY = 50
+FLUSH_SECONDS = 30.0
+# How stale a worker's copy of the shared sketch can get
+REFRESH_SECONDS = 30.0
+SKETCH_TTL = 30 * 24 * 3600
+
+_HEADER = struct.Struct("<4sHHQ")
+_MAGIC = b"KLL1"
+
+
+class KLLSketch:
+    """Karnin-Lang-Liberty quantile sketch: level ``h`` items each stand for 2**h values"""
+
+    def __init__(self, k: int = K):
+        self.k = k
+        self.count = 0
+        self.levels = [[]]
+        self._rng = random.Random()
+        self._cdf = None
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(self.k * (2 / 3) ** depth))
+
+    def update(self, value: float):
+        self.levels[0].append(value)
+        self.count += 1
+        self._cdf = None
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._cdf = None
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                # An odd item out stays behind at this level
+                keep = [items.pop()] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[self._rng.getrandbits(1)::2])
+                self.levels[level] = keep
+            level += 1
+
+    def cdf(self):
+        """(values, cumulative weights), built once per change"""
+        if self._cdf is None:
+            weighted = sorted(
+                (value, 1 << level) for level, items in enumerate(self.levels) for value in items
+            )
+            values = [value for value, _ in weighted]
+            cumulative = []
+            total = 0
+            for _, weight in weighted:
+                total += weight
+                cumulative.append(total)
+            self._cdf = (values, cumulative)
+        return self._cdf
+
+    def rank(self, value: float) -> float:
+        """Estimated fraction of values <= ``value``"""
+        values, cumulative = self.cdf()
+        if not values:
+            return 0.0
+        i = bisect.bisect_right(values, value)
+        return cumulative[i - 1] / cumulative[-1] if i else 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        values, cumulative = self.cdf()
+        if not values:
+            return None
+        i = bisect.bisect_left(cumulative, q * cumulative[-1])
+        return values[min(i, len(values) - 1)]
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(_MAGIC, self.k, len(self.levels), self.count)]
+        for items in self.levels:
+            parts.append(struct.pack("<I", len(items)))
+            parts.append(array("f", items).tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "KLLSketch":
+        magic, k, levels, count = _HEADER.unpack_from(payload)
+        if magic != _MAGIC:
+            raise ValueError("not a KLL sketch")
+        sketch = cls(k)
+        sketch.count = count
+        sketch.levels = []
+        offset = _HEADER.size
+        for _ in range(levels):
+            (length,) = struct.unpack_from("<I", payload, offset)
+            offset += 4
+            items = array("f")
+            items.frombytes(payload[offset:offset + 4 * length])
+            offset += 4 * length
+            sketch.levels.append(items.tolist())
+        return sketch
+
+
+class RentSketches:
+    """One worker's view of every city's rent sketch, backed by the shared ``cache``
+    (the current transport's cache if not given)
+    """
+
+    def __init__(self, cache=None):
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._pending: Dict[str, KLLSketch] = {}
+        self._pending_since: Dict[str, float] = {}
+        self._views: Dict[str, tuple] = {}
+        self._observed = set()
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else get_transport().cache
+
+    @staticmethod
+    def _key(city: str) -> str:
+        return f"rent_sketch:{normalize_city(city)}"
+
+    def observe(self, city: str, rents: Iterable):
+        """Add listing rents for ``city``; missing and non-positive rents are skipped"""
+        key = self._key(city)
+        with self._lock:
+            pending = self._pending.setdefault(key, KLLSketch())
+            self._pending_since.setdefault(key, time.monotonic())
+            for rent in rents:
+                if isinstance(rent, (int, float)) and rent > 0:
+                    pending.update(float(rent))
+            due = (pending.count >= FLUSH_EVERY
+                   or time.monotonic() - self._pending_since[key] >= FLUSH_SECONDS)
+        if due:
+            self.flush(key)
+
+    def observe_once(self, city: str, source: str, rents: Callable[[], Iterable]):
+        """Add ``rents()`` for ``city`` unless ``source`` was already added by any worker"""
+        marker = f"{self._key(city)}:from:{source}"
+        with self._lock:
+            if marker in self._observed:
+                return
+        with self.cache.try_lock(f"{marker}:lock", lease=5.0) as locked:
+            if not locked:
+                # Another worker is adding it right now
+                return
+            if self.cache.get_raw(marker) is None:
+                self.observe(city, rents())
+                self.flush(self._key(city))
+                self.cache.set_raw(marker, b"1", SKETCH_TTL)
+        with self._lock:
+            self._observed.add(marker)
+
+    def flush(self, key: Optional[str] = None):
+        """Merge buffered observations into the shared sketches; ones that can't be merged now stay buffered"""
+        if isinstance(self.cache, NullCache):
+            return
+        with self._lock:
+            keys = [key] if key else list(self._pending)
+        for key in keys:
+            with self.cache.try_lock(f"{key}:lock", lease=5.0) as locked:
+                if locked:
+                    self._merge_pending(key)
+
+    def _merge_pending(self, key: str):
+        """Merge ``key``'s buffered rents into the shared sketch; the caller holds its lock"""
+        with self._lock:
+            pending = self._pending.pop(key, None)
+            self._pending_since.pop(key, None)
+        if pending is None or not pending.count:
+            return
+        try:
+            shared = self._load(key)
+            shared.merge(pending)
+            self.cache.set_raw(key, shared.to_bytes(), SKETCH_TTL)
+        except Exception as e:
+            print(f"Rent sketch flush failed for {key}: {e}")
+            with self._lock:
+                self._pending.setdefault(key, KLLSketch()).merge(pending)
+                self._pending_since.setdefault(key, time.monotonic())
+            return
+        with self._lock:
+            # Rents observed while merging aren't in ``shared``; let the next refresh pick them up
+            if key not in self._pending:
+                self._views[key] = (time.monotonic(), shared)
+
+    def _load(self, key: str) -> KLLSketch:
+        payload = self.cache.get_raw(key)
+        if payload:
+            try:
+                return KLLSketch.from_bytes(payload)
+            except (ValueError, struct.error) as e:
+                print(f"Discarding unreadable rent sketch {key}: {e}")
+        return KLLSketch()
+
+    def sketch(self, city: str) -> KLLSketch:
+        """Shared sketch merged with this worker's unflushed rents; refreshed every REFRESH_SECONDS"""
+        key = self._key(city)
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None and time.monotonic() - view[0] < REFRESH_SECONDS:
+                return view[1]
+        sketch = self._load(key)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                sketch.merge(pending)
+            self._views[key] = (time.monotonic(), sketch)
+        return sketch
+
+    def percentile(self, city: str, rent: float) -> Optional[int]:
+        """Share of ``city``'s rents at or below ``rent``, 0-100; None until MIN_SAMPLES are in"""
+        sketch = self.sketch(city)
+        if sketch.count < MIN_SAMPLES:
+            return None
+        return round(sketch.rank(rent) * 100)
+
+    def median(self, city: str) -> Optional[int]:
+        sketch = self.sketch(city)
+        if sketch.count < MIN_SAMPLES:
+            return None
+        return int(sketch.quantile(0.5))
+
+
+_sketches: Optional[RentSketches] = None
+_sketches_lock = threading.Lock()
+
+
+def get_rent_sketches() -> RentSketches:
+    """Process-wide sketches backed by the transport's cache"""
+    global _sketches
+    with _sketches_lock:
+        if _sketches is None:
+            _sketches = RentSketches()
+        return _sketches
+
+
+def set_rent_sketches(sketches: Optional[RentSketches]):
+    global _sketches
+    with _sketches_lock:
+        _sketches = sketches
@@ -0,0 +1,63 @@
+# agents/salary_index.py
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from .snapshot import normalize, normalize_city
+
+SalaryRange = Tuple[int, int]
+
+# Seniority is priced by the caller, so "Senior Data Analyst" and "Data Analyst #3" share an entry
+_SENIORITY = re.compile(r"^(junior|senior|sr\.?|jr\.?|lead|principal|staff)\s+")
+_NUMBERING = re.compile(r"\s+#\d+$")
+
+
+def title_key(title: str) -> str:
+    title = _NUMBERING.sub("", normalize(title))
+    return _SENIORITY.sub("", title)
+
+
+class SalaryIndex:
+    """Market salary ranges keyed by (title, city, experience band).
+
+    Built once from the snapshot's ``salary:`` entries, so a lookup is a
+    single dict get on already-decoded integers.
+    """
+
+    def __init__(self, ranges: Optional[Dict[Tuple[str, str, str], SalaryRange]] = None):
+        self._ranges = ranges or {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "SalaryIndex":
+        ranges = {}
+        for key in snapshot.keys():
+            if not key.startswith("salary:"):
+                continue
+            # salary:<city>:<career path>:<band>
+            city, _, rest = key[len("salary:"):].partition(":")
+            title, _, band = rest.rpartition(":")
+            value = snapshot.get(key)
+            if value:
+                ranges[(title_key(title), city, band)] = (int(value["min"]), int(value["max"]))
+        return cls(ranges)
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def lookup(self, title: str, city: str, band: str) -> Optional[SalaryRange]:
+        return self._ranges.get((title_key(title), normalize_city(city), band))
+
+
+_index: Optional[SalaryIndex] = None
+_index_source = None
+_index_lock = threading.Lock()
+
+
+def salary_index_for(snapshot) -> SalaryIndex:
+    """The index for ``snapshot``, built on first use and kept until the snapshot changes"""
+    global _index, _index_source
+    with _index_lock:
+        if _index is None or _index_source is not snapshot:
+            _index = SalaryIndex.from_snapshot(snapshot)
+            _index_source = snapshot
+        return _index
@@ -0,0 +1,199 @@
+# agents/snapshot.py
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .metrics import registry
+
+# File layout (little endian):
+#   header   MAGIC | version u32 | entry count u32 | index offset u64 | built_at f64
+#   values   UTF-8 JSON blobs, back to back
+#   index    per entry: key length u16 | key | value offset u64 | value length u32
+MAGIC = b"NMSNAP\x00\x00"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIQd")
+_INDEX_ENTRY = struct.Struct("<QI")
+_KEY_LENGTH = struct.Struct("<H")
+
+logger = logging.getLogger(__name__)
+
+class SnapshotError(Exception):
+    """Snapshot file is missing, truncated or from another format version"""
+
+
+def experience_band(years: Optional[int]) -> str:
+    """Experience bucket shared by salary estimates and snapshot keys"""
+    years = years or 0
+    if years < 2:
+        return "junior"
+    if years < 5:
+        return "mid"
+    return "senior"
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def normalize_city(city: str) -> str:
+    """"Houston, TX" and "houston" share snapshot entries"""
+    return normalize(city.split(",")[0])
+
+
+def neighborhoods_key(city: str) -> str:
+    return f"neighborhoods:{normalize_city(city)}"
+
+
+def places_key(city: str, query: str) -> str:
+    return f"places:{normalize_city(city)}:{normalize(query)}"
+
+
+def market_listings_key(city: str) -> str:
+    return f"market_listings:{normalize_city(city)}"
+
+
+def salary_key(city: str, career_path: str, band: str) -> str:
+    return f"salary:{normalize_city(city)}:{normalize(career_path)}:{band}"
+
+
+def write_snapshot(path: str, entries: Iterable[Tuple[str, Any]], built_at: Optional[float] = None) -> int:
+    """Write ``(key, value)`` pairs to ``path`` atomically; returns the entry count"""
+    tmp_path = f"{path}.tmp"
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    index = []
+    with open(tmp_path, "wb") as f:
+        f.write(b"\x00" * _HEADER.size)
+        offset = _HEADER.size
+        for key, value in entries:
+            blob = json.dumps(value, separators=(",", ":")).encode("utf-8")
+            f.write(blob)
+            index.append((key.encode("utf-8"), offset, len(blob)))
+            offset += len(blob)
+
+        index_offset = offset
+        for key, value_offset, length in index:
+            f.write(_KEY_LENGTH.pack(len(key)) + key + _INDEX_ENTRY.pack(value_offset, length))
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(index), index_offset, built_at or time.time()))
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Servers mapping the old file keep reading it until they reopen
+    os.replace(tmp_path, path)
+    return len(index)
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a precomputed city snapshot.
+
+    Only the key index is parsed at open; values are decoded from the mapped
+    pages on lookup, so every worker on a node shares one copy through the
+    page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotError(f"{path} is empty")
+
+        if len(self._map) < _HEADER.size:
+            raise SnapshotError(f"{path} is truncated")
+        magic, version, count, index_offset, self.built_at = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a NextMove snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+
+        self._index: Dict[str, Tuple[int, int]] = {}
+        position = index_offset
+        try:
+            for _ in range(count):
+                (key_length,) = _KEY_LENGTH.unpack_from(self._map, position)
+                position += _KEY_LENGTH.size
+                key = self._map[position:position + key_length].decode("utf-8")
+                position += key_length
+                self._index[key] = _INDEX_ENTRY.unpack_from(self._map, position)
+                position += _INDEX_ENTRY.size
+        except struct.error:
+            raise SnapshotError(f"{path} is truncated")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def keys(self):
+        return self._index.keys()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        location = self._index.get(key)
+        kind = key.split(":", 1)[0]
+        if location is None:
+            registry.counter("snapshot_lookups_total", kind=kind, result="miss").inc()
+            return default
+        registry.counter("snapshot_lookups_total", kind=kind, result="hit").inc()
+        offset, length = location
+        return json.loads(self._map[offset:offset + length])
+
+    def close(self):
+        self._map.close()
+
+
+class EmptySnapshot:
+    """Stand-in when no snapshot is configured; every lookup misses"""
+
+    path = None
+    built_at = None
+
+    def __len__(self):
+        return 0
+
+    def __contains__(self, key):
+        return False
+
+    def keys(self):
+        return ()
+
+    def get(self, key, default=None):
+        return default
+
+    def close(self):
+        pass
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot():
+    """Snapshot at NEXTMOVE_SNAPSHOT, mapped once per process; empty if unset"""
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None:
+            path = os.getenv("NEXTMOVE_SNAPSHOT")
+            _snapshot = EmptySnapshot()
+            if path:
+                try:
+                    _snapshot = Snapshot(path)
+                except (OSError, SnapshotError) as e:
+                    # Serving live is slower, not broken
+                    logger.warning(f"City snapshot unavailable, serving live: {e}")
+        return _snapshot
+
+
+def set_snapshot(snapshot):
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = snapshot
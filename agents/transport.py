@@ -0,0 +1,374 @@
+# agents/transport.py
+import os
+import re
+import json
+import gzip
+import atexit
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from .cache import NullCache, get_cache, LLM_TTL
+from .snapshot import EmptySnapshot, get_snapshot
+from .ratelimit import get_scheduler, provider_for_url
+
+LIVE = "live"
+RECORD = "record"
+REPLAY = "replay"
+OFFLINE = "offline"
+
+CASSETTE_VERSION = 1
+
+# Request parameters that carry credentials; never part of a lookup key
+SECRET_PARAMS = {"key", "api_key", "apikey", "token"}
+
+
+class CassetteMiss(BaseException):
+    """Raised in replay mode when a request has no recorded response.
+
+    Derives from BaseException so the agents' ``except Exception`` fallbacks
+    cannot turn a missing recording into a silently different plan.
+    """
+
+
+class UpstreamError(Exception):
+    """Upstream call failure served by replay or offline mode."""
+
+
+class HTTPResponse:
+    """Minimal stand-in for ``requests.Response`` served from a cassette"""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class LLMResponse:
+    """Minimal stand-in for a Gemini ``GenerateContentResponse``"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _normalize_text(text: str) -> str:
+    """Collapse whitespace so prompt indentation changes don't break lookups"""
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+def http_request_key(method: str, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Normalized description of an HTTP request (credentials stripped)"""
+    normalized_params = sorted(
+        (str(k), _normalize_text(v)) for k, v in (params or {}).items()
+        if str(k).lower() not in SECRET_PARAMS
+    )
+    return {"kind": "http", "method": method.upper(), "url": url.rstrip("/"), "params": normalized_params}
+
+
+def llm_request_key(model: str, contents: Any, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Normalized description of an LLM generate_content call"""
+    return {
+        "kind": "llm",
+        "model": model,
+        "contents": _normalize_text(contents),
+        "config": sorted((config or {}).items()),
+    }
+
+
+def digest(request: Dict[str, Any]) -> str:
+    """Stable short hash of a normalized request"""
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+class Cassette:
+    """Recorded request/response pairs stored as gzipped JSON.
+
+    Each normalized request key maps to the list of responses seen for it, in
+    order; replay walks that list and keeps serving the last entry once it is
+    exhausted, so repeated identical calls stay deterministic. Recording only
+    marks the cassette dirty; ``flush`` writes it once when the transport closes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.credentials: Dict[str, bool] = {}
+        self.interactions: Dict[str, Dict[str, Any]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        cassette = cls(path)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')} in {path}")
+        cassette.credentials = data.get("credentials", {})
+        cassette.interactions = data.get("interactions", {})
+        return cassette
+
+    def save(self):
+        data = {
+            "version": CASSETTE_VERSION,
+            "credentials": self.credentials,
+            "interactions": self.interactions,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def record(self, request: Dict[str, Any], entry: Dict[str, Any]):
+        key = digest(request)
+        with self._lock:
+            interaction = self.interactions.setdefault(key, {"request": request, "responses": []})
+            interaction["responses"].append(entry)
+            self.dirty = True
+
+    def flush(self):
+        """Write the cassette if anything was recorded since the last write"""
+        with self._lock:
+            if self.dirty:
+                self.save()
+                self.dirty = False
+
+    def play(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        key = digest(request)
+        with self._lock:
+            interaction = self.interactions.get(key)
+            if not interaction or not interaction["responses"]:
+                raise CassetteMiss(
+                    f"No recorded response in {self.path} for request "
+                    f"{json.dumps(request, sort_keys=True)[:500]}"
+                )
+            index = self._cursor.get(key, 0)
+            responses = interaction["responses"]
+            self._cursor[key] = index + 1
+            return responses[min(index, len(responses) - 1)]
+
+
+class Transport:
+    """Single path for every upstream call the agents make.
+
+    In ``live`` mode calls go straight to the network. ``record`` does the same
+    but also writes each request/response pair and its latency to a cassette.
+    ``replay`` serves responses from the cassette without touching the network,
+    either instantly or with the recorded latency (``replay_timing="recorded"``).
+    ``offline`` fails every call immediately, which drives each agent down its
+    built-in fallback path.
+    """
+
+    def __init__(self, mode: str = LIVE, cassette_path: Optional[str] = None, replay_timing: str = "instant"):
+        if mode not in (LIVE, RECORD, REPLAY, OFFLINE):
+            raise ValueError(f"Unknown transport mode: {mode}")
+        if mode in (RECORD, REPLAY) and not cassette_path:
+            raise ValueError(f"Transport mode '{mode}' requires a cassette path")
+        if replay_timing not in ("instant", "recorded"):
+            raise ValueError(f"Unknown replay timing: {replay_timing}")
+
+        self.mode = mode
+        self.replay_timing = replay_timing
+        self.cassette = None
+        if mode == REPLAY:
+            self.cassette = Cassette.load(cassette_path)
+        elif mode == RECORD:
+            self.cassette = Cassette.load(cassette_path) if os.path.exists(cassette_path) else Cassette(cassette_path)
+
+        self._genai_client = None
+        self._http_session = None
+        self._client_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Transport":
+        return cls(
+            mode=os.getenv("NEXTMOVE_TRANSPORT_MODE", LIVE).lower(),
+            cassette_path=os.getenv("NEXTMOVE_CASSETTE"),
+            replay_timing=os.getenv("NEXTMOVE_REPLAY_TIMING", "instant").lower(),
+        )
+
+    @property
+    def cache(self):
+        """Shared cache for live traffic; recorded, replayed and offline runs bypass it"""
+        return get_cache() if self.mode == LIVE else _NULL_CACHE
+
+    @property
+    def snapshot(self):
+        """Precomputed city snapshot for live traffic; other modes always miss"""
+        return get_snapshot() if self.mode == LIVE else _EMPTY_SNAPSHOT
+
+    def credential(self, name: str) -> Optional[str]:
+        """Read an API key, keeping replayed runs on the code path that was recorded"""
+        if self.mode == OFFLINE:
+            return None
+        if self.mode == REPLAY:
+            return "replay" if self.cassette.credentials.get(name) else None
+
+        value = os.getenv(name)
+        if self.mode == RECORD and self.cassette.credentials.get(name) != bool(value):
+            self.cassette.credentials[name] = bool(value)
+            self.cassette.dirty = True
+        return value
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None):
+        request = http_request_key("GET", url, params)
+
+        if self.mode == OFFLINE:
+            raise UpstreamError(f"offline: GET {url}")
+        if self.mode == REPLAY:
+            entry = self._replay(request)
+            return HTTPResponse(entry["status_code"], entry["text"])
+
+        start = time.perf_counter()
+        try:
+            with get_scheduler().slot(provider_for_url(url)) as limiter:
+                response = self._session().get(url, headers=headers, params=params, timeout=timeout)
+                if response.status_code == 429 and limiter is not None:
+                    limiter.throttled()
+        except Exception as e:
+            self._record(request, {"error": f"{type(e).__name__}: {e}"}, start)
+            raise
+        self._record(request, {"status_code": response.status_code, "text": response.text}, start)
+        return response
+
+    def generate_content(self, model: str, contents: Any, config: Optional[Dict[str, Any]] = None):
+        request = llm_request_key(model, contents, config)
+
+        if self.mode == OFFLINE:
+            raise UpstreamError(f"offline: {model}")
+        if self.mode == REPLAY:
+            entry = self._replay(request)
+            return LLMResponse(entry["text"])
+
+        if self.mode == LIVE:
+            text = self.cache.get_or_compute(
+                f"llm:{digest(request)}", lambda: self._call_llm(model, contents, config), LLM_TTL
+            )
+            return LLMResponse(text)
+
+        start = time.perf_counter()
+        try:
+            text = self._call_llm(model, contents, config)
+        except Exception as e:
+            self._record(request, {"error": f"{type(e).__name__}: {e}"}, start)
+            raise
+        self._record(request, {"text": text}, start)
+        return LLMResponse(text)
+
+    def _call_llm(self, model: str, contents: Any, config: Optional[Dict[str, Any]]) -> str:
+        client = self._client()
+        with get_scheduler().slot("gemini", model) as limiter:
+            try:
+                response = client.models.generate_content(model=model, contents=contents, config=config)
+            except Exception as e:
+                if limiter is not None and ("429" in str(e) or "RESOURCE_EXHAUSTED" in str(e)):
+                    limiter.throttled(model)
+                raise
+        if not response.text:
+            # Never cache or record an empty answer as if it were a real one
+            raise UpstreamError(f"{model} returned an empty response")
+        return response.text
+
+    def _client(self):
+        """Create the Gemini client on first live use"""
+        with self._client_lock:
+            if self._genai_client is None:
+                if not os.getenv("GOOGLE_API_KEY") and not os.getenv("GOOGLE_GENAI_USE_VERTEXAI"):
+                    raise RuntimeError("GOOGLE_API_KEY is not set")
+
+                from google import genai
+                from google.genai.types import HttpOptions
+
+                self._genai_client = genai.Client(
+                    api_key=os.getenv("GOOGLE_API_KEY"),
+                    http_options=HttpOptions(api_version="v1")
+                )
+            return self._genai_client
+
+    def _session(self):
+        """Pooled HTTP session so repeated calls to one host reuse connections"""
+        with self._client_lock:
+            if self._http_session is None:
+                import requests
+
+                self._http_session = requests.Session()
+            return self._http_session
+
+    def preload(self):
+        """Import the HTTP and Gemini SDKs now instead of on the first request"""
+        if self.mode in (REPLAY, OFFLINE):
+            return
+        self._session()
+        try:
+            self._client()
+        except RuntimeError:
+            # No Gemini credentials: agents will use their fallbacks anyway
+            import google.genai  # noqa: F401
+
+    def warm_connections(self, urls, timeout: float = 3.0) -> dict:
+        """Open pooled connections to upstream hosts; never recorded"""
+        if self.mode in (REPLAY, OFFLINE):
+            return {}
+        session = self._session()
+        results = {}
+        for url in urls:
+            start = time.perf_counter()
+            try:
+                session.head(url, timeout=timeout)
+                results[url] = round(time.perf_counter() - start, 4)
+            except Exception as e:
+                results[url] = f"{type(e).__name__}: {e}"
+        return results
+
+    def close(self):
+        """Write out what a recording transport captured; safe to call more than once"""
+        if self.mode == RECORD:
+            self.cassette.flush()
+
+    def _record(self, request: Dict[str, Any], entry: Dict[str, Any], start: float):
+        if self.mode != RECORD:
+            return
+        entry["latency"] = round(time.perf_counter() - start, 4)
+        self.cassette.record(request, entry)
+
+    def _replay(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        entry = self.cassette.play(request)
+        if self.replay_timing == "recorded":
+            time.sleep(entry.get("latency", 0))
+        if "error" in entry:
+            raise UpstreamError(entry["error"])
+        return entry
+
+
+_NULL_CACHE = NullCache()
+_EMPTY_SNAPSHOT = EmptySnapshot()
+
+_transport: Optional[Transport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Process-wide transport, configured from NEXTMOVE_TRANSPORT_MODE/NEXTMOVE_CASSETTE"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport.from_env()
+            if _transport.mode == RECORD:
+                atexit.register(_transport.close)
+        return _transport
+
+
+def set_transport(transport: Optional[Transport]):
+    """Install a transport for subsequently created agents (None resets to env config)"""
+    global _transport
+    with _transport_lock:
+        previous, _transport = _transport, transport
+    if previous is not None and previous is not transport:
+        previous.close()
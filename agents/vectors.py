@@ -0,0 +1,211 @@
+# agents/vectors.py
+"""Network-free stand-in for embeddings: hashed character n-grams.
+
+Each text becomes a fixed-width, L2-normalized vector of its words' (and
+their synonyms') character 3- and 4-grams, hashed into ``DIM`` buckets, so
+"climbing" lands near "climb" and "bouldering" without a model or an API
+call. Tags, amenities and place categories are kept in a ``VectorIndex``
+that can be saved next to the city snapshot and loaded at startup.
+"""
+import os
+import threading
+import zlib
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .matching import SYNONYMS, stem
+
+DIM = 512
+NGRAMS = (3, 4)
+# Cosine below this is hash collisions and shared suffixes, not relatedness
+SIMILARITY_FLOOR = 0.3
+
+# Always indexed: housing amenities, Places categories and neighborhood tags we generate or query for
+DEFAULT_VOCABULARY = [
+    "gym", "fitness center", "pool", "parking", "garage", "laundry", "washer dryer", "pet friendly",
+    "dog park", "roof deck", "bike storage", "concierge", "coworking space", "ev charging",
+    "restaurant", "cafe", "coffee shop", "bar", "nightclub", "park", "trail", "museum", "art gallery",
+    "library", "shopping", "market", "bookstore", "yoga studio", "climbing gym", "bouldering gym",
+    "music venue", "theater", "vegan restaurant", "nightlife", "walkable", "quiet", "family",
+    "young professionals", "affordable", "transit", "galleries", "cafes", "parks",
+]
+
+
+def _features(text: str) -> List[str]:
+    grams = []
+    for word in text.lower().replace("-", " ").split():
+        for variant in {word, stem(word), *SYNONYMS.get(word, ())}:
+            padded = f" {variant} "
+            for n in NGRAMS:
+                grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+@lru_cache(maxsize=8192)
+def embed(text: str) -> np.ndarray:
+    """Unit vector for ``text`` (all zeros if it has no n-grams); cached, don't modify it"""
+    vector = np.zeros(DIM, dtype=np.float32)
+    for gram in _features(text):
+        # crc32 is stable across processes, unlike hash(), so saved indexes stay valid
+        bucket = zlib.crc32(gram.encode("utf-8"))
+        vector[bucket % DIM] += 1.0 if bucket & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    vector.setflags(write=False)
+    return vector
+
+
+def embed_many(texts: Sequence[str]) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, DIM), dtype=np.float32)
+    return np.stack([embed(text) for text in texts])
+
+
+class VectorIndex:
+    """Labels and their vectors as one matrix, built up front from the default
+    vocabulary or a precomputed snapshot; lookups never grow it"""
+
+    def __init__(self, labels: Iterable[str] = (), vectors: Optional[np.ndarray] = None):
+        self.labels: List[str] = []
+        self._positions = {}
+        self._matrix = np.zeros((0, DIM), dtype=np.float32)
+        self._lock = threading.Lock()
+        labels = list(labels)
+        if vectors is not None:
+            self.labels = labels
+            self._positions = {label: i for i, label in enumerate(labels)}
+            self._matrix = np.asarray(vectors, dtype=np.float32)
+        else:
+            self.add(labels)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def add(self, labels: Iterable[str]) -> np.ndarray:
+        """Row numbers of ``labels``, embedding any that aren't indexed yet"""
+        with self._lock:
+            positions = self._positions
+            new = []
+            rows = []
+            for label in labels:
+                row = positions.get(label)
+                if row is None:
+                    key = label.lower()
+                    row = positions.get(key)
+                    if row is None:
+                        row = positions[key] = len(self.labels) + len(new)
+                        new.append(key)
+                    # Also remember this spelling, so a repeat skips lower()
+                    positions[label] = row
+                rows.append(row)
+            if new:
+                self.labels.extend(new)
+                self._matrix = np.vstack([self._matrix, embed_many(new)])
+            return np.array(rows, dtype=np.intp)
+
+    def rows(self, labels: Sequence[str]) -> np.ndarray:
+        """Row numbers of ``labels``, -1 for any that aren't indexed"""
+        positions = self._positions
+        return np.array([
+            row if (row := positions.get(label)) is not None else positions.get(label.lower(), -1)
+            for label in labels
+        ], dtype=np.intp)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix
+
+    def search(self, queries: Sequence[str], k: int = 5) -> List[List[tuple]]:
+        """Top ``k`` (label, cosine) per query, from one (queries x labels) product"""
+        scores = embed_many(queries) @ self._matrix.T
+        k = min(k, len(self.labels))
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k] if k else []
+            top = sorted(top, key=lambda i: -row[i])
+            results.append([(self.labels[i], float(row[i])) for i in top])
+        return results
+
+    def save(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, labels=np.array(self.labels), vectors=self._matrix, dim=DIM, ngrams=np.array(NGRAMS))
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        with np.load(path) as data:
+            if int(data["dim"]) != DIM or tuple(data["ngrams"]) != NGRAMS:
+                raise ValueError(f"{path} was built with other vectorizer settings")
+            return cls([str(label) for label in data["labels"]], data["vectors"])
+
+
+def best_similarity(queries: Sequence[str], tag_lists: Sequence[Sequence[str]], index: Optional["VectorIndex"] = None) -> np.ndarray:
+    """For each list of tags, the highest cosine between any query and any of its tags.
+
+    Each query is scored against every indexed label in one matrix-vector
+    product; the index is fixed at a few hundred labels, so that's cheaper
+    than gathering a vector per tag. Query and tag vectors come straight
+    from the embedding cache rather than being stacked into new matrices.
+    Tags the index doesn't have are embedded but never added, so the shared
+    index never grows.
+    """
+    result = np.zeros(len(tag_lists), dtype=np.float32)
+    lengths = [len(tags) for tags in tag_lists]
+    if not queries or not any(lengths):
+        return result
+    index = index or get_vector_index()
+    # Places share a handful of category tags; resolve each distinct one once
+    distinct = {}
+    slots = [distinct.setdefault(tag, len(distinct)) for tags in tag_lists for tag in tags]
+    labels = list(distinct)
+    rows = index.rows(labels)
+    known = rows >= 0
+    known_rows = rows[known]
+    unseen = [(i, embed(labels[i].lower())) for i in np.flatnonzero(~known)]
+    per_label = np.full(len(labels), -1.0, dtype=np.float32)
+    for query in queries:
+        vector = embed(query)
+        if known_rows.size:
+            per_label[known] = np.maximum(per_label[known], (index.matrix @ vector)[known_rows])
+        for i, tag_vector in unseen:
+            per_label[i] = max(per_label[i], tag_vector @ vector)
+    per_tag = per_label[slots]
+
+    starts = np.cumsum([0] + lengths[:-1])
+    filled = np.array(lengths) > 0
+    result[filled] = np.maximum.reduceat(per_tag, starts[filled])
+    return result
+
+
+def relevance(cosine) -> np.ndarray:
+    """Cosine rescaled to 0-100, with anything under SIMILARITY_FLOOR counting as unrelated"""
+    return np.clip((np.asarray(cosine) - SIMILARITY_FLOOR) / (1 - SIMILARITY_FLOOR), 0, 1) * 100
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """Index from NEXTMOVE_VECTOR_INDEX if set (see backend.precompute), else the default vocabulary"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = os.getenv("NEXTMOVE_VECTOR_INDEX")
+            try:
+                _index = VectorIndex.load(path) if path else VectorIndex(DEFAULT_VOCABULARY)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Vector index unavailable ({e}); building from the default vocabulary")
+                _index = VectorIndex(DEFAULT_VOCABULARY)
+        return _index
+
+
+def set_vector_index(index: Optional[VectorIndex]):
+    global _index
+    with _index_lock:
+        _index = index
@@ -0,0 +1,125 @@
+# backend/admission.py
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from agents.metrics import registry
+
+# Lower runs first
+FAST_PRIORITY = 0
+NORMAL_PRIORITY = 1
+# Background plan jobs run in the front end's workers only when no request is waiting
+JOB_PRIORITY = 2
+
+
+class AdmissionRejected(Exception):
+    """Shed a request; ``retry_after`` is a whole number of seconds for the Retry-After header"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Request not admitted ({reason})")
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, prioritized wait queue.
+
+    At most ``max_concurrent`` requests run; up to ``max_queue`` more wait,
+    lower priority value first, FIFO within a priority. A request that
+    would wait longer than ``queue_timeout`` is rejected up front, using a
+    running average of service time to estimate its wait, and one that is
+    still queued at its deadline is dropped. Both carry a Retry-After hint.
+
+    Not thread-safe: each worker's event loop owns one controller.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 32, queue_timeout: float = 10.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.service_time: Optional[float] = None
+        self._waiters = []
+        self._queued = 0
+        self._sequence = itertools.count()
+        self._depth = registry.gauge("admission_queue_depth")
+        self._running = registry.gauge("admission_in_flight")
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            max_concurrent=int(os.getenv("NEXTMOVE_MAX_CONCURRENT_PLANS", "8")),
+            max_queue=int(os.getenv("NEXTMOVE_MAX_QUEUED_PLANS", "32")),
+            queue_timeout=float(os.getenv("NEXTMOVE_PLAN_QUEUE_TIMEOUT", "10")),
+        )
+
+    def expected_wait(self, ahead: int) -> float:
+        """Rough wait behind ``ahead`` queued requests once every slot is busy"""
+        if not self.service_time:
+            return 0.0
+        return (ahead + 1) / self.max_concurrent * self.service_time
+
+    @asynccontextmanager
+    async def admit(self, priority: int = NORMAL_PRIORITY):
+        started = time.monotonic()
+        if self.in_flight < self.max_concurrent and not self._queued:
+            self.in_flight += 1
+        else:
+            await self._wait(priority)
+        waited = time.monotonic() - started
+        registry.histogram("admission_wait_seconds", priority=priority).observe(waited)
+        self._running.set(self.in_flight)
+
+        try:
+            yield waited
+        finally:
+            service = time.monotonic() - started - waited
+            self.service_time = service if self.service_time is None else 0.8 * self.service_time + 0.2 * service
+            self._release()
+
+    async def _wait(self, priority: int):
+        if self._queued >= self.max_queue:
+            self._reject("queue_full", self.expected_wait(self._queued))
+        ahead = sum(1 for p, _, waiter in self._waiters if p <= priority and not waiter.done())
+        expected = self.expected_wait(ahead)
+        if expected > self.queue_timeout:
+            self._reject("deadline", expected)
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self._queued += 1
+        self._depth.set(self._queued)
+        try:
+            # A slot handed over by _release resolves the future; the slot is ours from then on
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject("deadline", self.expected_wait(ahead))
+        except asyncio.CancelledError:
+            # Client went away; pass on a slot we were handed in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            if not (waiter.done() and not waiter.cancelled()):
+                self._queued -= 1
+                self._depth.set(self._queued)
+
+    def _release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self._queued -= 1
+                self._depth.set(self._queued)
+                waiter.set_result(True)
+                return
+        self.in_flight -= 1
+        self._running.set(self.in_flight)
+
+    def _reject(self, reason: str, retry_after: float):
+        registry.counter("admission_rejected_total", reason=reason).inc()
+        raise AdmissionRejected(reason, retry_after or self.queue_timeout)
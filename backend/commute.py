@@ -0,0 +1,138 @@
+# backend/commute.py
+"""Joint housing x job ranking: re-score listings by commute and nearby places.
+
+Distances are great-circle (haversine) kilometres computed with NumPy in
+row tiles, so thousands of listings against hundreds of jobs never
+materialize more than ``TILE`` rows of the distance matrix at once.
+Only jobs whose source gives the workplace's coordinates have a commute;
+without any, listings are ranked on match score and nearby places alone.
+"""
+from typing import Optional
+
+import numpy as np
+
+from agents.models import UserProfile, HousingOutput, JobMatch
+from backend.pipeline import AgentResults
+
+EARTH_RADIUS_KM = 6371.0
+# Listing rows per distance tile
+TILE = 256
+
+# Weights of the agents' own match score and the two location components
+MATCH_WEIGHT = 0.6
+COMMUTE_WEIGHT = 0.25
+PLACES_WEIGHT = 0.15
+
+# A commute this long scores 1/e of a zero-length one; same for places
+COMMUTE_SCALE_KM = 10.0
+PLACE_SCALE_KM = 2.0
+# Places within this distance count as "nearby" in the listing's output
+NEARBY_KM = 1.5
+# Only the lifestyle agent's best places count toward proximity
+TOP_PLACES = 10
+
+
+def _radians(points) -> np.ndarray:
+    return np.radians(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+
+
+def haversine_km(origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+    """(n, m) distances between two sets of (lat, lng) points given in radians"""
+    lat1, lng1 = origins[:, :1], origins[:, 1:]
+    lat2, lng2 = destinations[:, 0], destinations[:, 1]
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def best_commutes(listings: np.ndarray, jobs: np.ndarray, job_scores: np.ndarray):
+    """Per listing, the job minimizing distance discounted by job match, and its distance.
+
+    A job scoring 100 costs its plain distance; a job scoring 0 costs double.
+    """
+    penalty = 2.0 - job_scores / 100.0
+    best = np.empty(len(listings), dtype=np.intp)
+    distance = np.empty(len(listings), dtype=np.float64)
+    for start in range(0, len(listings), TILE):
+        tile = haversine_km(listings[start:start + TILE], jobs)
+        choice = np.argmin(tile * penalty, axis=1)
+        best[start:start + TILE] = choice
+        distance[start:start + TILE] = tile[np.arange(len(tile)), choice]
+    return best, distance
+
+
+def place_proximity(listings: np.ndarray, places: np.ndarray, place_scores: np.ndarray):
+    """Per listing, match-weighted closeness to the places (0-100) and how many are within NEARBY_KM"""
+    weights = place_scores / place_scores.sum() if place_scores.sum() else np.full(len(places), 1 / len(places))
+    proximity = np.empty(len(listings), dtype=np.float64)
+    nearby = np.empty(len(listings), dtype=np.intp)
+    for start in range(0, len(listings), TILE):
+        tile = haversine_km(listings[start:start + TILE], places)
+        proximity[start:start + TILE] = 100 * (np.exp(-tile / PLACE_SCALE_KM) @ weights)
+        nearby[start:start + TILE] = (tile <= NEARBY_KM).sum(axis=1)
+    return proximity, nearby
+
+
+def job_location(job: JobMatch) -> Optional[tuple]:
+    """Where a job is, when its source says so. A location string alone ("Houston, TX")
+    doesn't place the workplace, so such jobs (and remote ones) get no commute
+    """
+    if job.coords is None:
+        return None
+    return job.coords.lat, job.coords.lng
+
+
+def rank_by_commute(profile: UserProfile, results: AgentResults) -> AgentResults:
+    """Re-rank housing with commute and place-proximity components; other results are unchanged"""
+    recommendations = results.housing.housing_recommendations
+    if not recommendations or results.career is None:
+        return results
+
+    jobs = [
+        (job, coords) for job in results.career.job_recommendations.job_matches
+        if (coords := job_location(job)) is not None
+    ]
+    places = sorted(results.lifestyle.places, key=lambda p: p.match_score, reverse=True)[:TOP_PLACES] \
+        if results.lifestyle is not None else []
+
+    listings = _radians([(r.coords.lat, r.coords.lng) for r in recommendations])
+    match = np.array([r.match_score for r in recommendations], dtype=np.float64)
+    score = MATCH_WEIGHT * match
+    weight = MATCH_WEIGHT
+
+    commute_km = best_job = None
+    if jobs:
+        best_job, commute_km = best_commutes(
+            listings,
+            _radians([coords for _, coords in jobs]),
+            np.array([job.match_score for job, _ in jobs], dtype=np.float64),
+        )
+        score += COMMUTE_WEIGHT * 100 * np.exp(-commute_km / COMMUTE_SCALE_KM)
+        weight += COMMUTE_WEIGHT
+
+    nearby = None
+    if places:
+        proximity, nearby = place_proximity(
+            listings,
+            _radians([(p.coords.lat, p.coords.lng) for p in places]),
+            np.array([p.match_score for p in places], dtype=np.float64),
+        )
+        score += PLACES_WEIGHT * proximity
+        weight += PLACES_WEIGHT
+
+    # Components that couldn't be computed don't drag the score down
+    score = np.clip(np.rint(score / weight), 0, 100).astype(int)
+
+    ranked = []
+    for i, recommendation in enumerate(recommendations):
+        update = {"match_score": int(score[i])}
+        if commute_km is not None:
+            job = jobs[best_job[i]][0]
+            update["commute_km"] = round(float(commute_km[i]), 1)
+            update["commute_job"] = f"{job.title} at {job.company}"
+        if nearby is not None:
+            update["places_nearby"] = int(nearby[i])
+        ranked.append(recommendation.model_copy(update=update))
+    ranked.sort(key=lambda r: r.match_score, reverse=True)
+
+    return results._replace(housing=HousingOutput.model_construct(housing_recommendations=ranked))
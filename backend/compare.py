@@ -0,0 +1,149 @@
+# backend/compare.py
+"""Side-by-side plans for one profile in several cities.
+
+Work that doesn't depend on the city is done once per comparison: profile
+normalization, compiling the interest matcher and embedding the interests,
+and the finance rules (only the market position is looked up per city).
+The per-city pipelines then run concurrently, each admitted through the
+shared AdmissionController like a plan request, and at most
+``COMPARE_CONCURRENCY`` of one comparison's cities at a time.
+"""
+import asyncio
+import json
+import logging
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from agents.cache import PLAN_TTL
+from agents.finance_agent.agent import FinanceAgent
+from agents.matching import interest_matcher
+from agents.models import UserProfile
+from agents.snapshot import normalize_city
+from agents.transport import get_transport
+from agents.vectors import embed_many
+from backend.admission import AdmissionRejected, FAST_PRIORITY, NORMAL_PRIORITY
+from backend.pipeline import normalize_profile, run_agents, build_response, render_response, plan_cache_key
+
+logger = logging.getLogger(__name__)
+
+MAX_COMPARE_CITIES = 5
+# Cities of one comparison in flight at once, so a single comparison can't take every admission slot
+COMPARE_CONCURRENCY = 3
+
+
+class CompareCitiesRequest(BaseModel):
+    profile: UserProfile
+    cities: List[str] = Field(min_length=2, max_length=MAX_COMPARE_CITIES)
+
+
+def distinct_cities(cities) -> list:
+    """Cities in order, dropping blanks and repeats ("Houston, TX" and "houston")"""
+    seen = {}
+    for city in cities:
+        city = city.strip()
+        if city and normalize_city(city) not in seen:
+            seen[normalize_city(city)] = city
+    return list(seen.values())
+
+
+def summarize(city: str, finance, housing: list, jobs: list, neighborhood) -> dict:
+    """The compact per-city row; arguments are the plan's dict or model pieces"""
+    def get(item, name):
+        return item.get(name) if isinstance(item, dict) else getattr(item, name)
+
+    affordability = get(finance, "affordability")
+    top_listing = housing[0] if housing else None
+    top_job = jobs[0] if jobs else None
+    return {
+        "city": city,
+        "cash_needed": get(get(finance, "move_cash_needed"), "total"),
+        "budget_vs_recommended": get(affordability, "budget_vs_recommended"),
+        "market_percentile": get(affordability, "market_percentile"),
+        "top_listing_score": get(top_listing, "match_score") if top_listing else None,
+        "top_listing_rent": get(top_listing, "rent") if top_listing else None,
+        "top_job_score": get(top_job, "match_score") if top_job else None,
+        "top_job_title": get(top_job, "title") if top_job else None,
+        "neighborhood": get(neighborhood, "name") if neighborhood else None,
+        "neighborhood_fit": get(neighborhood, "match_score") if neighborhood else None,
+    }
+
+
+def _summary_from_plan(city: str, plan: dict) -> dict:
+    return summarize(
+        city, plan["finance"], plan["housing_recommendations"],
+        plan["job_recommendations"]["job_matches"], plan["lifestyle"]["primary_fit"],
+    )
+
+
+async def compare_cities(profile: UserProfile, cities: list, admission, include_plans: bool = False) -> bytes:
+    """JSON with a summary row per city and, with ``include_plans``, each city's full plan.
+
+    A city whose pipeline fails gets an ``error`` row instead; an admission
+    rejection fails the whole comparison.
+    """
+    normalize_profile(profile)
+    cities = distinct_cities(cities)
+
+    # City-independent work, done once and shared by every city's agents through their caches
+    interest_matcher(profile.interests)
+    embed_many(profile.interests)
+    finance = None
+    if not include_plans:
+        # Without plans nobody sees the finance tips, and the rules don't depend on the city
+        finance = await FinanceAgent().run(profile, with_tips=False)
+
+    cache = get_transport().cache
+    fanout = asyncio.Semaphore(COMPARE_CONCURRENCY)
+    priority = FAST_PRIORITY if profile.fast_mode else NORMAL_PRIORITY
+
+    async def one(city: str):
+        city_profile = profile.model_copy(update={"city": city})
+        key = plan_cache_key(city_profile)
+        body = cache.get_raw(key)
+        if body is not None:
+            return _summary_from_plan(city, json.loads(body)), body
+
+        async with fanout, admission.admit(priority):
+            city_finance = None
+            if finance is not None:
+                percentile, median = FinanceAgent().market_position(city_profile)
+                city_finance = finance.model_copy(update={"affordability": finance.affordability.model_copy(
+                    update={"market_percentile": percentile, "market_median_rent": median}
+                )})
+            results = await run_agents(city_profile, finance_output=city_finance)
+
+        row = summarize(
+            city, results.finance, results.housing.housing_recommendations,
+            results.career.job_recommendations.job_matches, results.lifestyle.primary_fit,
+        )
+        if not include_plans:
+            return row, None
+        body = render_response(build_response(city_profile, results))
+        # Same plan /api/plan_move would build, so picking a city afterwards is a cache hit
+        cache.set_raw(key, body, PLAN_TTL)
+        return row, body
+
+    outcomes = await asyncio.gather(*(one(city) for city in cities), return_exceptions=True)
+
+    rows, plans = [], []
+    for city, outcome in zip(cities, outcomes):
+        if isinstance(outcome, AdmissionRejected):
+            raise outcome
+        if isinstance(outcome, BaseException):
+            logger.error(f"Comparison failed for {city}: {outcome}", exc_info=outcome)
+            rows.append({"city": city, "error": str(outcome)})
+            continue
+        row, body = outcome
+        rows.append(row)
+        if include_plans and body is not None:
+            plans.append((city, body))
+
+    parts = [b'{"cities":', json.dumps(rows, separators=(",", ":")).encode("utf-8")]
+    if include_plans:
+        # Plans are already serialized; splice them in rather than decoding and re-encoding
+        parts.append(b',"plans":{')
+        parts.append(b",".join(json.dumps(city).encode("utf-8") + b":" + body for city, body in plans))
+        parts.append(b"}")
+    parts.append(b"}")
+    return b"".join(parts)
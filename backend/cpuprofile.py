@@ -0,0 +1,231 @@
+# backend/cpuprofile.py
+import hmac
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from fastapi import Request
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+CPU_PROFILE_HEADER = "X-Profile-CPU"
+
+# Samples whose innermost frame is here are an idle event loop, not work
+IDLE_MODULES = ("selectors.py",)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_STDLIB = sysconfig.get_paths()["stdlib"]
+
+
+def admin_authorized(request: Request) -> bool:
+    """True when the request carries the configured NEXTMOVE_ADMIN_TOKEN"""
+    expected = os.getenv("NEXTMOVE_ADMIN_TOKEN")
+    provided = request.headers.get(ADMIN_TOKEN_HEADER)
+    return bool(expected and provided and hmac.compare_digest(expected, provided))
+
+
+def cpu_profiling_requested(request: Request) -> bool:
+    flag = request.headers.get(CPU_PROFILE_HEADER, "")
+    return flag.lower() in ("1", "true", "yes") and admin_authorized(request)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    elif filename.startswith(_STDLIB):
+        filename = os.path.relpath(filename, _STDLIB)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+def collapse_stack(frame) -> Optional[str]:
+    """Root-to-leaf ``a;b;c`` stack for a frame, or None for an idle loop"""
+    if frame is None or frame.f_code.co_filename.endswith(IDLE_MODULES):
+        return None
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread.
+
+    Counts are kept as collapsed stacks (``root;...;leaf`` → samples), the
+    format flamegraph.pl and speedscope both read. ``max_stacks`` bounds
+    memory for long-running samplers; overflow is counted under ``[other]``.
+
+    The sampler needs the GIL to read frames, so a busy target thread is
+    sampled roughly once per switch interval (5ms by default) whatever the
+    requested rate; ``effective_interval`` is what was actually achieved.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, max_stacks: int = 5000):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.ticks = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="nextmove-stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.ticks += 1
+            stack = collapse_stack(sys._current_frames().get(self.thread_id))
+            if stack is None:
+                continue
+            with self._lock:
+                if stack not in self.counts and len(self.counts) >= self.max_stacks:
+                    stack = "[other]"
+                self.counts[stack] += 1
+                self.samples += 1
+
+    @property
+    def effective_interval(self) -> float:
+        elapsed = self.duration or (time.perf_counter() - self.started_at)
+        return elapsed / self.ticks if self.ticks else self.interval
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.samples = 0
+            self.ticks = 0
+        self.started_at = time.perf_counter()
+
+
+def to_collapsed(counts: Dict[str, int]) -> str:
+    return "\n".join(f"{stack} {count}" for stack, count in sorted(counts.items(), key=lambda i: -i[1]))
+
+
+def to_speedscope(counts: Dict[str, int], name: str, interval: float) -> dict:
+    """Speedscope "sampled" profile; weights are seconds of sampled time"""
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, count in counts.items():
+        sample = []
+        for label in stack.split(";"):
+            if label not in index:
+                index[label] = len(frames)
+                frames.append({"name": label})
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(round(count * interval, 6))
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "nextmove",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": round(sum(weights), 6),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+def hot_stacks(counts: Dict[str, int], limit: int = 25) -> list:
+    total = sum(counts.values()) or 1
+    return [
+        {"stack": stack, "samples": count, "share": round(count / total, 4)}
+        for stack, count in sorted(counts.items(), key=lambda i: -i[1])[:limit]
+    ]
+
+
+class ProfileStore:
+    """Most recent per-request profiles, keyed by request id"""
+
+    def __init__(self, max_profiles: int = 50):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, request_id: str, profile: dict):
+        with self._lock:
+            self._profiles[request_id] = profile
+            self._profiles.move_to_end(request_id)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._profiles.get(request_id)
+
+
+profile_store = ProfileStore()
+
+
+@contextmanager
+def profiled_cpu(request_id: str, name: str, interval: float = 0.005):
+    """Sample the current (event loop) thread for the duration of the block.
+
+    Other requests interleaved on the same loop show up in the samples too;
+    profile on a quiet worker when exact attribution matters.
+    """
+    sampler = StackSampler(threading.get_ident(), interval=interval).start()
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
+        profile_store.put(request_id, {
+            "request_id": request_id,
+            "name": name,
+            "interval": round(sampler.effective_interval, 6),
+            "duration": round(sampler.duration, 6),
+            "samples": sampler.samples,
+            "counts": sampler.snapshot(),
+        })
+
+
+class BackgroundProfiler:
+    """Low-rate sampler of the event loop thread, aggregated across requests"""
+
+    def __init__(self):
+        self.sampler: Optional[StackSampler] = None
+
+    def start(self, thread_id: int, hz: float):
+        if hz <= 0 or self.sampler is not None:
+            return
+        self.sampler = StackSampler(thread_id, interval=1.0 / hz).start()
+
+    def stop(self):
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+
+
+background_profiler = BackgroundProfiler()
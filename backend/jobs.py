@@ -0,0 +1,381 @@
+# backend/jobs.py
+"""Asynchronous plan jobs: submit now, poll for partial and final results.
+
+Run dedicated workers, scaled separately from the HTTP front end, with
+``python -m backend.jobs --workers 4`` against the same job store.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Optional, Tuple
+
+from agents.metrics import registry
+from agents.models import UserProfile
+from agents.cache import PLAN_TTL
+from agents.transport import get_transport
+from backend.admission import AdmissionRejected, JOB_PRIORITY
+from backend.pipeline import AGENTS, run_agents, build_response, render_response, plan_cache_key
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# A job whose worker disappeared is retried this many times in total before it fails
+MAX_ATTEMPTS = 3
+
+
+class JobStore:
+    """Where plan jobs, their per-agent partial results and final plans live.
+
+    The front end only calls ``create`` and ``get``; workers ``claim`` a job
+    for ``lease`` seconds and report back under their worker id. A job whose
+    lease runs out is handed to the next worker that asks.
+    """
+
+    def create(self, profile: UserProfile, result: Optional[bytes] = None) -> str:
+        raise NotImplementedError
+
+    def claim(self, worker: str, lease: float) -> Optional[Tuple[str, UserProfile]]:
+        raise NotImplementedError
+
+    def release(self, job_id: str, worker: str):
+        raise NotImplementedError
+
+    def save_part(self, job_id: str, worker: str, agent: str, payload: bytes, lease: float):
+        raise NotImplementedError
+
+    def finish(self, job_id: str, worker: str, body: bytes):
+        raise NotImplementedError
+
+    def fail(self, job_id: str, worker: str, error: str):
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def purge(self, older_than: float) -> int:
+        raise NotImplementedError
+
+
+class SQLiteJobStore(JobStore):
+    """Job queue in a local SQLite file in WAL mode, shared by every process on the node"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, profile TEXT NOT NULL, "
+            "worker TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "result BLOB, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority, created_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_parts ("
+            "job_id TEXT NOT NULL, agent TEXT NOT NULL, value BLOB NOT NULL, PRIMARY KEY (job_id, agent))"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, profile, result=None):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, priority, profile, result, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, DONE if result is not None else QUEUED, 0 if profile.fast_mode else 1,
+             profile.model_dump_json(), result, now, now),
+        )
+        return job_id
+
+    def claim(self, worker, lease):
+        conn = self._connect()
+        now = time.time()
+        # IMMEDIATE takes the write lock up front, so two processes can't claim the same row
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'worker lost', updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, RUNNING, now, MAX_ATTEMPTS),
+            )
+            row = conn.execute(
+                "SELECT id, profile FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY priority, created_at LIMIT 1",
+                (QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE id = ?",
+                    (RUNNING, worker, now + lease, now, row[0]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return None if row is None else (row[0], UserProfile.model_validate_json(row[1]))
+
+    def release(self, job_id, worker):
+        """Hand a claimed job back to the queue without counting the attempt"""
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, worker = NULL, lease_expires = NULL, attempts = attempts - 1, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (QUEUED, time.time(), job_id, worker, RUNNING),
+        )
+
+    def save_part(self, job_id, worker, agent, payload, lease):
+        conn = self._connect()
+        now = time.time()
+        updated = conn.execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (now + lease, now, job_id, worker, RUNNING),
+        ).rowcount
+        if updated:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_parts (job_id, agent, value) VALUES (?, ?, ?)", (job_id, agent, payload)
+            )
+
+    def finish(self, job_id, worker, body):
+        conn = self._connect()
+        finished = conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (DONE, body, time.time(), job_id, worker, RUNNING),
+        ).rowcount
+        if finished:
+            # The plan holds every agent's output; the parts are no longer needed
+            conn.execute("DELETE FROM job_parts WHERE job_id = ?", (job_id,))
+
+    def fail(self, job_id, worker, error):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (FAILED, error, time.time(), job_id, worker, RUNNING),
+        )
+
+    def get(self, job_id):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT status, attempts, result, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        parts = {} if row[0] == DONE else dict(
+            conn.execute("SELECT agent, value FROM job_parts WHERE job_id = ?", (job_id,)).fetchall()
+        )
+        return {
+            "id": job_id, "status": row[0], "attempts": row[1], "result": row[2], "error": row[3],
+            "created_at": row[4], "updated_at": row[5], "parts": parts,
+        }
+
+    def purge(self, older_than):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM job_parts WHERE job_id IN (SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at < ?)",
+                (DONE, FAILED, older_than),
+            )
+            removed = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, older_than)
+            ).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+
+def render_job(job: dict) -> bytes:
+    """Job status as JSON bytes; stored plan and agent outputs are spliced in without re-encoding"""
+    meta = {key: job[key] for key in ("id", "status", "attempts", "error", "created_at", "updated_at")}
+    meta["completed"] = sorted(AGENTS) if job["status"] == DONE else sorted(job["parts"])
+    pieces = [json.dumps(meta, separators=(",", ":")).encode("utf-8")[:-1]]
+    if job["parts"]:
+        pieces.append(b',"partial":{' + b",".join(
+            json.dumps(agent).encode("utf-8") + b":" + value for agent, value in sorted(job["parts"].items())
+        ) + b"}")
+    if job["result"] is not None:
+        pieces.append(b',"result":' + job["result"])
+    pieces.append(b"}")
+    return b"".join(pieces)
+
+
+def job_store_from_url(url: str) -> JobStore:
+    """Build a job store from ``sqlite:///path``; other backends subclass JobStore"""
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported job store URL: {url}")
+
+
+def default_job_store_url() -> str:
+    return os.getenv(
+        "NEXTMOVE_JOB_STORE_URL",
+        "sqlite:///" + os.path.join(tempfile.gettempdir(), "nextmove-jobs.sqlite3"),
+    )
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = job_store_from_url(default_job_store_url())
+        return _store
+
+
+def set_job_store(store: Optional[JobStore]):
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def submit_job(profile: UserProfile, store: Optional[JobStore] = None) -> str:
+    """Queue a plan for the workers; a plan already in the plan cache is done on arrival"""
+    store = store or get_job_store()
+    cached = get_transport().cache.get_raw(plan_cache_key(profile))
+    registry.counter("jobs_submitted_total", result="cached" if cached is not None else "queued").inc()
+    return store.create(profile, result=cached)
+
+
+class JobWorkerPool:
+    """``workers`` asyncio tasks pulling jobs from the store and running the pipeline.
+
+    Each agent's output is saved as soon as it finishes, so polling clients
+    see partial results, and saving renews the job's lease. Workers inside
+    the HTTP front end share its ``admission`` controller: a claimed job
+    waits behind queued requests, and one that is shed goes back to the store.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, workers: int = 2, poll: float = 0.5,
+                 lease: float = 120.0, ttl: Optional[float] = None, admission=None):
+        self._store = store
+        self.admission = admission
+        self.workers = workers
+        self.poll = poll
+        self.lease = lease
+        self.ttl = ttl if ttl is not None else float(os.getenv("NEXTMOVE_JOB_TTL", "3600"))
+        self.name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._tasks = []
+        self._last_purge = 0.0
+
+    @classmethod
+    def from_env(cls, admission=None) -> "JobWorkerPool":
+        return cls(workers=int(os.getenv("NEXTMOVE_JOB_WORKERS", "2")), admission=admission)
+
+    @property
+    def store(self) -> JobStore:
+        return self._store or get_job_store()
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work(f"{self.name}-{n}")) for n in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def serve(self):
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def drain(self) -> int:
+        """Run queued jobs in this task until none are left; returns how many ran"""
+        ran = 0
+        while await self.run_next(f"{self.name}-drain"):
+            ran += 1
+        return ran
+
+    async def _work(self, worker: str):
+        while True:
+            try:
+                if not await self.run_next(worker):
+                    self._maybe_purge()
+                    await asyncio.sleep(self.poll)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {worker} error: {e}", exc_info=True)
+                await asyncio.sleep(self.poll)
+
+    async def run_next(self, worker: str) -> bool:
+        claimed = self.store.claim(worker, self.lease)
+        if claimed is None:
+            return False
+        job_id, profile = claimed
+        store = self.store
+        started = time.monotonic()
+        logger.info(f"Job {job_id} claimed by {worker} for city: {profile.city}")
+
+        def on_result(agent, output):
+            store.save_part(job_id, worker, agent, output.model_dump_json().encode("utf-8"), self.lease)
+
+        try:
+            if self.admission is None:
+                results = await run_agents(profile, on_result=on_result)
+            else:
+                async with self.admission.admit(JOB_PRIORITY):
+                    results = await run_agents(profile, on_result=on_result)
+            # Off the loop: in-process workers share it with HTTP requests
+            body = await asyncio.to_thread(lambda: render_response(build_response(profile, results)))
+        except AdmissionRejected as e:
+            logger.info(f"Job {job_id} returned to the queue: {e.reason}")
+            store.release(job_id, worker)
+            return False
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            store.fail(job_id, worker, str(e))
+            registry.counter("jobs_total", status=FAILED).inc()
+            return True
+
+        store.finish(job_id, worker, body)
+        get_transport().cache.set_raw(plan_cache_key(profile), body, PLAN_TTL)
+        registry.counter("jobs_total", status=DONE).inc()
+        registry.histogram("job_seconds").observe(time.monotonic() - started)
+        return True
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now - self._last_purge > 60:
+            self._last_purge = now
+            removed = self.store.purge(now - self.ttl)
+            if removed:
+                logger.info(f"Purged {removed} finished jobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run plan job workers against the job store")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("NEXTMOVE_JOB_WORKERS", "2") or 2))
+    parser.add_argument("--poll", type=float, default=0.5)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"Serving jobs from {default_job_store_url()} with {args.workers} workers")
+    asyncio.run(JobWorkerPool(workers=args.workers, poll=args.poll).serve())
+
+
+if __name__ == "__main__":
+    main()
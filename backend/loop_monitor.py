@@ -0,0 +1,114 @@
+# backend/loop_monitor.py
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from agents.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Finer buckets than request latencies; healthy loops lag well under 5ms
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class LoopMonitor:
+    """Measures event-loop lag and catches callbacks that hold the loop.
+
+    A probe coroutine sleeps ``interval`` seconds in a loop and records how
+    late it wakes up into the ``event_loop_lag_seconds`` histogram. A
+    watchdog thread watches the probe's heartbeat; once the loop has been
+    unresponsive for longer than ``block_threshold`` it grabs the loop
+    thread's current stack, which names the blocking call (for instance a
+    synchronous ``requests.get`` inside an agent coroutine). While the stall
+    lasts it keeps sampling every ``block_threshold`` and records each
+    distinct stack in the same event.
+    """
+
+    def __init__(self, interval: float = 0.05, block_threshold: float = 0.1, max_events: int = 100):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.blocking_events = deque(maxlen=max_events)
+        self._heartbeat = 0.0
+        self._reported_heartbeat = None
+        self._loop_thread_id: Optional[int] = None
+        self._probe_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lag = registry.histogram("event_loop_lag_seconds", LAG_BUCKETS)
+        self._blocked = registry.counter("event_loop_blocked_total")
+
+    def start(self):
+        """Start monitoring the running loop; call from inside it"""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._probe_task = asyncio.get_running_loop().create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="nextmove-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - scheduled - self.interval)
+            self._lag.observe(lag)
+            self._heartbeat = time.monotonic()
+            if lag >= self.block_threshold and self.blocking_events:
+                last = self.blocking_events[-1]
+                if last.get("duration") is None:
+                    last["duration"] = round(lag, 4)
+
+    def _watch(self):
+        poll = max(self.block_threshold / 4, 0.001)
+        event = None
+        last_sample = 0.0
+        while not self._stop.wait(poll):
+            heartbeat = self._heartbeat
+            now = time.monotonic()
+            stalled = now - heartbeat - self.interval
+            if stalled < self.block_threshold:
+                event = None
+                continue
+
+            if heartbeat != self._reported_heartbeat:
+                # New stall: one event, logged once
+                self._reported_heartbeat = heartbeat
+                event = {"detected_at": time.time(), "stalled_for": round(stalled, 4), "duration": None, "stacks": []}
+                self._sample_stack(event)
+                last_sample = now
+                self.blocking_events.append(event)
+                self._blocked.inc()
+                logger.warning(
+                    f"Event loop blocked for {stalled * 1000:.0f}ms+ (threshold "
+                    f"{self.block_threshold * 1000:.0f}ms); loop thread stack:\n{event['stacks'][0]}"
+                )
+            elif event is not None and now - last_sample >= self.block_threshold:
+                # Long stalls often chain several blocking calls; keep each distinct one
+                event["stalled_for"] = round(stalled, 4)
+                self._sample_stack(event)
+                last_sample = now
+
+    def _sample_stack(self, event: dict):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        if not event["stacks"] or event["stacks"][-1] != stack:
+            event["stacks"].append(stack)
@@ -1,25 +1,79 @@
 # backend/main.py
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import os, asyncio
 import logging
-from fastapi import FastAPI, HTTPException, Request
+import threading
+import uuid
+from contextlib import asynccontextmanager, nullcontext
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
 
 
 # Load environment variables
 load_dotenv()
 
-from agents.housing_agent.agent import HousingAgent
-from agents.lifestyle_agent.agent import LifestyleAgent
-from agents.career_agent.agent import CareerAgent
-from agents.finance_agent.agent import FinanceAgent
-from agents.models import UserProfile, MovePlanResponse, MovePlanSummary
+from agents.metrics import registry
+from agents.models import UserProfile, MovePlanResponse
+from agents.cache import PLAN_TTL
+from agents.transport import get_transport
+from agents.ratelimit import request_deadline
+from agents.rent_sketch import get_rent_sketches
+from backend.pipeline import (
+    derive_credit_band, normalize_profile, run_agents, plan_cache_key,
+    changed_fields, stale_agents, replan, build_response, render_response,
+)
+from backend.views import PlanView, render_plan
+from backend.sessions import plan_sessions, PLAN_SESSION_HEADER
+from backend.jobs import JobWorkerPool, get_job_store, submit_job, render_job
+from backend.scenarios import AffordabilityGridRequest, render_grid
+from backend.compare import CompareCitiesRequest, compare_cities, distinct_cities
+from backend.admission import AdmissionController, AdmissionRejected, FAST_PRIORITY, NORMAL_PRIORITY
+from backend.memprofile import memory_profiling_requested, profiled_memory, profile_lock, MEMORY_PROFILE_HEADER
+from backend.cpuprofile import (
+    admin_authorized, cpu_profiling_requested, profiled_cpu, profile_store, background_profiler,
+    to_collapsed, to_speedscope, hot_stacks,
+)
+from backend.loop_monitor import LoopMonitor
+from backend.startup import startup_report, warm_up
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="NextMove API")
+admission = AdmissionController.from_env()
+
+# Upstream calls are scheduled against this; past it they fail fast into the agents' fallbacks
+PLAN_DEADLINE = float(os.getenv("NEXTMOVE_PLAN_DEADLINE", "30"))
+
+# In-process job workers take admission slots behind requests; set NEXTMOVE_JOB_WORKERS=0 when `python -m backend.jobs` runs them separately
+job_workers = JobWorkerPool.from_env(admission)
+
+loop_monitor = LoopMonitor(block_threshold=float(os.getenv("NEXTMOVE_LOOP_BLOCK_THRESHOLD_MS", "100")) / 1000)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Low-rate sampler of the event loop thread feeding /debug/profile
+    background_profiler.start(threading.get_ident(), float(os.getenv("NEXTMOVE_PROFILE_SAMPLE_HZ", "10")))
+    # Loop lag histogram and blocking-call detection feeding /metrics and /debug/loop
+    loop_monitor.start()
+    # SDK preload, upstream connections and caches; /readyz fails until done
+    warmup_task = asyncio.create_task(warm_up())
+    job_workers.start()
+    yield
+    await job_workers.stop()
+    get_rent_sketches().flush()
+    get_transport().close()
+    warmup_task.cancel()
+    await loop_monitor.stop()
+    background_profiler.stop()
+
+app = FastAPI(title="NextMove API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -30,95 +84,266 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def derive_credit_band(credit_score: int) -> str:
-    """Derive credit band from numeric credit score"""
-    if credit_score >= 740:
-        return "excellent"
-    elif credit_score >= 670:
-        return "good"
-    elif credit_score >= 580:
-        return "fair"
-    else:
-        return "poor"
+# Negotiated via Accept-Encoding; small bodies aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+startup_report.record("import", time.perf_counter() - _IMPORT_STARTED)
+
+@app.middleware("http")
+async def record_first_request(request: Request, call_next):
+    if startup_report.first_request_seconds is not None or not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    started = time.perf_counter()
+    response = await call_next(request)
+    startup_report.first_request_seconds = round(time.perf_counter() - started, 4)
+    return response
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    request.state.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request.state.request_id
+    return response
 
 @app.post("/api/plan_move", response_model=MovePlanResponse)
-async def plan_move(request: Request, profile: UserProfile):
+async def plan_move(
+    request: Request,
+    profile: UserProfile,
+    fields: Optional[str] = Query(None, description="Comma separated sections: finance, lifestyle, housing, jobs, summary"),
+    housing_limit: Optional[int] = Query(None, ge=0),
+    jobs_limit: Optional[int] = Query(None, ge=0),
+    places_limit: Optional[int] = Query(None, ge=0),
+    compact: bool = Query(False, description="Housing, jobs and places as parallel arrays"),
+    commute: bool = Query(False, description="Rank housing by commute to the recommended jobs and nearby places"),
+):
     logger.info(f"Received plan_move request for city: {profile.city}")
+    request_deadline.set(time.monotonic() + PLAN_DEADLINE)
+
+    try:
+        view = PlanView.from_query(
+            fields, housing_limit=housing_limit, jobs_limit=jobs_limit, places_limit=places_limit, compact=compact,
+            commute=commute,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # Run full processing without any time limits
 
     try:
         # Normalize profile data before processing
-        if profile.credit_band is None and profile.credit_score is not None:
-            profile.credit_band = derive_credit_band(profile.credit_score)
-        elif profile.credit_band is None:
-            profile.credit_band = "fair"  # default fallback
+        normalize_profile(profile)
 
-        if profile.experience_years is None:
-            profile.experience_years = 0  # default to 0 years experience
+        logger.info(f"Normalized profile: city={profile.city}, budget={profile.budget}, credit_band={profile.credit_band}")
 
-        # Ensure interests is a list
-        if not profile.interests:
-            profile.interests = []
+        request_id = request.state.request_id
+        cpu_profiling = cpu_profiling_requested(request)
+        memory_profiling = memory_profiling_requested(request)
+        headers = {}
 
-        # Normalize city string
-        profile.city = profile.city.strip()
+        # Identical profiles within PLAN_TTL get the same serialized plan; profiled runs always do the work
+        cache = get_transport().cache
+        cache_key = plan_cache_key(profile) if view.is_full else f"{plan_cache_key(profile)}:{view.cache_key}"
+        body = None if cpu_profiling or memory_profiling else cache.get_raw(cache_key)
+        registry.counter("plan_cache_total", result="hit" if body is not None else "miss").inc()
+        if body is not None:
+            logger.info("Serving cached move plan")
+            headers = {"X-Plan-Cache": "hit"}
+            plan_id = cache.get(f"{cache_key}:plan_id")
+            if plan_id:
+                headers[PLAN_SESSION_HEADER] = plan_id
+            return Response(content=body, media_type="application/json", headers=headers)
 
-        logger.info(f"Normalized profile: city={profile.city}, budget={profile.budget}, credit_band={profile.credit_band}")
+        # Bounded concurrency; fast_mode requests jump the queue
+        async with admission.admit(FAST_PRIORITY if profile.fast_mode else NORMAL_PRIORITY):
+            with profiled_cpu(request_id, f"plan_move {profile.city}") if cpu_profiling else nullcontext():
+                if memory_profiling:
+                    async with profile_lock:
+                        with profiled_memory() as memory:
+                            results = await run_agents(
+                                profile, profiler=memory, agents=view.agents, include_places=view.include_places
+                            )
+                            body = render_plan(profile, results, view, profiler=memory)
+                    memory.record_metrics()
+                    headers[MEMORY_PROFILE_HEADER] = memory.as_header()
+                    logger.info(f"Memory profile for {profile.city}: {memory.as_dict()}")
+                else:
+                    # Sections the client didn't ask for are never computed
+                    results = await run_agents(profile, agents=view.agents, include_places=view.include_places)
+                    body = render_plan(profile, results, view)
 
-        # Initialize agents
-        fin_agent = FinanceAgent()
-        life_agent = LifestyleAgent()
-        house_agent = HousingAgent()
-        career_agent = CareerAgent()
-
-        # Run finance and lifestyle agents in parallel without any timeouts
-        logger.info("Running finance and lifestyle agents...")
-        finance_results, lifestyle_results = await asyncio.gather(
-            fin_agent.run(profile),
-            life_agent.run(profile)
-        )
-        logger.info("Finance and lifestyle agents completed")
+        if view.is_full:
+            # Keep the intermediate results so PATCH can re-plan incrementally
+            plan_id = plan_sessions.create(profile, results)
+            headers[PLAN_SESSION_HEADER] = plan_id
 
-        # Run housing and career agents in parallel without any timeouts
-        logger.info("Running housing and career agents...")
-        housing_results, career_results = await asyncio.gather(
-            house_agent.run(profile, finance_results, lifestyle_results),
-            career_agent.run(profile)
-        )
-        logger.info("Housing and career agents completed")
-
-        # Create summary
-        summary = MovePlanSummary(
-            headline=f"Personalized move plan for {profile.city}",
-            top_apartment=housing_results.housing_recommendations[0].dict() if housing_results.housing_recommendations else None,
-            job_target=career_results.job_recommendations.job_matches[0].dict() if career_results.job_recommendations.job_matches else None,
-            cash_needed=finance_results.move_cash_needed.total,
-            neighborhood=lifestyle_results.primary_fit,
-        )
+        if cpu_profiling:
+            headers["X-Profile-URL"] = f"/debug/profile/{request_id}"
+        else:
+            cache.set_raw(cache_key, body, PLAN_TTL)
+            if view.is_full:
+                cache.set(f"{cache_key}:plan_id", plan_id, PLAN_TTL)
 
         logger.info("Successfully generated move plan")
+        # Already serialized: returning a Response skips response_model validation and encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except Exception as e:
+        logger.error(f"Error processing plan_move request: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-        # Notes for any issues (currently none)
-        notes = []
+def _overloaded(rejection: AdmissionRejected) -> HTTPException:
+    logger.warning(f"Shedding plan request: {rejection.reason}, retry after {rejection.retry_after}s")
+    return HTTPException(
+        status_code=503,
+        detail="Server busy, retry later",
+        headers={"Retry-After": str(rejection.retry_after)},
+    )
 
-        # Build response
-        response_data = {
-            "status": "success",
-            "city": profile.city,
-            "finance": finance_results,
-            "lifestyle": lifestyle_results,
-            "housing_recommendations": housing_results.housing_recommendations,
-            "job_recommendations": career_results.job_recommendations,
-            "summary": summary
-        }
+@app.patch("/api/plan_move/{plan_id}", response_model=MovePlanResponse)
+async def replan_move(plan_id: str, profile: UserProfile):
+    """Re-plan from a stored session, rerunning only agents whose profile inputs changed"""
+    request_deadline.set(time.monotonic() + PLAN_DEADLINE)
+    session = plan_sessions.load(plan_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Plan session expired or unknown")
+    previous_profile, previous_results, search_budget = session
 
-        # Add notes if there were any timeouts/fallbacks
-        if notes:
-            response_data["_notes"] = notes
+    try:
+        normalize_profile(profile)
+        changed = changed_fields(previous_profile, profile, search_budget)
+        stale = stale_agents(changed)
+        logger.info(f"Re-planning {plan_id}: changed={sorted(changed)} rerun={sorted(stale)}")
+        for agent in stale:
+            registry.counter("replan_agent_runs_total", agent=agent).inc()
 
-        return MovePlanResponse(**response_data)
+        if stale:
+            async with admission.admit(FAST_PRIORITY if profile.fast_mode else NORMAL_PRIORITY):
+                results = await replan(profile, previous_results, stale)
+        else:
+            results = previous_results
+        body = render_response(build_response(profile, results))
+        # Rescored listings still come from the earlier search
+        new_plan_id = plan_sessions.create(profile, results, profile.budget if "housing" in stale else search_budget)
 
+    except AdmissionRejected as e:
+        raise _overloaded(e)
     except Exception as e:
-        logger.error(f"Error processing plan_move request: {str(e)}", exc_info=True)
+        logger.error(f"Error re-planning {plan_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    return Response(content=body, media_type="application/json", headers={
+        PLAN_SESSION_HEADER: new_plan_id,
+        "X-Replanned": ",".join(sorted(stale)),
+    })
+
+@app.post("/api/plan_move/jobs", status_code=202)
+async def submit_plan_job(profile: UserProfile, response: Response):
+    """Queue a plan and return at once; poll the job URL for partial and final results"""
+    normalize_profile(profile)
+    job_id = submit_job(profile)
+    logger.info(f"Queued plan job {job_id} for city: {profile.city}")
+    url = f"/api/plan_move/jobs/{job_id}"
+    response.headers["Location"] = url
+    return {"id": job_id, "url": url}
+
+@app.get("/api/plan_move/jobs/{job_id}")
+async def get_plan_job(job_id: str):
+    """Job status, agent outputs finished so far, and the plan once done"""
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return Response(content=render_job(job), media_type="application/json")
+
+@app.post("/api/compare_cities")
+async def compare_cities_endpoint(
+    comparison: CompareCitiesRequest,
+    include_plans: bool = Query(False, description="Also return each city's full plan"),
+):
+    """One profile planned in 2-5 cities at once, summarized side by side"""
+    if len(distinct_cities(comparison.cities)) < 2:
+        raise HTTPException(status_code=400, detail="Compare at least two different cities")
+    logger.info(f"Received compare_cities request for: {', '.join(comparison.cities)}")
+    request_deadline.set(time.monotonic() + PLAN_DEADLINE)
+
+    try:
+        body = await compare_cities(comparison.profile, comparison.cities, admission, include_plans)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    return Response(content=body, media_type="application/json")
+
+@app.post("/api/affordability_grid")
+async def affordability_grid(grid: AffordabilityGridRequest):
+    """Finance rules over every budget x salary pair, without running any agent or the LLM"""
+    try:
+        # Large grids take a while to encode; keep that off the event loop
+        body = await asyncio.to_thread(render_grid, grid)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=body, media_type="application/json")
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the worker's event loop is answering"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz(response: Response):
+    """Readiness: warm-up finished, so the first real request won't pay for it"""
+    if not startup_report.ready:
+        response.status_code = 503
+    return {"ready": startup_report.ready}
+
+@app.get("/metrics")
+async def metrics():
+    """Aggregate in-process metrics for this worker"""
+    return registry.snapshot()
+
+def _require_admin(request: Request):
+    if not admin_authorized(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+def _render_profile(counts: dict, name: str, interval: float, format: str):
+    if format == "collapsed":
+        return PlainTextResponse(to_collapsed(counts))
+    if format == "speedscope":
+        return to_speedscope(counts, name, interval)
+    return {"name": name, "interval": interval, "hot_stacks": hot_stacks(counts)}
+
+@app.get("/debug/profile")
+async def debug_profile(request: Request, format: str = "json", reset: bool = False):
+    """Hot stacks aggregated by the background sampler across all requests"""
+    _require_admin(request)
+    sampler = background_profiler.sampler
+    if sampler is None:
+        raise HTTPException(status_code=404, detail="Background profiler is disabled")
+    counts = sampler.snapshot()
+    if reset:
+        sampler.reset()
+    return _render_profile(counts, "background", sampler.effective_interval, format)
+
+@app.get("/debug/profile/{request_id}")
+async def debug_request_profile(request: Request, request_id: str, format: str = "speedscope"):
+    """CPU profile captured for one request sent with X-Profile-CPU"""
+    _require_admin(request)
+    profile = profile_store.get(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No profile for this request id")
+    return _render_profile(profile["counts"], profile["name"], profile["interval"], format)
+
+@app.get("/debug/loop")
+async def debug_loop(request: Request):
+    """Recent event-loop stalls with the stack that was holding the loop"""
+    _require_admin(request)
+    return {
+        "block_threshold": loop_monitor.block_threshold,
+        "lag": registry.histogram("event_loop_lag_seconds").snapshot(),
+        "blocking_events": list(loop_monitor.blocking_events),
+    }
+
+@app.get("/debug/startup")
+async def debug_startup(request: Request):
+    """Import, warm-up and first-request timings for this worker"""
+    _require_admin(request)
+    return startup_report.as_dict()
@@ -0,0 +1,106 @@
+# backend/memprofile.py
+import asyncio
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict
+
+from fastapi import Request
+
+from agents.metrics import registry, BYTES_BUCKETS
+from backend.cpuprofile import admin_authorized
+
+MEMORY_PROFILE_HEADER = "X-Profile-Memory"
+MEMORY_PROFILE_QUERY = "profile_memory"
+
+# tracemalloc is process-wide, so profiled requests take turns
+profile_lock = asyncio.Lock()
+
+
+def memory_profiling_requested(request: Request) -> bool:
+    """Opt in with ``X-Profile-Memory: 1`` or ``?profile_memory=1``, plus the admin token.
+
+    Tracing is process-wide and slows every concurrent request, so like
+    CPU profiling it's not available to anonymous clients.
+    """
+    flag = request.headers.get(MEMORY_PROFILE_HEADER) or request.query_params.get(MEMORY_PROFILE_QUERY)
+    return str(flag).lower() in ("1", "true", "yes") and admin_authorized(request)
+
+
+class MemoryProfile:
+    """Peak and net Python allocations for one request, split by stage.
+
+    Stages are measured with ``tracemalloc.reset_peak`` so every stage's
+    peak is its own high-water mark above the memory live when it started.
+    Allocations made by other requests running at the same time are counted
+    too; profile on an otherwise idle worker for exact attribution.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, int]] = {}
+        self.peak_bytes = 0
+        self.net_bytes = 0
+        self.seconds = 0.0
+        self._started_tracing = False
+        self._start_bytes = 0
+        self._start_time = 0.0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start_bytes, _ = tracemalloc.get_traced_memory()
+        self._start_time = time.perf_counter()
+
+    def stop(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak_bytes = max(self.peak_bytes, peak - self._start_bytes)
+        self.net_bytes = current - self._start_bytes
+        self.seconds = time.perf_counter() - self._start_time
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            after, peak = tracemalloc.get_traced_memory()
+            self.stages[name] = {"peak_bytes": peak - before, "net_bytes": after - before}
+            # reset_peak discards the request-wide high-water mark, so keep it here
+            self.peak_bytes = max(self.peak_bytes, peak - self._start_bytes)
+
+    def record_metrics(self):
+        registry.histogram("request_memory_peak_bytes", BYTES_BUCKETS, stage="total").observe(self.peak_bytes)
+        registry.histogram("request_memory_net_bytes", BYTES_BUCKETS, stage="total").observe(max(0, self.net_bytes))
+        for name, stats in self.stages.items():
+            registry.histogram("request_memory_peak_bytes", BYTES_BUCKETS, stage=name).observe(stats["peak_bytes"])
+            registry.histogram("request_memory_net_bytes", BYTES_BUCKETS, stage=name).observe(max(0, stats["net_bytes"]))
+
+    def as_header(self) -> str:
+        """Compact summary, e.g. ``total=812345/10240;finance=2048/512``"""
+        parts = [f"total={self.peak_bytes}/{self.net_bytes}"]
+        parts.extend(f"{name}={s['peak_bytes']}/{s['net_bytes']}" for name, s in self.stages.items())
+        return ";".join(parts)
+
+    def as_dict(self) -> dict:
+        return {
+            "peak_bytes": self.peak_bytes,
+            "net_bytes": self.net_bytes,
+            "seconds": round(self.seconds, 6),
+            "stages": self.stages,
+        }
+
+
+@contextmanager
+def profiled_memory():
+    """Run a block under a fresh MemoryProfile"""
+    profile = MemoryProfile()
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
@@ -0,0 +1,248 @@
+# backend/pipeline.py
+import asyncio
+import logging
+from contextlib import nullcontext
+from typing import NamedTuple, Optional
+
+from pydantic import TypeAdapter
+
+from agents.housing_agent.agent import HousingAgent, search_covers
+from agents.lifestyle_agent.agent import LifestyleAgent
+from agents.career_agent.agent import CareerAgent
+from agents.finance_agent.agent import FinanceAgent
+from agents.models import (
+    UserProfile, FinanceOutput, LifestyleOutput, HousingOutput, CareerOutput,
+    MovePlanResponse, MovePlanSummary,
+)
+from agents.transport import digest
+
+logger = logging.getLogger(__name__)
+
+# Compiled once; dumps straight to JSON bytes in pydantic-core
+_PLAN_ADAPTER = TypeAdapter(MovePlanResponse)
+
+
+AGENTS = frozenset({"finance", "lifestyle", "housing", "career"})
+
+# Profile fields each agent reads (after normalize_profile, so a credit_score
+# change shows up as credit_band). Housing is split in two: the listing
+# search, and the scoring that a budget or credit change only needs to redo.
+# The search asks for rents around the budget, so listings are kept and only
+# rescored while the budget stays inside the range they were searched for;
+# "search_range" marks a budget that left it.
+AGENT_INPUTS = {
+    "finance": {"city", "budget", "salary", "credit_band"},
+    "lifestyle": {"city", "interests", "lifestyle", "hobbies", "career_path"},
+    "housing": {"city", "interests", "search_range"},
+    "housing_scoring": {"budget", "credit_band", "interests"},
+    "career": {"city", "career_path", "experience_years", "salary", "interests", "lifestyle"},
+}
+
+# Stages that consume another stage's output
+AGENT_DEPENDENCIES = {
+    "housing": {"lifestyle"},
+    "housing_scoring": {"finance", "lifestyle", "housing"},
+}
+
+
+class AgentResults(NamedTuple):
+    finance: Optional[FinanceOutput]
+    lifestyle: Optional[LifestyleOutput]
+    housing: Optional[HousingOutput]
+    career: Optional[CareerOutput]
+
+
+def derive_credit_band(credit_score: int) -> str:
+    """Derive credit band from numeric credit score"""
+    if credit_score >= 740:
+        return "excellent"
+    elif credit_score >= 670:
+        return "good"
+    elif credit_score >= 580:
+        return "fair"
+    else:
+        return "poor"
+
+
+def normalize_profile(profile: UserProfile) -> UserProfile:
+    """Fill defaults the agents rely on"""
+    if profile.credit_band is None and profile.credit_score is not None:
+        profile.credit_band = derive_credit_band(profile.credit_score)
+    elif profile.credit_band is None:
+        profile.credit_band = "fair"  # default fallback
+
+    if profile.experience_years is None:
+        profile.experience_years = 0  # default to 0 years experience
+
+    # Ensure interests is a list
+    if not profile.interests:
+        profile.interests = []
+
+    # Normalize city string
+    profile.city = profile.city.strip()
+    return profile
+
+
+async def _skipped():
+    return None
+
+
+async def run_agents(profile: UserProfile, profiler=None, agents=AGENTS, include_places: bool = True,
+                     on_result=None, finance_output: Optional[FinanceOutput] = None) -> AgentResults:
+    """Run the four agents: finance + lifestyle, then housing + career.
+
+    With a ``profiler`` (anything with a ``stage(name)`` context manager) the
+    agents run one at a time so each stage can be measured in isolation.
+    Agents not named in ``agents`` are skipped and their result is None;
+    housing needs finance and lifestyle, so callers asking for it ask for
+    both. ``on_result(name, output)`` is called as each agent finishes.
+    A ``finance_output`` computed elsewhere is used instead of running finance.
+    """
+    fin_agent = FinanceAgent()
+    life_agent = LifestyleAgent()
+    house_agent = HousingAgent()
+    career_agent = CareerAgent()
+
+    async def reuse(result):
+        return result
+
+    async def reported(name, pending):
+        result = await pending
+        if on_result is not None and result is not None:
+            on_result(name, result)
+        return result
+
+    def finance():
+        if "finance" not in agents:
+            return _skipped()
+        return reported("finance", reuse(finance_output) if finance_output is not None else fin_agent.run(profile))
+
+    def lifestyle():
+        if "lifestyle" not in agents:
+            return _skipped()
+        return reported("lifestyle", life_agent.run(profile, include_places=include_places))
+
+    def housing(finance_results, lifestyle_results):
+        if "housing" not in agents:
+            return _skipped()
+        return reported("housing", house_agent.run(profile, finance_results, lifestyle_results))
+
+    def career():
+        return reported("career", career_agent.run(profile)) if "career" in agents else _skipped()
+
+    if profiler is not None:
+        with profiler.stage("finance"):
+            finance_results = await finance()
+        with profiler.stage("lifestyle"):
+            lifestyle_results = await lifestyle()
+        with profiler.stage("housing"):
+            housing_results = await housing(finance_results, lifestyle_results)
+        with profiler.stage("career"):
+            career_results = await career()
+        return AgentResults(finance_results, lifestyle_results, housing_results, career_results)
+
+    # Run finance and lifestyle agents in parallel without any timeouts
+    logger.info("Running finance and lifestyle agents...")
+    finance_results, lifestyle_results = await asyncio.gather(finance(), lifestyle())
+    logger.info("Finance and lifestyle agents completed")
+
+    # Run housing and career agents in parallel without any timeouts
+    logger.info("Running housing and career agents...")
+    housing_results, career_results = await asyncio.gather(
+        housing(finance_results, lifestyle_results),
+        career()
+    )
+    logger.info("Housing and career agents completed")
+
+    return AgentResults(finance_results, lifestyle_results, housing_results, career_results)
+
+
+def changed_fields(previous: UserProfile, profile: UserProfile, search_budget: Optional[int] = None) -> set:
+    """Profile fields that differ, plus ``search_range`` when the budget left the listings' search range"""
+    old, new = previous.model_dump(), profile.model_dump()
+    changed = {name for name in new if old.get(name) != new[name]}
+    search_budget = previous.budget if search_budget is None else search_budget
+    if not search_covers(search_budget, profile.budget):
+        changed.add("search_range")
+    return changed
+
+
+def stale_agents(changed: set) -> set:
+    """Stages whose inputs changed, plus everything downstream of them"""
+    stale = {agent for agent, inputs in AGENT_INPUTS.items() if inputs & changed}
+    grew = True
+    while grew:
+        grew = False
+        for agent, upstream in AGENT_DEPENDENCIES.items():
+            if agent not in stale and upstream & stale:
+                stale.add(agent)
+                grew = True
+    return stale
+
+
+async def replan(profile: UserProfile, previous: AgentResults, stale: set) -> AgentResults:
+    """Rerun only the ``stale`` stages, reusing ``previous`` results for the rest"""
+
+    async def reuse(result):
+        return result
+
+    finance_results, lifestyle_results = await asyncio.gather(
+        FinanceAgent().run(profile) if "finance" in stale else reuse(previous.finance),
+        LifestyleAgent().run(profile) if "lifestyle" in stale else reuse(previous.lifestyle),
+    )
+
+    house_agent = HousingAgent()
+    if "housing" in stale:
+        housing = house_agent.run(profile, finance_results, lifestyle_results)
+    elif "housing_scoring" in stale:
+        housing = reuse(house_agent.rescore(profile, finance_results, lifestyle_results, previous.housing))
+    else:
+        housing = reuse(previous.housing)
+
+    housing_results, career_results = await asyncio.gather(
+        housing,
+        CareerAgent().run(profile) if "career" in stale else reuse(previous.career),
+    )
+    return AgentResults(finance_results, lifestyle_results, housing_results, career_results)
+
+
+def build_response(profile: UserProfile, results: AgentResults, profiler=None) -> MovePlanResponse:
+    """Assemble the summary and final response from the agent outputs.
+
+    The agent outputs were validated when the agents built them, so the
+    response is assembled with ``model_construct`` instead of being
+    validated a second time.
+    """
+    with profiler.stage("response") if profiler is not None else nullcontext():
+        return MovePlanResponse.model_construct(
+            status="success",
+            city=profile.city,
+            finance=results.finance,
+            lifestyle=results.lifestyle,
+            housing_recommendations=results.housing.housing_recommendations,
+            job_recommendations=results.career.job_recommendations,
+            summary=build_summary(profile, results),
+        )
+
+
+def build_summary(profile: UserProfile, results: AgentResults) -> MovePlanSummary:
+    housing = results.housing.housing_recommendations
+    jobs = results.career.job_recommendations.job_matches
+    return MovePlanSummary.model_construct(
+        headline=f"Personalized move plan for {profile.city}",
+        top_apartment=housing[0].model_dump() if housing else None,
+        job_target=jobs[0].model_dump() if jobs else None,
+        cash_needed=results.finance.move_cash_needed.total,
+        neighborhood=results.lifestyle.primary_fit,
+    )
+
+
+def render_response(plan: MovePlanResponse, profiler=None) -> bytes:
+    """Serialize a plan to JSON bytes in one pass, skipping FastAPI's re-validation"""
+    with profiler.stage("serialize") if profiler is not None else nullcontext():
+        return _PLAN_ADAPTER.dump_json(plan)
+
+
+def plan_cache_key(profile: UserProfile) -> str:
+    """Cache key for a normalized profile's serialized plan"""
+    return "plan:" + digest(profile.model_dump())
@@ -0,0 +1,137 @@
+# backend/precompute.py
+"""Build the city snapshot served ahead of live upstream calls.
+
+    python -m backend.precompute --out snapshots/cities.snap
+    python -m backend.precompute --out snapshots/cities.snap --cities Houston "New York"
+
+Point NEXTMOVE_SNAPSHOT at the output and restart (or roll) the workers.
+The tag vector index (``--vectors``) is written alongside it; point
+NEXTMOVE_VECTOR_INDEX at that file.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from agents.models import UserProfile
+from agents.snapshot import market_listings_key, neighborhoods_key, places_key, salary_key, write_snapshot
+from agents.lifestyle_agent.agent import LifestyleAgent, INTEREST_QUERIES, GENERAL_QUERIES
+from agents.housing_agent.agent import HousingAgent
+from agents.career_agent.agent import CareerAgent
+from agents.vectors import VectorIndex, DEFAULT_VOCABULARY
+
+# Cities with hard-coded coordinates in LifestyleAgent, i.e. the ones we already serve well
+DEFAULT_CITIES = ["Houston", "Austin", "Dallas", "New York", "Los Angeles", "San Francisco", "Seattle"]
+
+COMMON_CAREER_PATHS = [
+    "Software Engineer", "Data Analyst", "Data Scientist", "Product Manager", "UX Designer",
+    "Marketing Specialist", "DevOps Engineer", "Nurse", "Accountant", "Teacher",
+]
+
+EXPERIENCE_BANDS = ["junior", "mid", "senior"]
+
+
+def snapshot_tasks(cities, career_paths, places: bool):
+    """Every (key, fetch) pair the snapshot should hold"""
+    lifestyle = LifestyleAgent()
+    housing = HousingAgent()
+    career = CareerAgent()
+    queries = list(dict.fromkeys(list(INTEREST_QUERIES.values()) + GENERAL_QUERIES))
+
+    for city in cities:
+        # City-wide analysis; requests re-rank it by their own interests
+        city_profile = UserProfile(city=city, budget=0, career_path="")
+        yield neighborhoods_key(city), lambda p=city_profile: lifestyle._fetch_neighborhoods(p)
+
+        # Listings priced like the whole market, not any one budget; they feed the rent sketches
+        yield market_listings_key(city), lambda c=city: housing._fetch_market_listings(c)
+
+        if places:
+            coords = lifestyle._get_city_coordinates(city)
+            for query in queries:
+                yield places_key(city, query), lambda c=city, q=query: [
+                    place.as_dict() for place in lifestyle._fetch_places(q, c, coords)
+                ]
+
+        for career_path in career_paths:
+            for band in EXPERIENCE_BANDS:
+                yield salary_key(city, career_path, band), lambda c=city, p=career_path, b=band: (
+                    career._fetch_market_salary(c, p, b)
+                )
+
+
+def snapshot_tags(results) -> list:
+    """Neighborhood tags and place categories found in the fetched entries"""
+    tags = []
+    for _, value in results:
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    tags.extend(item.get("tags") or item.get("category_tags") or [])
+    return tags
+
+
+def build(out: str, cities, career_paths, workers: int = 4, vectors: str = None) -> dict:
+    """Fetch everything live and write the snapshot; failed entries are left out"""
+    places = bool(LifestyleAgent().maps_api_key)
+    if not places:
+        print("GOOGLE_MAPS_API_KEY not set; skipping Places queries")
+
+    tasks = list(snapshot_tasks(cities, career_paths, places))
+    failures = []
+
+    def run(task):
+        key, fetch = task
+        try:
+            return key, fetch()
+        except Exception as e:
+            failures.append((key, f"{type(e).__name__}: {e}"))
+            return key, None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = [(key, value) for key, value in pool.map(run, tasks) if value is not None]
+
+    count = write_snapshot(out, results)
+    tags = 0
+    if vectors:
+        index = VectorIndex(DEFAULT_VOCABULARY + snapshot_tags(results))
+        index.save(vectors)
+        tags = len(index)
+    return {
+        "entries": count,
+        "tags": tags,
+        "failed": failures,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the NextMove city snapshot")
+    parser.add_argument("--out", default=os.getenv("NEXTMOVE_SNAPSHOT", "snapshots/cities.snap"))
+    parser.add_argument(
+        "--cities", nargs="+",
+        default=[c.strip() for c in os.getenv("NEXTMOVE_SNAPSHOT_CITIES", "").split(",") if c.strip()] or DEFAULT_CITIES,
+    )
+    parser.add_argument("--career-paths", nargs="+", default=COMMON_CAREER_PATHS)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--vectors", default=os.getenv("NEXTMOVE_VECTOR_INDEX", "snapshots/tags.npz"),
+                        help="where to write the tag vector index ('' to skip)")
+    args = parser.parse_args(argv)
+
+    summary = build(args.out, args.cities, args.career_paths, args.workers, args.vectors)
+    for key, error in summary["failed"]:
+        print(f"  skipped {key}: {error}")
+    print(f"Wrote {summary['entries']} entries to {args.out} in {summary['seconds']}s "
+          f"({len(summary['failed'])} skipped)")
+    if summary["tags"]:
+        print(f"Indexed {summary['tags']} tags to {args.vectors}")
+    return 0 if summary["entries"] else 1
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# backend/scenarios.py
+"""What-if affordability grids: FinanceAgent's rules over many budgets and salaries at once.
+
+The 30% rule, deposits, moving, setup and buffer are evaluated as NumPy
+array expressions in the same operation order as ``FinanceAgent.run``, so
+every cell matches what a full plan for that budget and salary would say.
+No LLM is involved; tips are the only part of the finance output left out.
+"""
+import json
+from typing import List
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from agents.finance_agent.agent import (
+    RENT_SHARE, NEAR_LOW, NEAR_HIGH, DEPOSIT_MONTHS, MOVING_COST, SETUP_COST, BUFFER_MONTHS,
+)
+from agents.rent_sketch import get_rent_sketches, MIN_SAMPLES
+
+# Cells (budgets x salaries) one request may ask for
+MAX_GRID_CELLS = 250_000
+# Keeps every value exactly representable as float64, like the scalar path's int/float mix
+MAX_AMOUNT = 10 ** 9
+
+_BANDS = np.array(["below", "near", "above"])
+
+
+class AffordabilityGridRequest(BaseModel):
+    city: str
+    budgets: List[int] = Field(min_length=1)
+    # 0 means no salary given: the scalar path then estimates it from the budget
+    salaries: List[int] = Field(default=[0], min_length=1)
+
+
+def affordability_grid(budgets, salaries) -> dict:
+    """Finance numbers for every (salary, budget) pair; grids are indexed [salary][budget]"""
+    budget = np.asarray(budgets, dtype=np.int64)
+    salary = np.asarray(salaries, dtype=np.int64)[:, None]
+
+    # Recommended max rent: from the salary when given, else from the income the budget implies
+    from_salary = np.trunc(salary * RENT_SHARE / 12)
+    from_budget = np.trunc(budget / RENT_SHARE * 12 * RENT_SHARE / 12)
+    recommended = np.where(salary > 0, from_salary, from_budget).astype(np.int64)
+
+    band = np.where(budget < recommended * NEAR_LOW, 0, np.where(budget <= recommended * NEAR_HIGH, 1, 2))
+
+    # Move-in cash only depends on the budget
+    deposits = budget * DEPOSIT_MONTHS
+    buffer = np.trunc(budget * BUFFER_MONTHS).astype(np.int64)
+    total = deposits + MOVING_COST + SETUP_COST + buffer
+
+    return {
+        "recommended_max_rent": recommended.tolist(),
+        "budget_vs_recommended": _BANDS[band].tolist(),
+        "move_cash_needed": {
+            "deposits": deposits.tolist(),
+            "moving": MOVING_COST,
+            "setup": SETUP_COST,
+            "buffer": buffer.tolist(),
+            "total": total.tolist(),
+        },
+    }
+
+
+def market_percentiles(city: str, budgets) -> list:
+    """Per budget, the share of the city's observed rents at or below it (None if too few)"""
+    sketch = get_rent_sketches().sketch(city)
+    if sketch.count < MIN_SAMPLES:
+        return [None] * len(budgets)
+    values, cumulative = sketch.cdf()
+    cumulative = np.asarray(cumulative, dtype=np.float64)
+    below = np.searchsorted(np.asarray(values), np.asarray(budgets, dtype=np.float64), side="right")
+    ranks = np.where(below > 0, cumulative[np.maximum(below - 1, 0)] / cumulative[-1], 0.0)
+    return np.rint(ranks * 100).astype(int).tolist()
+
+
+def build_grid(request: AffordabilityGridRequest) -> dict:
+    """Validated grid response; raises ValueError for grids that are too large or out of range"""
+    cells = len(request.budgets) * len(request.salaries)
+    if cells > MAX_GRID_CELLS:
+        raise ValueError(f"Grid has {cells} cells; at most {MAX_GRID_CELLS} are allowed")
+    if not all(0 < b <= MAX_AMOUNT for b in request.budgets):
+        raise ValueError(f"Budgets must be between 1 and {MAX_AMOUNT}")
+    if not all(0 <= s <= MAX_AMOUNT for s in request.salaries):
+        raise ValueError(f"Salaries must be between 0 and {MAX_AMOUNT}")
+
+    return {
+        "city": request.city,
+        "budgets": request.budgets,
+        "salaries": request.salaries,
+        **affordability_grid(request.budgets, request.salaries),
+        "market_percentile": market_percentiles(request.city, request.budgets),
+    }
+
+
+def render_grid(request: AffordabilityGridRequest) -> bytes:
+    return json.dumps(build_grid(request), separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,55 @@
+# backend/sessions.py
+import os
+import uuid
+from typing import Optional, Tuple
+
+from agents.cache import Cache, get_cache
+from agents.models import UserProfile, FinanceOutput, LifestyleOutput, HousingOutput, CareerOutput
+from backend.pipeline import AgentResults
+
+PLAN_SESSION_HEADER = "X-Plan-ID"
+
+
+class PlanSessionStore:
+    """Profiles and agent results behind each plan id, for incremental re-planning.
+
+    Sessions live in the node's shared cache so a PATCH can land on any
+    worker, and expire ``ttl`` seconds after they were written. They are
+    never modified: re-planning stores the result under a new id, so a plan
+    id always names one plan.
+    """
+
+    def __init__(self, cache: Optional[Cache] = None, ttl: Optional[float] = None):
+        self._cache = cache
+        self.ttl = ttl if ttl is not None else float(os.getenv("NEXTMOVE_PLAN_SESSION_TTL", "1800"))
+
+    @property
+    def cache(self) -> Cache:
+        return self._cache or get_cache()
+
+    def create(self, profile: UserProfile, results: AgentResults, search_budget: Optional[int] = None) -> str:
+        """``search_budget`` is the budget the housing listings were searched for (the profile's by default)"""
+        plan_id = uuid.uuid4().hex
+        self.cache.set(f"session:{plan_id}", {
+            "profile": profile.model_dump(),
+            "results": {name: result.model_dump() for name, result in results._asdict().items()},
+            "search_budget": profile.budget if search_budget is None else search_budget,
+        }, self.ttl)
+        return plan_id
+
+    def load(self, plan_id: str) -> Optional[Tuple[UserProfile, AgentResults, int]]:
+        """The profile, agent results and listing search budget behind ``plan_id``"""
+        stored = self.cache.get(f"session:{plan_id}")
+        if stored is None:
+            return None
+        results = stored["results"]
+        profile = UserProfile(**stored["profile"])
+        return profile, AgentResults(
+            finance=FinanceOutput.model_validate(results["finance"]),
+            lifestyle=LifestyleOutput.model_validate(results["lifestyle"]),
+            housing=HousingOutput.model_validate(results["housing"]),
+            career=CareerOutput.model_validate(results["career"]),
+        ), stored.get("search_budget", profile.budget)
+
+
+plan_sessions = PlanSessionStore()
@@ -0,0 +1,105 @@
+# backend/startup.py
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple, Union
+
+from agents.transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+# Upstream hosts worth a pooled connection before traffic arrives, keyed by the
+# credential that makes the agents call them
+UPSTREAM_HOSTS = {
+    "GOOGLE_MAPS_API_KEY": "https://maps.googleapis.com",
+    "LINKED_IN_API": "https://api.harvest-api.com",
+}
+
+WarmupStep = Callable[[], Union[None, Awaitable[None]]]
+
+
+class StartupReport:
+    """Where a worker's time went between import and its first response"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.details: Dict[str, object] = {}
+        self.ready = False
+        self.first_request_seconds = None
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = round(seconds, 4)
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "phases": self.phases,
+            "first_request_seconds": self.first_request_seconds,
+            "details": self.details,
+        }
+
+
+startup_report = StartupReport()
+
+_warmup_steps: List[Tuple[str, WarmupStep]] = []
+
+
+def register_warmup(name: str, step: WarmupStep):
+    """Add a step (sync or async) that must finish before the worker reports ready"""
+    _warmup_steps.append((name, step))
+
+
+def _preload_sdks():
+    get_transport().preload()
+
+
+def _open_upstream_connections():
+    transport = get_transport()
+    urls = [url for credential, url in UPSTREAM_HOSTS.items() if transport.credential(credential)]
+    startup_report.details["connections"] = transport.warm_connections(urls)
+
+
+def _open_shared_cache():
+    cache = get_transport().cache
+    startup_report.details["cache"] = type(cache).__name__
+
+
+def _map_city_snapshot():
+    snapshot = get_transport().snapshot
+    startup_report.details["snapshot"] = {"path": snapshot.path, "entries": len(snapshot), "built_at": snapshot.built_at}
+
+
+register_warmup("sdk_preload", _preload_sdks)
+register_warmup("upstream_connections", _open_upstream_connections)
+register_warmup("shared_cache", _open_shared_cache)
+register_warmup("city_snapshot", _map_city_snapshot)
+
+
+async def warm_up():
+    """Run every registered warm-up step, then mark the worker ready.
+
+    Sync steps run in a thread so the loop keeps answering liveness probes.
+    A failing step is logged, listed under ``details["failed"]`` and skipped:
+    a cold cache is slower, not broken.
+    """
+    if os.getenv("NEXTMOVE_WARMUP", "1").lower() in ("0", "false", "no"):
+        startup_report.ready = True
+        return
+
+    started = time.perf_counter()
+    for name, step in _warmup_steps:
+        step_started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(step):
+                await step()
+            else:
+                await asyncio.to_thread(step)
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+            startup_report.details.setdefault("failed", {})[name] = str(e)
+        startup_report.record(f"warmup.{name}", time.perf_counter() - step_started)
+
+    startup_report.record("warmup", time.perf_counter() - started)
+    startup_report.ready = True
+    logger.info(f"Worker ready: {startup_report.phases}")
@@ -0,0 +1,135 @@
+# backend/views.py
+from contextlib import nullcontext
+from typing import Optional
+
+import pydantic_core
+
+from agents.models import UserProfile, HousingRecommendation, JobMatch, Place
+from backend.pipeline import AgentResults, build_summary, build_response, render_response
+from backend.commute import rank_by_commute
+
+# Names accepted in ?fields= -> key in the plan response
+SECTIONS = {
+    "finance": "finance",
+    "lifestyle": "lifestyle",
+    "housing": "housing_recommendations",
+    "jobs": "job_recommendations",
+    "summary": "summary",
+}
+
+# Agents each section needs; housing is scored against finance and lifestyle output
+SECTION_AGENTS = {
+    "finance": {"finance"},
+    "lifestyle": {"lifestyle"},
+    "housing": {"finance", "lifestyle", "housing"},
+    "jobs": {"career"},
+    "summary": {"finance", "lifestyle", "housing", "career"},
+}
+
+
+class PlanView:
+    """Which parts of a plan the client asked for, and how to shape them.
+
+    ``fields`` picks sections, the ``*_limit`` values keep the top-k of each
+    list (agents already return them best first) and ``compact`` sends
+    housing, jobs and places as parallel arrays, dropping the per-item
+    ``reason`` strings. ``commute`` re-ranks housing by commute to the
+    recommended jobs and proximity to the recommended places.
+    """
+
+    def __init__(self, fields=None, housing_limit: Optional[int] = None, jobs_limit: Optional[int] = None,
+                 places_limit: Optional[int] = None, compact: bool = False, commute: bool = False):
+        self.fields = list(fields) if fields else list(SECTIONS)
+        self.housing_limit = housing_limit
+        self.jobs_limit = jobs_limit
+        self.places_limit = places_limit
+        self.compact = compact
+        self.commute = commute
+
+    @classmethod
+    def from_query(cls, fields: Optional[str] = None, **options) -> "PlanView":
+        """Parse ``fields=summary,housing``; raises ValueError on unknown sections"""
+        names = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+        unknown = sorted(set(names or ()) - set(SECTIONS))
+        if unknown:
+            raise ValueError(f"Unknown fields {', '.join(unknown)}; expected some of {', '.join(SECTIONS)}")
+        return cls(list(dict.fromkeys(names)) if names else None, **options)
+
+    @property
+    def is_full(self) -> bool:
+        return (set(self.fields) == set(SECTIONS) and not self.compact and not self.commute
+                and self.housing_limit is None and self.jobs_limit is None and self.places_limit is None)
+
+    @property
+    def agents(self) -> set:
+        agents = set().union(*(SECTION_AGENTS[name] for name in self.fields))
+        if self.commute and "housing" in agents:
+            agents |= {"career", "lifestyle"}
+        return agents
+
+    @property
+    def include_places(self) -> bool:
+        # Housing and the summary only read the neighborhood fit, not the POIs
+        return ("lifestyle" in self.fields and self.places_limit != 0) or (self.commute and "housing" in self.agents)
+
+    @property
+    def cache_key(self) -> str:
+        return (f"{','.join(self.fields)}|h{self.housing_limit}|j{self.jobs_limit}"
+                f"|p{self.places_limit}|c{int(self.compact)}|m{int(self.commute)}")
+
+    def render(self, profile: UserProfile, results: AgentResults) -> bytes:
+        """Serialize just the requested sections to JSON bytes"""
+        body = {"status": "success", "city": profile.city}
+        if self.compact:
+            body["compact"] = True
+
+        for name in self.fields:
+            if name == "finance":
+                body["finance"] = results.finance
+            elif name == "lifestyle":
+                body["lifestyle"] = self._lifestyle(results.lifestyle)
+            elif name == "housing":
+                housing = results.housing.housing_recommendations[:self.housing_limit]
+                body["housing_recommendations"] = (
+                    columns(HousingRecommendation, housing) if self.compact else housing
+                )
+            elif name == "jobs":
+                jobs = results.career.job_recommendations.job_matches[:self.jobs_limit]
+                body["job_recommendations"] = {"job_matches": columns(JobMatch, jobs) if self.compact else jobs}
+            elif name == "summary":
+                body["summary"] = build_summary(profile, results)
+
+        return pydantic_core.to_json(body)
+
+    def _lifestyle(self, lifestyle):
+        places = lifestyle.places[:self.places_limit]
+        if not self.compact:
+            return lifestyle.model_copy(update={"places": places})
+        shaped = lifestyle.model_dump(exclude={"places"})
+        shaped["places"] = columns(Place, places)
+        return shaped
+
+
+def render_plan(profile: UserProfile, results: AgentResults, view: PlanView, profiler=None) -> bytes:
+    """Response bytes for a view; the full plan keeps the single-pass fast path"""
+    if view.commute and results.housing is not None:
+        with profiler.stage("commute") if profiler is not None else nullcontext():
+            results = rank_by_commute(profile, results)
+    if view.is_full:
+        return render_response(build_response(profile, results, profiler=profiler), profiler=profiler)
+    with profiler.stage("response") if profiler is not None else nullcontext():
+        return view.render(profile, results)
+
+
+def columns(model, items: list) -> dict:
+    """Parallel arrays, one per field of ``model``; coords split into lat/lng (None when missing)"""
+    shaped = {}
+    for name in model.model_fields:
+        if name == "reason":
+            continue
+        if name == "coords":
+            shaped["lat"] = [None if item.coords is None else item.coords.lat for item in items]
+            shaped["lng"] = [None if item.coords is None else item.coords.lng for item in items]
+        else:
+            shaped[name] = [getattr(item, name) for item in items]
+    return shaped
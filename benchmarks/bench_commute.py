@@ -0,0 +1,104 @@
+# benchmarks/bench_commute.py
+"""Cost of the commute-aware housing ranking's distance kernels.
+
+    python -m benchmarks.bench_commute                  # compare with baseline
+    python -m benchmarks.bench_commute --update-baseline
+
+``naive`` is the per-pair pure-Python haversine the NumPy kernels replace,
+only run at the small size. ``tiled`` is ``best_commutes`` plus
+``place_proximity`` over listings x jobs and listings x top places.
+"""
+import argparse
+import math
+import sys
+
+import numpy as np
+
+from backend.commute import best_commutes, place_proximity, EARTH_RADIUS_KM, TOP_PLACES
+from benchmarks.harness import measure, load_baseline, save_baseline, compare, report
+
+BASELINE_NAME = "commute"
+# (listings, jobs)
+SIZES = ((1_000, 100), (5_000, 500))
+HOUSTON = (29.7604, -95.3698)
+
+
+def make_points(n: int, seed: int) -> np.ndarray:
+    """Points scattered ~30km around Houston, in radians"""
+    rng = np.random.default_rng(seed)
+    points = np.column_stack([
+        HOUSTON[0] + rng.uniform(-0.3, 0.3, n),
+        HOUSTON[1] + rng.uniform(-0.3, 0.3, n),
+    ])
+    return np.radians(points)
+
+
+def naive(listings, jobs, job_scores, places, place_scores):
+    def km(a, b):
+        h = (math.sin((b[0] - a[0]) / 2) ** 2
+             + math.cos(a[0]) * math.cos(b[0]) * math.sin((b[1] - a[1]) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(h, 1.0)))
+
+    total = sum(place_scores)
+    out = []
+    for listing in listings.tolist():
+        costs = [km(listing, job) * (2 - score / 100) for job, score in zip(jobs.tolist(), job_scores)]
+        best = min(range(len(costs)), key=costs.__getitem__)
+        proximity = sum(math.exp(-km(listing, p) / 2) * s / total for p, s in zip(places.tolist(), place_scores))
+        out.append((best, proximity))
+    return out
+
+
+def tiled(listings, jobs, job_scores, places, place_scores):
+    return best_commutes(listings, jobs, job_scores), place_proximity(listings, places, place_scores)
+
+
+def build_cases(repeats: int):
+    for n_listings, n_jobs in SIZES:
+        rng = np.random.default_rng(n_listings)
+        data = (
+            make_points(n_listings, 1),
+            make_points(n_jobs, 2),
+            rng.integers(40, 100, n_jobs).astype(np.float64),
+            make_points(TOP_PLACES, 3),
+            rng.integers(40, 100, TOP_PLACES).astype(np.float64),
+        )
+        label = f"{n_listings}x{n_jobs}"
+        if n_listings * n_jobs <= 100_000:
+            yield f"commute.naive[{label}]", lambda data=data: data, lambda d: naive(*d), 3
+        yield f"commute.tiled[{label}]", lambda data=data: data, lambda d: tiled(*d), repeats
+
+
+def run(repeats: int = 20) -> dict:
+    return {name: measure(setup, func, n) for name, setup, func, n in build_cases(repeats)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="allowed relative regression before failing (default 0.5)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the results as the new committed baseline")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(BASELINE_NAME)
+    results = run(args.repeats)
+    report(results, baseline)
+    small = f"{SIZES[0][0]}x{SIZES[0][1]}"
+    print(f"tiled: {results[f'commute.naive[{small}]']['seconds'] / results[f'commute.tiled[{small}]']['seconds']:.0f}x "
+          f"faster than naive at {small}")
+
+    if args.update_baseline:
+        save_baseline(BASELINE_NAME, results)
+        print("Baseline updated")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# benchmarks/bench_dedup.py
+"""Cost and quality of near-duplicate listing detection.
+
+    python -m benchmarks.bench_dedup                  # compare with baseline
+    python -m benchmarks.bench_dedup --update-baseline
+
+Synthetic listings around Houston where about a fifth are re-listings of an
+earlier one under a variant address ("Street"/"St", "Apt 4"/"#4", case,
+punctuation, a dropped city) with ~20m of coordinate jitter. ``naive`` is
+the exact all-pairs comparison LSH replaces, only run at the small size.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from agents.dedup import CELL_DEGREES, SIMILARITY, _find, _numbers, duplicate_groups, normalize_address
+from benchmarks.harness import measure, load_baseline, save_baseline, compare, report
+
+BASELINE_NAME = "dedup"
+SIZES = (3_000, 10_000, 100_000)
+NAIVE_MAX = 3_000
+DUPLICATE_SHARE = 0.2
+HOUSTON = (29.7604, -95.3698)
+CITY = "Houston, TX"
+
+_NAMES = ["Oak", "Maple", "Westheimer", "Kirby", "Montrose", "Bellaire", "Richmond", "Shepherd", "Heights",
+          "Washington", "Memorial", "Fannin", "Main", "Louisiana", "Travis", "Gessner", "Hillcroft", "Dunlavy",
+          "Alabama", "Holman", "Elgin", "Bissonnet", "Yale", "Durham", "Ella", "Airline", "Telephone", "Cullen"]
+_TYPES = [("Street", "St"), ("Avenue", "Ave"), ("Boulevard", "Blvd"), ("Road", "Rd"), ("Drive", "Dr"), ("Lane", "Ln")]
+
+
+def make_listings(n: int, seed: int = 0):
+    """(addresses, lat, lng, origin): origin[i] is the listing i re-lists, or i"""
+    rng = np.random.default_rng(seed)
+    addresses, origin, parts = [], [], []
+    lat = np.empty(n)
+    lng = np.empty(n)
+    for i in range(n):
+        if i and rng.random() < DUPLICATE_SHARE:
+            source = int(rng.integers(0, i))
+            root = origin[source]
+            number, name, kind, unit = parts[root]
+            long_type, short_type = _TYPES[kind]
+            unit_text = "" if unit is None else rng.choice([f" Apt {unit}", f" #{unit}", f", Unit {unit}", f" apt. {unit}"])
+            street = f"{number} {rng.choice(['N. ', 'North ']) if name.startswith('N ') else ''}{name.removeprefix('N ')} " \
+                     f"{rng.choice([long_type, short_type, short_type + '.'])}{unit_text}"
+            city = rng.choice([", Houston, TX", " Houston", ""])
+            address = street + city
+            addresses.append(address.upper() if rng.random() < 0.1 else address)
+            origin.append(root)
+            parts.append(parts[root])
+            lat[i] = lat[root] + rng.normal(0, 0.0002)
+            lng[i] = lng[root] + rng.normal(0, 0.0002)
+            continue
+        number = int(rng.integers(1, 20_000))
+        name = ("N " if rng.random() < 0.2 else "") + _NAMES[rng.integers(len(_NAMES))] + \
+            ("" if rng.random() < 0.5 else f" {_NAMES[rng.integers(len(_NAMES))]}")
+        kind = int(rng.integers(len(_TYPES)))
+        unit = int(rng.integers(1, 400)) if rng.random() < 0.5 else None
+        street = f"{number} {name.replace('N ', 'North ', 1)} {_TYPES[kind][0]}" + ("" if unit is None else f" Apt {unit}")
+        addresses.append(f"{street}, Houston, TX")
+        origin.append(i)
+        parts.append((number, name, kind, unit))
+        lat[i] = HOUSTON[0] + rng.uniform(-0.3, 0.3)
+        lng[i] = HOUSTON[1] + rng.uniform(-0.3, 0.3)
+    return addresses, lat, lng, np.array(origin)
+
+
+def naive(addresses, lat, lng, city):
+    """Exact shingle Jaccard over every pair, with the same number and distance rules"""
+    normalized = [normalize_address(address, city) or "?" for address in addresses]
+    grams = []
+    for text in normalized:
+        data = f"\0{text}\0".encode("utf-8")
+        grams.append({data[k:k + 3] for k in range(len(data) - 2)})
+    numbers = [_numbers(text) for text in normalized]
+    n = len(addresses)
+    parent = np.arange(n)
+    for i in range(n):
+        for j in range(i + 1, n):
+            if (numbers[i] != numbers[j] or abs(lat[i] - lat[j]) >= CELL_DEGREES / 2
+                    or abs(lng[i] - lng[j]) >= CELL_DEGREES / 2):
+                continue
+            if len(grams[i] & grams[j]) / len(grams[i] | grams[j]) >= SIMILARITY:
+                root_i, root_j = _find(parent, i), _find(parent, j)
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+    return np.array([_find(parent, i) for i in range(n)])
+
+
+def quality(groups, origin) -> tuple:
+    """(precision, recall) of the merged pairs (listing, its group's first listing)"""
+    merged = groups != np.arange(len(groups))
+    duplicate = origin != np.arange(len(origin))
+    correct = merged & (origin[groups] == origin)
+    return correct.sum() / max(merged.sum(), 1), correct.sum() / max(duplicate.sum(), 1)
+
+
+def build_cases(repeats: int):
+    for n in SIZES:
+        data = (*make_listings(n)[:3], CITY)
+        if n <= NAIVE_MAX:
+            yield f"dedup.naive[{n}]", lambda data=data: data, lambda d: naive(*d), 3
+        yield f"dedup.lsh[{n}]", lambda data=data: data, lambda d: duplicate_groups(*d), repeats if n < 100_000 else 3
+
+
+def run(repeats: int = 10) -> dict:
+    return {name: measure(setup, func, n) for name, setup, func, n in build_cases(repeats)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="allowed relative regression before failing (default 0.5)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the results as the new committed baseline")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(BASELINE_NAME)
+    results = run(args.repeats)
+    report(results, baseline)
+    print(f"lsh: {results[f'dedup.naive[{NAIVE_MAX}]']['seconds'] / results[f'dedup.lsh[{NAIVE_MAX}]']['seconds']:.0f}x "
+          f"faster than naive at {NAIVE_MAX}")
+    addresses, lat, lng, origin = make_listings(SIZES[-1])
+    precision, recall = quality(duplicate_groups(addresses, lat, lng, CITY), origin)
+    print(f"lsh at {SIZES[-1]}: precision {precision:.4f}, recall {recall:.4f}")
+
+    if args.update_baseline:
+        save_baseline(BASELINE_NAME, results)
+        print("Baseline updated")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# benchmarks/bench_memory.py
+"""Per-request peak memory of the full plan pipeline.
+
+    python -m benchmarks.bench_memory                  # compare with baseline
+    python -m benchmarks.bench_memory --update-baseline
+
+Runs the four agents and response assembly through the same MemoryProfile
+hook that ``X-Profile-Memory`` uses, with the transport offline so every
+agent takes its deterministic fallback path. Exits non-zero when the
+request or any stage peaks higher than the committed baseline by more than
+--threshold.
+"""
+import argparse
+import asyncio
+import random
+import sys
+
+from agents.models import UserProfile
+from agents.transport import Transport, OFFLINE, set_transport
+from backend.memprofile import profiled_memory
+from backend.pipeline import normalize_profile, run_agents, build_response, render_response
+from benchmarks.harness import load_baseline, save_baseline, compare
+
+BASELINE_NAME = "memory"
+
+
+def make_profile() -> UserProfile:
+    return UserProfile(
+        city="Houston, TX",
+        budget=1800,
+        credit_score=720,
+        interests=["gym", "vegan", "nightlife", "art", "hiking"],
+        lifestyle="active",
+        hobbies="climbing, painting",
+        career_path="Software Engineer",
+        experience_years=3,
+        salary=85000,
+    )
+
+
+async def profile_request() -> dict:
+    profile = normalize_profile(make_profile())
+    with profiled_memory() as memory:
+        results = await run_agents(profile, profiler=memory)
+        render_response(build_response(profile, results, profiler=memory), profiler=memory)
+    return memory.as_dict()
+
+
+def run(requests: int) -> dict:
+    """Worst case over ``requests`` runs, keyed like the other benchmark baselines"""
+    set_transport(Transport(mode=OFFLINE))
+    random.seed(0)
+    # One long-lived loop like a server worker's, so its default executor threads are reused
+    loop = asyncio.new_event_loop()
+    # First request pays one-off import, cache and thread start-up costs; keep it out of the numbers
+    loop.run_until_complete(profile_request())
+
+    results = {}
+    for _ in range(requests):
+        profile = loop.run_until_complete(profile_request())
+        stages = {"request": {"peak_bytes": profile["peak_bytes"], "net_bytes": profile["net_bytes"]}}
+        stages.update(profile["stages"])
+        for name, stats in stages.items():
+            worst = results.setdefault(name, {"peak_bytes": 0, "net_bytes": 0})
+            worst["peak_bytes"] = max(worst["peak_bytes"], stats["peak_bytes"])
+            worst["net_bytes"] = max(worst["net_bytes"], stats["net_bytes"])
+    loop.close()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5, help="profiled requests to run (default 5)")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative peak growth before failing (default 0.2)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the results as the new committed baseline")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(BASELINE_NAME)
+    results = run(args.requests)
+
+    print(f"{'stage':<12} {'peak KiB':>10} {'net KiB':>10} {'base KiB':>10}")
+    for name, stats in results.items():
+        base = baseline.get(name, {}).get("peak_bytes")
+        print(f"{name:<12} {stats['peak_bytes'] / 1024:>10.1f} {stats['net_bytes'] / 1024:>10.1f} "
+              f"{(base / 1024 if base else 0):>10.1f}")
+
+    if args.update_baseline:
+        save_baseline(BASELINE_NAME, results)
+        print("Baseline updated")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, metrics=("peak_bytes",))
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# benchmarks/bench_records.py
+"""What converting only the survivors to pydantic models saves per request.
+
+    python -m benchmarks.bench_records                  # compare with baseline
+    python -m benchmarks.bench_records --update-baseline
+
+Each case takes one request's raw candidates (cache/API shaped dicts), ranks
+them and returns the agent's output models. ``models`` builds a model for
+every candidate first, as the agents used to; ``records`` ranks
+``agents.records`` instances and converts only the kept top-k. Scores are
+precomputed so both do the same ranking work.
+"""
+import argparse
+import random
+import sys
+
+from agents.models import Coordinates, HousingRecommendation, JobMatch, Place
+from agents.records import ListingRecord, PlaceRecord, JobRecord
+from benchmarks.bench_scoring import AMENITIES, COMPANIES, JOB_TITLES, PLACE_TAGS, STREETS
+from benchmarks.harness import measure, load_baseline, save_baseline, compare, report
+
+BASELINE_NAME = "records"
+# kind -> (candidates per request, kept in the output or None for all): every listing
+# is kept, places come 3 per query from up to 5 queries plus general ones, jobs from all strategies
+REQUEST = {"housing": (15, None), "places": (40, 10), "jobs": (60, 15)}
+# Candidate counts multiplied by this for the "large" cases
+LARGE = 100
+
+
+def make_candidates(kind: str, n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    if kind == "housing":
+        return [{
+            "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, Houston, TX",
+            "rent": rng.randint(1200, 2600), "min_credit_score": rng.randint(600, 750),
+            "amenities": rng.sample(AMENITIES, 3), "lat": 29.76 + rng.uniform(-0.2, 0.2),
+            "lng": -95.37 + rng.uniform(-0.2, 0.2),
+        } for _ in range(n)]
+    if kind == "places":
+        return [{
+            "name": f"Place {i}", "category_tags": rng.sample(PLACE_TAGS, 3),
+            "coords": {"lat": 29.76 + rng.uniform(-0.2, 0.2), "lng": -95.37 + rng.uniform(-0.2, 0.2)},
+            "reason": "Matches your interest in gym", "match_score": 0,
+        } for i in range(n)]
+    return [{
+        "title": rng.choice(JOB_TITLES), "company": f"{rng.choice(COMPANIES)} {i}",
+        "location": "Houston, TX", "salary": (80_000, 110_000), "apply_url": None,
+    } for i in range(n)]
+
+
+def via_models(kind, candidates, scores, keep):
+    if kind == "housing":
+        models = [
+            HousingRecommendation(
+                address=c["address"], rent=c["rent"], min_credit_score=c["min_credit_score"],
+                amenities=c["amenities"], coords=Coordinates(lat=c["lat"], lng=c["lng"]),
+                match_score=score, reason="Good fit.",
+            )
+            for c, score in zip(candidates, scores)
+        ]
+    elif kind == "places":
+        models = [Place(**c) for c in candidates]
+        for model, score in zip(models, scores):
+            model.match_score = score
+    else:
+        models = [
+            JobMatch(title=c["title"], company=c["company"], location=c["location"],
+                     salary_range=f"${c['salary'][0]:,} - ${c['salary'][1]:,}", match_score=score)
+            for c, score in zip(candidates, scores)
+        ]
+    models.sort(key=lambda m: m.match_score, reverse=True)
+    return models[:keep]
+
+
+def via_records(kind, candidates, scores, keep):
+    if kind == "housing":
+        ranked = sorted(zip(scores, map(ListingRecord.from_dict, candidates)), key=lambda e: e[0], reverse=True)
+        return [record.to_model(score, "Good fit.") for score, record in ranked[:keep]]
+    if kind == "places":
+        records = [PlaceRecord.from_dict(c) for c in candidates]
+        for record, score in zip(records, scores):
+            record.match_score = score
+        records.sort(key=lambda r: r.match_score, reverse=True)
+        return [record.to_model() for record in records[:keep]]
+    ranked = sorted(zip(scores, map(JobRecord.from_dict, candidates)), key=lambda e: e[0], reverse=True)
+    return [record.to_model(score, f"${record.salary[0]:,} - ${record.salary[1]:,}") for score, record in ranked[:keep]]
+
+
+def build_cases(repeats: int):
+    for scale, label in ((1, "request"), (LARGE, "large")):
+        for seed, (kind, (n, keep)) in enumerate(REQUEST.items()):
+            n *= scale
+            keep = keep or n
+            candidates = make_candidates(kind, n, seed)
+            rng = random.Random(seed)
+            data = (kind, candidates, [rng.randint(0, 100) for _ in range(n)], keep)
+            for name, func in (("models", via_models), ("records", via_records)):
+                yield f"{kind}.{name}[{label}]", lambda data=data: data, lambda d, func=func: func(*d), repeats
+
+
+def run(repeats: int = 50) -> dict:
+    return {name: measure(setup, func, n) for name, setup, func, n in build_cases(repeats)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="allowed relative regression before failing (default 0.5)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the results as the new committed baseline")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(BASELINE_NAME)
+    results = run(args.repeats)
+    report(results, baseline)
+
+    # One request is one housing, one places and one jobs case
+    for label in ("request", "large"):
+        before = [results[f"{kind}.models[{label}]"] for kind in REQUEST]
+        after = [results[f"{kind}.records[{label}]"] for kind in REQUEST]
+        seconds = sum(r["seconds"] for r in before) - sum(r["seconds"] for r in after)
+        peak = max(r["peak_bytes"] for r in before) - max(r["peak_bytes"] for r in after)
+        print(f"records save {seconds * 1e6:.0f}us and {peak / 1024:.1f} KiB peak per {label}")
+
+    if args.update_baseline:
+        save_baseline(BASELINE_NAME, results)
+        print("Baseline updated")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
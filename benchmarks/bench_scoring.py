@@ -0,0 +1,200 @@
+# benchmarks/bench_scoring.py
+"""Micro-benchmarks for the agents' pure-Python scoring paths.
+
+    python -m benchmarks.bench_scoring                  # compare with baseline
+    python -m benchmarks.bench_scoring --update-baseline
+    python -m benchmarks.bench_scoring --sizes 10,1000  # skip the 100k cases
+
+Exits non-zero when any case is slower or allocates more than the committed
+baseline by more than --threshold.
+"""
+import argparse
+import copy
+import random
+import sys
+
+from agents.models import (
+    UserProfile, FinanceOutput, AffordabilityInfo, MoveCashNeeded,
+    LifestyleOutput, NeighborhoodFit,
+)
+from agents.records import ListingRecord, PlaceRecord, JobRecord
+from agents.housing_agent.agent import HousingAgent
+from agents.lifestyle_agent.agent import LifestyleAgent
+from agents.career_agent.agent import CareerAgent
+from agents.vectors import best_similarity, relevance
+from benchmarks.harness import measure, load_baseline, save_baseline, compare, report
+
+BASELINE_NAME = "scoring"
+SIZES = (10, 1_000, 100_000)
+
+AMENITIES = ["gym", "pool", "parking", "roof deck", "bike storage", "laundry", "concierge",
+             "dog park", "coworking space", "yoga studio", "rooftop bar", "ev charging"]
+PLACE_TAGS = ["Gym", "Park", "Coffee Shop Cafe", "Vegan Restaurant", "Bar Nightclub",
+              "Art Gallery", "Music Venue", "Point Of Interest", "Establishment", "Yoga Studio"]
+JOB_TITLES = ["Software Engineer", "Senior Software Engineer", "Data Analyst", "Product Manager",
+              "Frontend Developer", "Staff Engineer", "Lead Data Scientist", "QA Engineer"]
+COMPANIES = ["TechFlow", "WebCraft", "DataInsights", "AppBuilder", "CloudTech", "Bayou Labs"]
+STREETS = ["Main St", "Westheimer Rd", "Downtown Sq", "Montrose Blvd", "Center Ave", "Heights Blvd"]
+
+
+def make_profile() -> UserProfile:
+    return UserProfile(
+        city="Houston, TX",
+        budget=1800,
+        credit_band="good",
+        interests=["gym workouts", "vegan cooking", "nightlife", "art", "yoga"],
+        career_path="Software Engineer",
+        experience_years=3,
+        salary=85000,
+    )
+
+
+def make_finance() -> FinanceOutput:
+    return FinanceOutput(
+        affordability=AffordabilityInfo(recommended_max_rent=2125, credit_band="good", budget_vs_recommended="near"),
+        move_cash_needed=MoveCashNeeded(deposits=3600, moving=800, setup=300, buffer=900, total=5600),
+        tips=[],
+    )
+
+
+def make_lifestyle() -> LifestyleOutput:
+    return LifestyleOutput(
+        primary_fit=NeighborhoodFit(name="Montrose", tags=["nightlife", "vegan"], match_score=90),
+        explanation="",
+    )
+
+
+def make_listings(n: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [
+        ListingRecord(
+            address=f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, Houston, TX",
+            rent=rng.randint(1200, 2600),
+            min_credit_score=rng.randint(600, 750),
+            amenities=rng.sample(AMENITIES, rng.randint(2, 4)),
+            lat=29.76 + rng.uniform(-0.2, 0.2),
+            lng=-95.37 + rng.uniform(-0.2, 0.2),
+        )
+        for _ in range(n)
+    ]
+
+
+def make_places(n: int, seed: int = 2) -> list:
+    rng = random.Random(seed)
+    return [
+        PlaceRecord(
+            name=f"Place {i}",
+            category_tags=rng.sample(PLACE_TAGS, rng.randint(2, 4)),
+            lat=29.76 + rng.uniform(-0.2, 0.2),
+            lng=-95.37 + rng.uniform(-0.2, 0.2),
+            reason="",
+        )
+        for i in range(n)
+    ]
+
+
+def make_jobs(n: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    jobs = []
+    for _ in range(n):
+        low = rng.randrange(45_000, 140_000, 5_000)
+        jobs.append(JobRecord(
+            title=rng.choice(JOB_TITLES),
+            company=rng.choice(COMPANIES),
+            location=rng.choice(["Houston, TX", "Remote"]),
+            salary=(low, low + rng.randrange(10_000, 40_000, 5_000)),
+        ))
+    return jobs
+
+
+def build_cases(sizes):
+    """Yield (name, setup, func, repeats) for every scored function and size"""
+    profile = make_profile()
+    finance = make_finance()
+    lifestyle = make_lifestyle()
+    housing = HousingAgent()
+    life = LifestyleAgent()
+    career = CareerAgent()
+    credit_score = housing._get_credit_score_estimate(profile.credit_band)
+
+    for n in sizes:
+        repeats = 25 if n <= 1_000 else 2
+        listings = make_listings(n)
+        places = make_places(n)
+        jobs = make_jobs(n)
+        salary_ranges = [job.salary for job in jobs]
+
+        yield (
+            f"housing.match_score[{n}]",
+            lambda listings=listings: listings,
+            lambda data: [housing._calculate_match_score(l, profile, finance, lifestyle, credit_score) for l in data],
+            repeats,
+        )
+        yield (
+            f"lifestyle.place_match_score[{n}]",
+            lambda places=places: places,
+            # As in _get_places_of_interest: tag similarity for the whole batch, then per-place scoring
+            lambda data: [
+                life._calculate_place_match_score(p, profile, i, semantic)
+                for (i, p), semantic in zip(enumerate(data), relevance(best_similarity(profile.interests, [p.category_tags for p in data])).tolist())
+            ],
+            repeats,
+        )
+        yield (
+            f"career.job_match_score[{n}]",
+            lambda jobs=jobs: jobs,
+            lambda data: [career._calculate_job_match_score(j, profile) for j in data],
+            repeats,
+        )
+        yield (
+            f"career.salary_score[{n}]",
+            lambda salary_ranges=salary_ranges: salary_ranges,
+            lambda data: [career._calculate_salary_score(s, profile) for s in data],
+            repeats,
+        )
+        yield (
+            f"career.ensure_salary_diversity[{n}]",
+            # The function rewrites salaries in place, so every run gets a fresh copy
+            lambda jobs=jobs: copy.deepcopy(jobs),
+            lambda data: career._ensure_salary_diversity(data, profile),
+            repeats,
+        )
+
+
+def run(sizes=SIZES) -> dict:
+    results = {}
+    for name, setup, func, repeats in build_cases(sizes):
+        # Jittered scores must not make two runs do different work
+        random.seed(0)
+        results[name] = measure(setup, func, repeats)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(n) for n in SIZES),
+                        help="comma separated candidate counts")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="allowed relative regression before failing (default 0.5)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the results as the new committed baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [int(n) for n in args.sizes.split(",") if n]
+    baseline = load_baseline(BASELINE_NAME)
+    results = run(sizes)
+    report(results, baseline)
+
+    if args.update_baseline:
+        save_baseline(BASELINE_NAME, {**baseline, **results})
+        print("Baseline updated")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
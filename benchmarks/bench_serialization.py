@@ -0,0 +1,107 @@
+# benchmarks/bench_serialization.py
+"""Cost of turning agent outputs into response bytes, before and after the fast path.
+
+    python -m benchmarks.bench_serialization                  # compare with baseline
+    python -m benchmarks.bench_serialization --update-baseline
+
+``legacy`` rebuilds what /api/plan_move used to do: ``MovePlanResponse(**data)``
+re-validating every agent output, then FastAPI's ``response_model``
+validation, conversion to JSON-able Python and ``json.dumps``. ``fast`` is
+``build_response`` + ``render_response``; ``cached`` is a plan-cache hit
+read back from SQLite. Agent outputs come from an offline pipeline run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+
+from pydantic import TypeAdapter
+
+from agents.cache import SQLiteCache, PLAN_TTL
+from agents.models import MovePlanResponse, MovePlanSummary
+from agents.transport import Transport, OFFLINE, set_transport
+from backend.pipeline import normalize_profile, run_agents, build_response, render_response, plan_cache_key
+from benchmarks.bench_memory import make_profile
+from benchmarks.harness import measure, load_baseline, save_baseline, compare, report
+
+BASELINE_NAME = "serialization"
+
+_ADAPTER = TypeAdapter(MovePlanResponse)
+
+
+def legacy_render(profile, results) -> bytes:
+    summary = MovePlanSummary(
+        headline=f"Personalized move plan for {profile.city}",
+        top_apartment=results.housing.housing_recommendations[0].model_dump() if results.housing.housing_recommendations else None,
+        job_target=results.career.job_recommendations.job_matches[0].model_dump() if results.career.job_recommendations.job_matches else None,
+        cash_needed=results.finance.move_cash_needed.total,
+        neighborhood=results.lifestyle.primary_fit,
+    )
+    plan = MovePlanResponse(
+        status="success",
+        city=profile.city,
+        finance=results.finance,
+        lifestyle=results.lifestyle,
+        housing_recommendations=results.housing.housing_recommendations,
+        job_recommendations=results.career.job_recommendations,
+        summary=summary,
+    )
+    # FastAPI response_model: validate the returned value, dump to JSON-able Python, then JSONResponse.render
+    content = _ADAPTER.dump_python(_ADAPTER.validate_python(plan), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_render(profile, results) -> bytes:
+    return render_response(build_response(profile, results))
+
+
+def build_cases(repeats: int):
+    set_transport(Transport(mode=OFFLINE))
+    random.seed(0)
+    profile = normalize_profile(make_profile())
+    results = asyncio.run(run_agents(profile))
+
+    cache = SQLiteCache(os.path.join(tempfile.mkdtemp(prefix="nextmove-bench-"), "cache.sqlite3"))
+    key = plan_cache_key(profile)
+    cache.set_raw(key, fast_render(profile, results), PLAN_TTL)
+
+    yield "plan.legacy", lambda: (profile, results), lambda data: legacy_render(*data), repeats
+    yield "plan.fast", lambda: (profile, results), lambda data: fast_render(*data), repeats
+    yield "plan.cached", lambda: key, cache.get_raw, repeats
+
+
+def run(repeats: int = 200) -> dict:
+    return {name: measure(setup, func, n) for name, setup, func, n in build_cases(repeats)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="allowed relative regression before failing (default 0.5)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the results as the new committed baseline")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(BASELINE_NAME)
+    results = run(args.repeats)
+    report(results, baseline)
+    legacy, fast = results["plan.legacy"]["seconds"], results["plan.fast"]["seconds"]
+    print(f"fast path: {legacy / fast:.1f}x faster than legacy")
+
+    if args.update_baseline:
+        save_baseline(BASELINE_NAME, results)
+        print("Baseline updated")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
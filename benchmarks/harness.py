@@ -0,0 +1,91 @@
+# benchmarks/harness.py
+import gc
+import json
+import os
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# Absolute changes below these are timer/allocator noise, never a regression
+NOISE_FLOOR = {"seconds": 0.0005, "peak_bytes": 4096, "net_bytes": 4096}
+
+
+def measure(setup: Callable[[], Any], func: Callable[[Any], Any], repeats: int) -> Dict[str, float]:
+    """Time ``func(setup())`` and record its peak/net allocations.
+
+    Setup runs outside the timed region on every repeat so mutating
+    functions always see fresh input. Wall time is the best of ``repeats``;
+    allocations come from one extra run under tracemalloc so tracing
+    overhead never leaks into the timings.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        data = setup()
+        gc.collect()
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+
+    data = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = func(data)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return {
+        "seconds": round(best, 6),
+        "peak_bytes": max(0, peak - before),
+        "net_bytes": after - before,
+    }
+
+
+def load_baseline(name: str) -> Dict[str, Dict[str, float]]:
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(name: str, results: Dict[str, Dict[str, float]]):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float, metrics=("seconds", "peak_bytes")) -> list:
+    """Return a description of every metric that regressed past ``threshold``"""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if not previous:
+            continue
+        for metric in metrics:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > NOISE_FLOOR.get(metric, 0):
+                regressions.append(f"{case} {metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def report(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]):
+    print(f"{'case':<48} {'seconds':>12} {'peak KiB':>12} {'net KiB':>10} {'vs base':>9}")
+    for case, current in results.items():
+        previous = baseline.get(case, {})
+        delta = ""
+        if previous.get("seconds"):
+            delta = f"{(current['seconds'] / previous['seconds'] - 1) * 100:+.0f}%"
+        print(f"{case:<48} {current['seconds']:>12.6f} {current['peak_bytes'] / 1024:>12.1f} "
+              f"{current['net_bytes'] / 1024:>10.1f} {delta:>9}")
@@ -0,0 +1,69 @@
+# test_admission.py
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.main
+from agents.transport import Transport, OFFLINE, set_transport
+from backend.admission import AdmissionController, AdmissionRejected, FAST_PRIORITY, NORMAL_PRIORITY
+from conftest import sample_profile
+
+
+async def hold(controller, priority, order, name, release):
+    async with controller.admit(priority):
+        order.append(name)
+        await release.wait()
+
+
+def test_fast_mode_requests_are_admitted_first():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=1)
+        order, release = [], asyncio.Event()
+        first = asyncio.create_task(hold(controller, NORMAL_PRIORITY, order, "first", release))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(hold(controller, NORMAL_PRIORITY, order, "normal", release)),
+            asyncio.create_task(hold(controller, FAST_PRIORITY, order, "fast", release)),
+        ]
+        await asyncio.sleep(0.01)
+        assert order == ["first"] and controller.in_flight == 1
+        release.set()
+        await asyncio.gather(first, *queued)
+        assert controller.in_flight == 0
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "fast", "normal"]
+
+
+def test_rejects_when_queue_is_full_or_deadline_passes():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, NORMAL_PRIORITY, [], "running", release))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(hold(controller, NORMAL_PRIORITY, [], "waiting", release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as full:
+            await hold(controller, NORMAL_PRIORITY, [], "shed", release)
+        with pytest.raises(AdmissionRejected) as late:
+            await waiting
+        release.set()
+        await running
+        return full.value, late.value
+
+    full, late = asyncio.run(scenario())
+    assert full.reason == "queue_full" and late.reason == "deadline"
+    assert full.retry_after >= 1
+
+
+def test_plan_move_sheds_with_retry_after(monkeypatch):
+    set_transport(Transport(mode=OFFLINE))
+    monkeypatch.setattr(backend.main, "admission", AdmissionController(max_concurrent=0, max_queue=0))
+
+    response = TestClient(backend.main.app).post("/api/plan_move", json=sample_profile().model_dump())
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    set_transport(None)
@@ -18,7 +18,11 @@ from agents.housing_agent.agent import HousingAgent
 from agents.career_agent.agent import CareerAgent
 
 async def test_agents():
-    """Test all agents with sample data"""
+    """Test all agents with sample data
+
+    Set NEXTMOVE_TRANSPORT_MODE=record|replay and NEXTMOVE_CASSETTE=<path> to
+    capture the upstream traffic once and rerun it offline afterwards.
+    """
 
     # Sample user profile based on the specification
     sample_profile = UserProfile(
@@ -29,6 +33,7 @@ async def test_agents():
         credit_score=720,
         lifestyle="vegan, active",
         hobbies="climbing, painting, vegan cooking, gym workouts, nightlife",
+        interests=["climbing", "painting", "vegan cooking", "gym workouts", "nightlife"],
         career_path="Software Engineer",
         experience_years=2,
         salary=72000
@@ -70,8 +75,6 @@ async def test_agents():
         career_agent = CareerAgent()
         career_results = await career_agent.run(sample_profile)
         print(f"Career: Found {len(career_results.job_recommendations.job_matches)} job matches")
-        print(f"  Recruiter targets: {len(career_results.job_recommendations.recruiter_targets)}")
-        print(f"  Email drafts: {len(career_results.job_recommendations.email_drafts)}")
         if career_results.job_recommendations.job_matches:
             top_job = career_results.job_recommendations.job_matches[0]
             print(f"  Top job: {top_job.title} at {top_job.company}")
@@ -0,0 +1,161 @@
+# test_cache.py
+import multiprocessing
+import os
+import threading
+import time
+
+from agents.cache import NullCache, SQLiteCache, RedisCache
+
+
+class InMemoryRedis:
+    """Enough of the redis-py client surface for RedisCache"""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def _live(self, key):
+        item = self.data.get(key)
+        if item and item[1] is not None and item[1] <= time.time():
+            del self.data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self.lock:
+            item = self._live(key)
+            return item[0] if item else None
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self.lock:
+            if nx and self._live(key):
+                return None
+            expires = time.time() + ex if ex else time.time() + px / 1000 if px else None
+            self.data[key] = (value, expires)
+            return True
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def eval(self, script, numkeys, key, owner):
+        with self.lock:
+            item = self._live(key)
+            if item and item[0] == owner:
+                del self.data[key]
+                return 1
+            return 0
+
+
+def stampede(cache, workers=8):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"answer": 42}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("hot", compute, ttl=60)))
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return calls, results
+
+
+def test_sqlite_entries_expire(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("short", [1, 2], ttl=0.05)
+    cache.set("long", {"a": 1}, ttl=60)
+    time.sleep(0.1)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == {"a": 1}
+
+
+def test_sqlite_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=3)
+    for i in range(5):
+        cache.set(f"k{i}", i, ttl=60)
+    cache.get("k0")
+    cache.evict()
+
+    assert cache.get("k0") == 0
+    assert cache.get("k1") is None and cache.get("k2") is None
+    assert cache.get("k4") == 4
+
+
+def test_sqlite_get_or_compute_runs_once_across_threads(tmp_path):
+    calls, results = stampede(SQLiteCache(str(tmp_path / "cache.sqlite3")))
+
+    assert len(calls) == 1
+    assert results == [{"answer": 42}] * 8
+
+
+def _compute_in_worker(path, marker_dir, queue):
+    def compute():
+        open(os.path.join(marker_dir, str(os.getpid())), "w").close()
+        time.sleep(0.2)
+        return "shared"
+
+    queue.put(SQLiteCache(path).get_or_compute("hot", compute, ttl=60))
+
+
+def test_sqlite_get_or_compute_runs_once_across_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteCache(path)
+    markers = tmp_path / "computed"
+    markers.mkdir()
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_compute_in_worker, args=(path, str(markers), queue)) for _ in range(4)]
+    for proc in procs:
+        proc.start()
+    results = [queue.get(timeout=10) for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    assert results == ["shared"] * 4
+    assert len(os.listdir(markers)) == 1
+
+
+def test_redis_get_or_compute_runs_once_and_expires():
+    cache = RedisCache(InMemoryRedis())
+    calls, results = stampede(cache)
+
+    assert len(calls) == 1
+    assert results == [{"answer": 42}] * 8
+
+    cache.set("short", "x", ttl=1)
+    assert cache.get("short") == "x"
+    assert cache.client.data["nextmove:short"][0] == b'"x"'
+    _, expires_at = cache.client.data["nextmove:short"]
+    assert time.time() < expires_at <= time.time() + 1
+
+
+def test_failed_compute_is_not_cached(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    try:
+        cache.get_or_compute("key", boom, ttl=60)
+    except RuntimeError:
+        pass
+    assert cache.get_or_compute("key", lambda: "ok", ttl=60) == "ok"
+
+
+def test_try_lock_excludes_other_holders_until_released(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    with cache.try_lock("job", lease=5.0) as first:
+        with cache.try_lock("job", lease=5.0) as second:
+            assert first and not second
+    with cache.try_lock("job", lease=5.0) as again:
+        assert again
+    with NullCache().try_lock("job") as null:
+        assert null
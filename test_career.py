@@ -0,0 +1,94 @@
+# test_career.py
+import asyncio
+import time
+
+from agents.metrics import registry
+from agents.transport import Transport, OFFLINE, set_transport
+from agents.career_agent.agent import CareerAgent, TOP_K
+from conftest import sample_profile
+
+
+def test_strong_harvest_results_win_the_race_and_skip_fallbacks(monkeypatch):
+    set_transport(Transport(mode=OFFLINE))
+    profile = sample_profile()
+    harvested = [
+        {"title": "Software Engineer", "company": f"Company {n}", "location": profile.city,
+         "salary": (120000, 140000)}
+        for n in range(TOP_K + 5)
+    ]
+    # Same role at the same company, differently spelled
+    harvested.append({"title": "software  engineer", "company": "COMPANY 1", "location": profile.city})
+
+    def search(self, profile):
+        return [dict(job) for job in harvested]
+
+    def slow(self, profile, *args):
+        time.sleep(1.0)
+        return [{"title": "Late Engineer", "company": "Slow Co", "location": profile.city}]
+
+    def not_needed(self, profile, *args):
+        raise AssertionError("Harvest already found enough")
+
+    def unexpected(self, profile):
+        raise AssertionError("top-k already full of strong matches")
+
+    monkeypatch.setattr(CareerAgent, "_company_search_jobs", search)
+    monkeypatch.setattr(CareerAgent, "_job_search_jobs", slow)
+    monkeypatch.setattr(CareerAgent, "_enhance_with_gemini", not_needed)
+    monkeypatch.setattr(CareerAgent, "_generate_fallback_jobs", unexpected)
+
+    async def timed():
+        agent = CareerAgent()
+        agent.linkedin_api_key = "harvest-key"
+        started = time.monotonic()
+        output = await agent.run(profile)
+        return output, time.monotonic() - started
+
+    output, elapsed = asyncio.run(timed())
+    matches = output.job_recommendations.job_matches
+
+    # Slow strategies were abandoned after the grace window rather than awaited
+    assert elapsed < 0.9
+    assert registry.counter("career_strategy_total", strategy="job_search", outcome="abandoned").value >= 1
+    assert registry.counter("career_strategy_total", strategy="gemini", outcome="skipped").value >= 1
+
+    assert len(matches) == TOP_K
+    assert len({(m.title.lower(), m.company.lower()) for m in matches}) == TOP_K
+    assert [m.match_score for m in matches] == sorted((m.match_score for m in matches), reverse=True)
+    assert len({m.salary_range for m in matches}) == TOP_K
+    set_transport(None)
+
+
+def test_fallback_fills_to_k_without_duplicates():
+    set_transport(Transport(mode=OFFLINE))
+    matches = asyncio.run(CareerAgent().run(sample_profile())).job_recommendations.job_matches
+
+    assert len(matches) == TOP_K
+    assert len({(m.title, m.company) for m in matches}) == TOP_K
+    set_transport(None)
+
+
+def test_gemini_is_asked_once_harvest_comes_up_short(monkeypatch):
+    set_transport(Transport(mode=OFFLINE))
+    profile = sample_profile()
+    asked = []
+
+    def sparse(self, profile):
+        return [{"title": "Software Engineer", "company": "Only Co", "location": profile.city}]
+
+    def gemini(self, profile, existing):
+        asked.append(time.monotonic())
+        return [{"title": f"Software Engineer {n}", "company": f"Gemini Co {n}", "location": profile.city}
+                for n in range(5)]
+
+    monkeypatch.setattr(CareerAgent, "_company_search_jobs", sparse)
+    monkeypatch.setattr(CareerAgent, "_job_search_jobs", sparse)
+    monkeypatch.setattr(CareerAgent, "_enhance_with_gemini", gemini)
+    agent = CareerAgent()
+    agent.linkedin_api_key = "harvest-key"
+
+    matches = asyncio.run(agent.run(profile)).job_recommendations.job_matches
+
+    assert len(asked) == 1
+    assert {"Only Co", "Gemini Co 0"} <= {m.company for m in matches}
+    set_transport(None)
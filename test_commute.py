@@ -0,0 +1,72 @@
+# test_commute.py
+import numpy as np
+from fastapi.testclient import TestClient
+
+import backend.commute
+from agents.transport import Transport, OFFLINE, set_transport
+from agents.models import (
+    CareerOutput, Coordinates, HousingOutput, HousingRecommendation, JobMatch, JobRecommendations,
+)
+from backend.commute import best_commutes, haversine_km, rank_by_commute
+from backend.main import app
+from backend.pipeline import AgentResults
+from conftest import sample_profile
+
+
+def test_tiles_agree_with_the_full_matrix(monkeypatch):
+    rng = np.random.default_rng(0)
+    listings = np.radians(np.column_stack([rng.uniform(29, 30, 700), rng.uniform(-96, -95, 700)]))
+    jobs = np.radians(np.column_stack([rng.uniform(29, 30, 40), rng.uniform(-96, -95, 40)]))
+    scores = rng.integers(0, 100, 40).astype(float)
+
+    full = haversine_km(listings, jobs)
+    expected = np.argmin(full * (2 - scores / 100), axis=1)
+    monkeypatch.setattr(backend.commute, "TILE", 64)
+    best, distance = best_commutes(listings, jobs, scores)
+
+    assert (best == expected).all()
+    assert np.allclose(distance, full[np.arange(len(full)), expected])
+    # Houston to Austin is ~235km
+    assert abs(haversine_km(np.radians([[29.7604, -95.3698]]), np.radians([[30.2672, -97.7431]]))[0, 0] - 235) < 5
+
+
+def test_commute_view_without_geocoded_jobs_ranks_on_places_only():
+    set_transport(Transport(mode=OFFLINE))
+    try:
+        response = TestClient(app).post(
+            "/api/plan_move?fields=housing,jobs&commute=true", json=sample_profile().model_dump()
+        )
+    finally:
+        set_transport(None)
+
+    body = response.json()
+    housing = body["housing_recommendations"]
+    assert response.status_code == 200 and housing
+    # The fallback jobs only say "Houston, TX"; that's no workplace to commute to
+    assert all(job["coords"] is None for job in body["job_recommendations"]["job_matches"])
+    assert all(h["commute_km"] is None and h["commute_job"] is None for h in housing)
+    assert all(h["places_nearby"] is not None for h in housing)
+    assert [h["match_score"] for h in housing] == sorted((h["match_score"] for h in housing), reverse=True)
+
+
+def test_each_listing_gets_its_nearest_geocoded_job():
+    def listing(address, lat, lng):
+        return HousingRecommendation(address=address, rent=1500, min_credit_score=650, amenities=[],
+                                     coords=Coordinates(lat=lat, lng=lng), match_score=70, reason="")
+
+    downtown, katy = listing("Downtown", 29.76, -95.37), listing("Katy", 29.79, -95.82)
+    jobs = [
+        JobMatch(title="Engineer", company="Downtown Co", location="Houston, TX", match_score=80,
+                 coords=Coordinates(lat=29.758, lng=-95.365)),
+        JobMatch(title="Analyst", company="Katy Co", location="Katy, TX", match_score=80,
+                 coords=Coordinates(lat=29.785, lng=-95.82)),
+        JobMatch(title="Remote Engineer", company="Anywhere", location="Remote", match_score=100),
+    ]
+    results = AgentResults(None, None, HousingOutput(housing_recommendations=[downtown, katy]),
+                           CareerOutput(job_recommendations=JobRecommendations(job_matches=jobs)))
+
+    ranked = {h.address: h for h in rank_by_commute(sample_profile(), results).housing.housing_recommendations}
+
+    assert ranked["Downtown"].commute_job == "Engineer at Downtown Co"
+    assert ranked["Katy"].commute_job == "Analyst at Katy Co"
+    assert ranked["Downtown"].commute_km < 1 and ranked["Katy"].commute_km < 1
@@ -0,0 +1,79 @@
+# test_compare.py
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import backend.compare
+from agents.finance_agent.agent import FinanceAgent
+from agents.transport import Transport, OFFLINE, set_transport
+from backend.main import app
+from conftest import sample_profile
+
+CITIES = ["Houston, TX", "Austin", "Dallas", "houston", "Seattle"]
+
+
+def test_cities_run_concurrently_within_budget_and_share_finance(monkeypatch):
+    set_transport(Transport(mode=OFFLINE))
+    monkeypatch.setattr(backend.compare, "COMPARE_CONCURRENCY", 2)
+
+    finance_runs = []
+    run_finance = FinanceAgent.run
+
+    async def counted_finance(self, profile, with_tips=True):
+        finance_runs.append(with_tips)
+        return await run_finance(self, profile, with_tips)
+
+    in_flight, peak = [0], [0]
+    run_agents = backend.compare.run_agents
+
+    async def tracked(*args, **kwargs):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.05)
+        try:
+            return await run_agents(*args, **kwargs)
+        finally:
+            in_flight[0] -= 1
+
+    monkeypatch.setattr(FinanceAgent, "run", counted_finance)
+    monkeypatch.setattr(backend.compare, "run_agents", tracked)
+
+    try:
+        response = TestClient(app).post("/api/compare_cities", json={
+            "profile": sample_profile().model_dump(), "cities": CITIES,
+        })
+    finally:
+        set_transport(None)
+    rows = response.json()["cities"]
+
+    assert response.status_code == 200 and "plans" not in response.json()
+    # "houston" repeats "Houston, TX"
+    assert [row["city"] for row in rows] == ["Houston, TX", "Austin", "Dallas", "Seattle"]
+    assert all(row["cash_needed"] and row["top_listing_score"] is not None and row["neighborhood"] for row in rows)
+    assert peak[0] == 2
+    # Finance rules ran once for all cities, without the tips LLM call
+    assert finance_runs == [False]
+
+
+def test_plans_on_request_and_one_city_twice_is_rejected():
+    set_transport(Transport(mode=OFFLINE))
+    try:
+        client = TestClient(app)
+        response = client.post("/api/compare_cities?include_plans=true", json={
+            "profile": sample_profile().model_dump(), "cities": ["Houston", "Austin"],
+        })
+        same_city = {"profile": sample_profile().model_dump(), "cities": ["Houston", "houston, tx"]}
+        rejected = client.post("/api/compare_cities", json=same_city)
+    finally:
+        set_transport(None)
+    body = response.json()
+
+    assert response.status_code == 200
+    assert set(body["plans"]) == {"Houston", "Austin"}
+    for row in body["cities"]:
+        plan = body["plans"][row["city"]]
+        assert row["cash_needed"] == plan["summary"]["cash_needed"]
+        assert row["top_job_score"] == plan["job_recommendations"]["job_matches"][0]["match_score"]
+        assert plan["finance"]["tips"]
+
+    assert rejected.status_code == 400
@@ -0,0 +1,52 @@
+# test_dedup.py
+import numpy as np
+
+from agents.dedup import dedupe_listings, duplicate_groups, normalize_address
+from agents.records import ListingRecord
+from benchmarks.bench_dedup import make_listings, naive, quality, CITY
+
+
+def listing(address, lat=29.76, lng=-95.37):
+    return ListingRecord(address, 1500, 650, [], lat, lng)
+
+
+def test_variants_collapse_and_different_units_or_places_do_not():
+    assert normalize_address("123 Main Street, Apt #4, Houston, TX 77002", CITY) == "123 main st unit 4"
+
+    listings = [
+        listing("123 Main Street, Apt 4, Houston, TX"),
+        listing("123 MAIN ST. #4", lat=29.7601),
+        listing("123 main st unit 4, Houston", lng=-95.3702),
+        listing("125 Main St #4, Houston"),
+        listing("123 Main St Apt 5, Houston"),
+        listing("123 Main St Apt 4, Houston", lat=29.80),
+        listing("123 Travis St Apt 4, Houston"),
+    ]
+    kept = dedupe_listings(listings, CITY)
+
+    assert [item.address for item in kept] == [listings[0].address] + [item.address for item in listings[3:]]
+
+
+def test_lsh_matches_all_pairs_on_synthetic_listings():
+    addresses, lat, lng, origin = make_listings(2_000, seed=3)
+    groups = duplicate_groups(addresses, lat, lng, CITY)
+
+    assert np.array_equal(groups, naive(addresses, lat, lng, CITY))
+    assert quality(groups, origin) == (1.0, 1.0)
+
+
+def test_pairs_hidden_behind_dissimilar_bucket_leaders_are_still_compared(monkeypatch):
+    import agents.dedup
+
+    # B and C agree on bands 0-9 (40 of 64 rows); the earlier A1 and A2 each share half of those
+    # bands with them but too little overall, so every bucket holding B and C is led by A1 or A2
+    width = agents.dedup.BANDS * agents.dedup.ROWS
+    b = np.arange(width, dtype=np.int64)
+    c = np.where(np.arange(width) < 40, b, b + 1000)
+    a1 = np.where(np.arange(width) < 20, b, b + 2000)
+    a2 = np.where((np.arange(width) >= 20) & (np.arange(width) < 40), b, b + 3000)
+    monkeypatch.setattr(agents.dedup, "_minhash", lambda normalized: np.stack([a1, a2, b, c]).astype(np.uint64))
+
+    groups = duplicate_groups(["1 Main St"] * 4, [29.76] * 4, [-95.37] * 4)
+
+    assert groups.tolist() == [0, 1, 2, 2]
@@ -0,0 +1,70 @@
+# test_jobs.py
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from agents.transport import Transport, OFFLINE, set_transport
+from backend.admission import AdmissionController
+from backend.jobs import SQLiteJobStore, JobWorkerPool, set_job_store, QUEUED, RUNNING
+from backend.main import app
+from conftest import sample_profile
+
+
+def test_job_reports_partial_then_complete_plan(tmp_path):
+    set_transport(Transport(mode=OFFLINE))
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    set_job_store(store)
+    client = TestClient(app)
+    pool = JobWorkerPool(store, workers=1)
+
+    submitted = client.post("/api/plan_move/jobs", json=sample_profile().model_dump())
+    assert submitted.status_code == 202
+    url = submitted.headers["Location"]
+    assert client.get(url).json()["status"] == "queued"
+
+    # A worker that reported finance and then died: its part survives, the job is retried
+    job_id, profile = store.claim("lost-worker", lease=0)
+    store.save_part(job_id, "lost-worker", "finance", b'{"max_rent": 1}', lease=0)
+    partial = client.get(url).json()
+    assert partial["status"] == RUNNING and partial["completed"] == ["finance"]
+    assert partial["partial"]["finance"] == {"max_rent": 1}
+
+    assert asyncio.run(pool.drain()) == 1
+    job = client.get(url).json()
+    assert job["status"] == "done" and job["attempts"] == 2
+    assert job["result"]["housing_recommendations"]
+    assert "partial" not in job
+
+    assert client.get("/api/plan_move/jobs/unknown").status_code == 404
+
+    set_job_store(None)
+    set_transport(None)
+
+
+def test_jobs_are_claimed_once_fast_mode_first(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    slow = store.create(sample_profile())
+    fast = store.create(sample_profile(fast_mode=True))
+
+    assert store.claim("a", lease=60)[0] == fast
+    assert store.claim("b", lease=60)[0] == slow
+    assert store.claim("c", lease=60) is None
+
+
+def test_in_process_jobs_go_back_to_the_queue_when_shed(tmp_path):
+    set_transport(Transport(mode=OFFLINE))
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create(sample_profile())
+    admission = AdmissionController(max_concurrent=1, max_queue=0)
+    pool = JobWorkerPool(store, workers=1, admission=admission)
+
+    async def while_busy():
+        async with admission.admit():
+            return await pool.run_next("worker")
+
+    assert asyncio.run(while_busy()) is False
+    job = store.get(job_id)
+    assert job["status"] == QUEUED and job["attempts"] == 0
+
+    assert asyncio.run(pool.run_next("worker")) is True
+    assert store.get(job_id)["status"] == "done"
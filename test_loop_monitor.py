@@ -0,0 +1,54 @@
+# test_loop_monitor.py
+import asyncio
+import time
+
+from agents.transport import Transport, REPLAY, set_transport
+from backend.loop_monitor import LoopMonitor
+from conftest import sample_profile, run_pipeline_async
+
+
+def blocking_upstream_call():
+    time.sleep(0.15)
+
+
+async def handler_with_blocking_call():
+    await asyncio.sleep(0)
+    blocking_upstream_call()
+    await asyncio.sleep(0.05)
+
+
+async def monitored(coro, monitor):
+    monitor.start()
+    try:
+        return await coro
+    finally:
+        await monitor.stop()
+
+
+def test_flags_callback_holding_the_loop():
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.05)
+    asyncio.run(monitored(handler_with_blocking_call(), monitor))
+
+    assert len(monitor.blocking_events) == 1
+    event = monitor.blocking_events[0]
+    assert "blocking_upstream_call" in event["stacks"][0]
+    assert event["duration"] >= 0.1
+
+
+def test_quiet_loop_reports_no_blocking():
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.05)
+    asyncio.run(monitored(asyncio.sleep(0.2), monitor))
+
+    assert not monitor.blocking_events
+
+
+def test_catches_synchronous_upstream_calls_in_agents(cassette):
+    """Replaying the stub upstreams with real timing exposes agents' blocking I/O"""
+    path, _ = cassette
+    set_transport(Transport(mode=REPLAY, cassette_path=path, replay_timing="recorded"))
+    monitor = LoopMonitor(interval=0.002, block_threshold=0.01)
+
+    asyncio.run(monitored(run_pipeline_async(sample_profile()), monitor))
+
+    stacks = "".join(stack for event in monitor.blocking_events for stack in event["stacks"])
+    assert "_search_places_by_query" in stacks
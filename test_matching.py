@@ -0,0 +1,30 @@
+# test_matching.py
+import random
+
+from agents.matching import Automaton, KeywordTable, interest_matcher
+from agents.lifestyle_agent.agent import INTEREST_QUERIES
+
+
+def test_automaton_finds_same_patterns_as_substring_search():
+    rng = random.Random(7)
+    for _ in range(500):
+        patterns = sorted({"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(5)})
+        text = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 30)))
+        assert Automaton(patterns).find(text) == {i for i, p in enumerate(patterns) if p in text}
+
+
+def test_interest_matcher_uses_words_stems_and_synonyms():
+    matcher = interest_matcher(["Dogs", "rock climbing", "gym"])
+    assert matcher is interest_matcher(["dogs", "rock climbing", "gym"])
+
+    # "dogs" via its synonym "pet", "climbing" via its stem, "gym" via "fitness"
+    assert matcher.count(["pet-friendly", "climbing wall", "fitness center"]) == 3
+    assert matcher.count(["rooftop deck"]) == 0
+    assert matcher.jaccard(["Rock Gym"]) == 50.0
+
+
+def test_keyword_table_keeps_first_listed_keyword():
+    table = KeywordTable(INTEREST_QUERIES)
+    for interest in ["Fitness and gym", "live music", "Yoga", "coffee nerd"]:
+        expected = next((q for k, q in INTEREST_QUERIES.items() if k in interest.lower()), None)
+        assert table.lookup(interest) == expected
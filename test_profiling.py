@@ -0,0 +1,57 @@
+# test_profiling.py
+import threading
+
+from fastapi.testclient import TestClient
+
+from agents.transport import Transport, OFFLINE, set_transport
+from backend.cpuprofile import ADMIN_TOKEN_HEADER, CPU_PROFILE_HEADER, background_profiler
+from backend.main import app
+from backend.memprofile import MEMORY_PROFILE_HEADER
+from conftest import sample_profile
+
+TOKEN = "test-admin-token"
+
+
+def test_memory_profiling_needs_the_admin_token(monkeypatch):
+    monkeypatch.setenv("NEXTMOVE_ADMIN_TOKEN", TOKEN)
+    set_transport(Transport(mode=OFFLINE))
+    try:
+        client = TestClient(app)
+        body = sample_profile().model_dump()
+
+        anonymous = client.post("/api/plan_move?profile_memory=1", json=body, headers={MEMORY_PROFILE_HEADER: "1"})
+        wrong = client.post("/api/plan_move?profile_memory=1", json=body, headers={ADMIN_TOKEN_HEADER: "guess"})
+        admin = client.post("/api/plan_move?profile_memory=1", json=body, headers={ADMIN_TOKEN_HEADER: TOKEN})
+
+        assert anonymous.status_code == wrong.status_code == admin.status_code == 200
+        assert MEMORY_PROFILE_HEADER not in anonymous.headers and MEMORY_PROFILE_HEADER not in wrong.headers
+        assert admin.headers[MEMORY_PROFILE_HEADER].startswith("total=")
+    finally:
+        set_transport(None)
+
+
+def test_debug_endpoints_and_cpu_profiling_need_the_admin_token(monkeypatch):
+    monkeypatch.setenv("NEXTMOVE_ADMIN_TOKEN", TOKEN)
+    set_transport(Transport(mode=OFFLINE))
+    background_profiler.start(threading.get_ident(), 100)
+    try:
+        client = TestClient(app)
+        body = sample_profile().model_dump()
+
+        ignored = client.post("/api/plan_move", json=body, headers={CPU_PROFILE_HEADER: "1"})
+        assert ignored.status_code == 200 and "X-Profile-URL" not in ignored.headers
+        profiled = client.post("/api/plan_move", json=body, headers={CPU_PROFILE_HEADER: "1", ADMIN_TOKEN_HEADER: TOKEN})
+        profile_url = profiled.headers["X-Profile-URL"]
+
+        for path in ("/debug/profile", profile_url, "/debug/loop"):
+            assert client.get(path).status_code == 403
+            assert client.get(path, headers={ADMIN_TOKEN_HEADER: "guess"}).status_code == 403
+            assert client.get(path, headers={ADMIN_TOKEN_HEADER: TOKEN}).status_code == 200
+    finally:
+        background_profiler.stop()
+        set_transport(None)
+
+
+def test_admin_token_unset_locks_debug_endpoints(monkeypatch):
+    monkeypatch.delenv("NEXTMOVE_ADMIN_TOKEN", raising=False)
+    assert TestClient(app).get("/debug/loop", headers={ADMIN_TOKEN_HEADER: ""}).status_code == 403
@@ -0,0 +1,63 @@
+# test_ratelimit.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agents.ratelimit import UpstreamScheduler, NoUpstreamBudget, deadline_in
+
+
+def test_no_budget_is_signalled_without_waiting():
+    scheduler = UpstreamScheduler({"gemini": (6, 4)})
+    with scheduler.slot("gemini", "gemini-1.5-pro"):
+        pass
+
+    start = time.monotonic()
+    with deadline_in(2.0), pytest.raises(NoUpstreamBudget):
+        # Next token is 10s away, past the deadline
+        with scheduler.slot("gemini", "gemini-1.5-pro"):
+            pass
+    assert time.monotonic() - start < 0.05
+
+    # Buckets are per model
+    with scheduler.slot("gemini", "gemini-1.5-flash"):
+        pass
+
+
+def test_waiting_calls_are_served_earliest_deadline_first():
+    scheduler = UpstreamScheduler({"places": (6000, 1)})
+    order = []
+    holding = scheduler.limiter("places")
+    holding.acquire()
+
+    def call(name, seconds):
+        with deadline_in(seconds), scheduler.slot("places"):
+            order.append(name)
+
+    late = threading.Thread(target=call, args=("late", 5.0))
+    late.start()
+    time.sleep(0.05)
+    urgent = threading.Thread(target=call, args=("urgent", 1.0))
+    urgent.start()
+    time.sleep(0.05)
+
+    holding.release()
+    late.join()
+    urgent.join()
+    assert order == ["urgent", "late"]
+
+
+def test_event_loop_callers_never_wait():
+    scheduler = UpstreamScheduler({"harvest": (6000, 1)})
+    holding = scheduler.limiter("harvest")
+    holding.acquire()
+
+    async def call():
+        with scheduler.slot("harvest"):
+            pass
+
+    with pytest.raises(NoUpstreamBudget):
+        asyncio.run(call())
+    holding.release()
+    asyncio.run(call())
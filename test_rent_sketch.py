@@ -0,0 +1,109 @@
+# test_rent_sketch.py
+import asyncio
+import bisect
+import json
+import random
+
+from agents.cache import SQLiteCache, set_cache
+from agents.rent_sketch import KLLSketch, RentSketches, set_rent_sketches
+from agents.snapshot import Snapshot, market_listings_key, set_snapshot, write_snapshot
+from agents.transport import LLMResponse, Transport, LIVE, OFFLINE, set_transport
+from agents.finance_agent.agent import FinanceAgent
+from agents.housing_agent.agent import HousingAgent
+from agents.models import LifestyleOutput, NeighborhoodFit
+from conftest import sample_profile
+
+
+def test_sketch_ranks_stay_close_to_exact_and_survive_merge_and_bytes():
+    rng = random.Random(3)
+    rents = [rng.lognormvariate(7.4, 0.35) for _ in range(100_000)]
+
+    halves = KLLSketch(), KLLSketch()
+    for i, rent in enumerate(rents):
+        halves[i % 2].update(rent)
+    halves[0].merge(halves[1])
+    payload = halves[0].to_bytes()
+    sketch = KLLSketch.from_bytes(payload)
+
+    exact = sorted(rents)
+    assert sketch.count == len(rents)
+    assert len(payload) < 8 * 1024
+    for rent in (1000, 1400, 1635, 2000, 3000):
+        assert abs(sketch.rank(rent) - bisect.bisect_right(exact, rent) / len(exact)) < 0.02
+    assert abs(sketch.quantile(0.5) - exact[len(exact) // 2]) < 30
+
+
+def test_workers_merge_through_shared_cache_into_finance_output(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    profile = sample_profile()
+    first, second = RentSketches(cache), RentSketches(cache)
+    first.observe(profile.city, range(1000, 1500, 10))    # 50 rents, flushed on arrival
+    second.observe(profile.city, range(1500, 2000, 10))
+    second.observe(profile.city, [None, 0, "n/a"])
+
+    reader = RentSketches(cache)
+    assert reader.sketch(profile.city).count == 100
+    assert reader.percentile("houston", 1500) == 51
+    assert reader.median(profile.city) in (1490, 1500)
+
+    set_transport(Transport(mode=OFFLINE))
+    set_rent_sketches(reader)
+    try:
+        affordability = asyncio.run(FinanceAgent().run(profile.model_copy(update={"budget": 1750}))).affordability
+        assert affordability.market_percentile == 76
+        assert affordability.market_median_rent in (1490, 1500)
+
+        assert RentSketches(cache).percentile("Austin", 1500) is None
+    finally:
+        set_rent_sketches(None)
+        set_transport(None)
+
+
+def test_generated_listings_do_not_feed_sketches_and_observe_keeps_the_view(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    sketches = RentSketches(cache)
+    profile = sample_profile()
+    listings = [{"address": f"{100 + i} Main St", "rent": 1500 + 10 * i, "min_credit_score": 650,
+                 "amenities": [], "lat": 29.7 + i / 100, "lng": -95.3} for i in range(40)]
+    monkeypatch.setattr(Transport, "generate_content",
+                        lambda self, **kwargs: LLMResponse(json.dumps({"listings": listings})))
+    set_rent_sketches(sketches)
+    try:
+        lifestyle = LifestyleOutput(primary_fit=NeighborhoodFit(name="Montrose", tags=[], match_score=80), explanation="")
+        assert len(HousingAgent().search_listings(profile, lifestyle)) == 40
+        # Rents asked for around this user's budget aren't market rents
+        assert sketches.sketch(profile.city).count == 0
+    finally:
+        set_rent_sketches(None)
+
+    sketches.observe("Austin", range(1000, 1300, 10))
+    view = sketches.sketch("Austin")
+    sketches.observe("Austin", [2000])
+    # The read view is only rebuilt every REFRESH_SECONDS, not on every observation
+    assert sketches.sketch("Austin") is view and view.count == 30
+
+
+def test_snapshot_market_sample_feeds_sketches_once_across_workers(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    profile = sample_profile()
+    market = [{"address": f"{100 + i} Main St", "rent": 900 + 50 * i, "min_credit_score": 650,
+               "amenities": [], "lat": 29.7, "lng": -95.3} for i in range(40)]
+    path = str(tmp_path / "cities.snap")
+    write_snapshot(path, [(market_listings_key(profile.city), market)])
+    monkeypatch.setattr(Transport, "generate_content", lambda self, **kwargs: LLMResponse('{"listings": []}'))
+    set_cache(cache)
+    set_snapshot(Snapshot(path))
+    set_transport(Transport(mode=LIVE))
+    lifestyle = LifestyleOutput(primary_fit=NeighborhoodFit(name="Montrose", tags=[], match_score=80), explanation="")
+    try:
+        for worker in (RentSketches(cache), RentSketches(cache)):
+            set_rent_sketches(worker)
+            for _ in range(2):
+                HousingAgent().search_listings(profile, lifestyle)
+
+        reader = RentSketches(cache)
+        assert reader.sketch(profile.city).count == 40
+        assert reader.percentile(profile.city, 1875) == 50
+    finally:
+        set_rent_sketches(None)
+        set_snapshot(None)
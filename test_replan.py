@@ -0,0 +1,84 @@
+# test_replan.py
+from fastapi.testclient import TestClient
+
+from agents.cache import SQLiteCache, set_cache
+from agents.transport import Transport, OFFLINE, set_transport
+from agents.lifestyle_agent.agent import LifestyleAgent
+from agents.career_agent.agent import CareerAgent
+from agents.housing_agent.agent import HousingAgent
+from backend.main import app
+from backend.pipeline import stale_agents
+from conftest import sample_profile
+
+
+def test_budget_only_reruns_finance_and_housing_scoring():
+    assert stale_agents({"budget"}) == {"finance", "housing_scoring"}
+    assert stale_agents({"interests"}) == {"lifestyle", "housing", "housing_scoring", "career"}
+    assert stale_agents({"name", "fast_mode"}) == set()
+    assert stale_agents({"budget", "search_range"}) == {"finance", "housing", "housing_scoring"}
+
+
+def test_patch_reuses_stored_results(tmp_path, monkeypatch):
+    set_transport(Transport(mode=OFFLINE))
+    set_cache(SQLiteCache(str(tmp_path / "cache.sqlite3")))
+    client = TestClient(app)
+    profile = sample_profile()
+
+    created = client.post("/api/plan_move", json=profile.model_dump())
+    plan_id = created.headers["X-Plan-ID"]
+
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("input unchanged, should not rerun")
+
+    monkeypatch.setattr(LifestyleAgent, "run", unexpected)
+    monkeypatch.setattr(CareerAgent, "run", unexpected)
+    monkeypatch.setattr(HousingAgent, "search_listings", unexpected)
+
+    patched = client.patch(f"/api/plan_move/{plan_id}", json=profile.model_copy(update={"budget": 2200}).model_dump())
+
+    assert patched.status_code == 200
+    assert patched.headers["X-Replanned"] == "finance,housing_scoring"
+    assert patched.headers["X-Plan-ID"] != plan_id
+    plan, before = patched.json(), created.json()
+    assert plan["finance"]["move_cash_needed"]["deposits"] == 4400
+    assert plan["lifestyle"] == before["lifestyle"]
+    assert plan["job_recommendations"] == before["job_recommendations"]
+    assert {h["address"] for h in plan["housing_recommendations"]} == {h["address"] for h in before["housing_recommendations"]}
+
+    assert client.patch("/api/plan_move/unknown", json=profile.model_dump()).status_code == 404
+    set_cache(None)
+    set_transport(None)
+
+
+def test_budget_outside_the_searched_range_searches_again(tmp_path, monkeypatch):
+    set_transport(Transport(mode=OFFLINE))
+    set_cache(SQLiteCache(str(tmp_path / "cache.sqlite3")))
+    searched = []
+    search = HousingAgent.search_listings
+
+    def counted(self, profile, lifestyle_results):
+        searched.append(profile.budget)
+        return search(self, profile, lifestyle_results)
+
+    monkeypatch.setattr(HousingAgent, "search_listings", counted)
+    try:
+        client = TestClient(app)
+        profile = sample_profile()
+        plan_id = client.post("/api/plan_move", json=profile.model_dump()).headers["X-Plan-ID"]
+
+        def patch(plan_id, budget):
+            response = client.patch(f"/api/plan_move/{plan_id}", json=profile.model_copy(update={"budget": budget}).model_dump())
+            return response, response.headers["X-Plan-ID"]
+
+        # 1800 -> 2200 is inside the first search's range; 2200 -> 2600 isn't, measured from 1800
+        rescored, plan_id = patch(plan_id, 2200)
+        drifted, plan_id = patch(plan_id, 2600)
+        moved, _ = patch(plan_id, 4000)
+
+        assert rescored.headers["X-Replanned"] == "finance,housing_scoring"
+        assert drifted.headers["X-Replanned"] == moved.headers["X-Replanned"] == "finance,housing,housing_scoring"
+        assert searched == [1800, 2600, 4000]
+        assert min(h["rent"] for h in moved.json()["housing_recommendations"]) >= 4000 - 300
+    finally:
+        set_cache(None)
+        set_transport(None)
@@ -0,0 +1,61 @@
+# test_scenarios.py
+import asyncio
+import random
+
+from fastapi.testclient import TestClient
+
+from agents.transport import Transport, OFFLINE, set_transport
+from agents.finance_agent.agent import FinanceAgent
+from backend.scenarios import affordability_grid, MAX_GRID_CELLS
+from conftest import sample_profile
+
+
+def test_grid_agrees_exactly_with_finance_agent():
+    set_transport(Transport(mode=OFFLINE))
+    rng = random.Random(11)
+    # Edge values around the 0.9/1.1 bands and truncation, plus random ones
+    budgets = [1, 299, 1619, 1620, 1800, 1980, 1981, 2000] + [rng.randint(300, 6000) for _ in range(24)]
+    salaries = [0, 1, 72000, 72001, 79200, 88000] + [rng.randint(20_000, 300_000) for _ in range(10)]
+
+    grid = affordability_grid(budgets, salaries)
+    agent = FinanceAgent()
+    profile = sample_profile()
+
+    async def scalar():
+        for i, salary in enumerate(salaries):
+            for j, budget in enumerate(budgets):
+                output = await agent.run(profile.model_copy(update={"budget": budget, "salary": salary}))
+                cash = output.move_cash_needed
+                assert grid["recommended_max_rent"][i][j] == output.affordability.recommended_max_rent
+                assert grid["budget_vs_recommended"][i][j] == output.affordability.budget_vs_recommended
+                assert grid["move_cash_needed"]["deposits"][j] == cash.deposits
+                assert grid["move_cash_needed"]["buffer"][j] == cash.buffer
+                assert grid["move_cash_needed"]["total"][j] == cash.total
+                assert (grid["move_cash_needed"]["moving"], grid["move_cash_needed"]["setup"]) == (cash.moving, cash.setup)
+
+    try:
+        asyncio.run(scalar())
+    finally:
+        set_transport(None)
+
+
+def test_endpoint_returns_grid_and_rejects_oversized_requests(monkeypatch):
+    import backend.main
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("the grid must not call the LLM")
+
+    monkeypatch.setattr(Transport, "generate_content", no_llm)
+    client = TestClient(backend.main.app)
+
+    response = client.post("/api/affordability_grid", json={
+        "city": "Houston, TX", "budgets": [1200, 1800, 2400], "salaries": [0, 60000],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["recommended_max_rent"]) == 2 and len(body["recommended_max_rent"][0]) == 3
+    assert body["market_percentile"] == [None, None, None]
+
+    too_many = {"city": "Houston", "budgets": list(range(1, MAX_GRID_CELLS + 2))}
+    assert client.post("/api/affordability_grid", json=too_many).status_code == 400
+    assert client.post("/api/affordability_grid", json={"city": "Houston", "budgets": [-5]}).status_code == 400
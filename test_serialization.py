@@ -0,0 +1,81 @@
+# test_serialization.py
+import asyncio
+import json
+import random
+
+from fastapi.testclient import TestClient
+
+from agents.cache import SQLiteCache, set_cache
+from agents.models import MovePlanResponse
+from agents.transport import Transport, LIVE, OFFLINE, set_transport
+from agents.career_agent.agent import CareerAgent
+from agents.lifestyle_agent.agent import LifestyleAgent
+from backend.main import app
+from backend.pipeline import normalize_profile, run_agents
+from benchmarks.bench_serialization import legacy_render, fast_render
+from conftest import FakeGemini, sample_profile
+
+
+def test_fast_path_matches_validated_response():
+    set_transport(Transport(mode=OFFLINE))
+    random.seed(0)
+    profile = normalize_profile(sample_profile())
+    results = asyncio.run(run_agents(profile))
+
+    fast = fast_render(profile, results)
+    assert json.loads(fast) == json.loads(legacy_render(profile, results))
+    MovePlanResponse.model_validate_json(fast)
+    set_transport(None)
+
+
+def test_repeat_profile_served_from_plan_cache(tmp_path):
+    transport = Transport(mode=LIVE)
+    transport._genai_client = FakeGemini()
+    set_transport(transport)
+    set_cache(SQLiteCache(str(tmp_path / "cache.sqlite3")))
+    client = TestClient(app)
+    payload = sample_profile().model_dump()
+
+    first = client.post("/api/plan_move", json=payload)
+    second = client.post("/api/plan_move", json=payload)
+
+    assert first.status_code == second.status_code == 200
+    assert "X-Plan-Cache" not in first.headers
+    assert second.headers["X-Plan-Cache"] == "hit"
+    assert second.content == first.content
+    set_cache(None)
+    set_transport(None)
+
+
+def test_field_selection_skips_unrequested_agents(monkeypatch):
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("not requested")
+
+    set_transport(Transport(mode=OFFLINE))
+    monkeypatch.setattr(CareerAgent, "run", unexpected)
+    monkeypatch.setattr(LifestyleAgent, "_get_places_of_interest", unexpected)
+    client = TestClient(app)
+
+    response = client.post("/api/plan_move?fields=housing&housing_limit=2&compact=true",
+                           json=sample_profile().model_dump())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"status", "city", "compact", "housing_recommendations"}
+    housing = body["housing_recommendations"]
+    assert len(housing["lat"]) == len(housing["match_score"]) == 2
+    assert "reason" not in housing
+    set_transport(None)
+
+
+def test_compact_jobs_without_coordinates():
+    set_transport(Transport(mode=OFFLINE))
+    client = TestClient(app)
+
+    response = client.post("/api/plan_move?fields=jobs&compact=true", json=sample_profile().model_dump())
+
+    assert response.status_code == 200
+    jobs = response.json()["job_recommendations"]["job_matches"]
+    assert jobs["title"] and len(jobs["lat"]) == len(jobs["lng"]) == len(jobs["title"])
+    assert set(jobs["lat"]) == {None}
+    set_transport(None)
@@ -0,0 +1,98 @@
+# test_snapshot.py
+import asyncio
+import struct
+
+import pytest
+import requests
+
+from agents.cache import NullCache, set_cache
+from agents.snapshot import EmptySnapshot, Snapshot, SnapshotError, get_snapshot, set_snapshot, write_snapshot, salary_key
+from agents.transport import Transport, LIVE, set_transport
+from agents.lifestyle_agent.agent import LifestyleAgent
+from agents.career_agent.agent import CareerAgent
+from backend import precompute
+from conftest import FakeGemini, fake_session_get, sample_profile
+
+
+class UnreachableGemini:
+    def __init__(self):
+        self.models = self
+
+    def generate_content(self, **kwargs):
+        raise AssertionError("snapshot hit should not reach Gemini")
+
+
+def live_transport(client):
+    transport = Transport(mode=LIVE)
+    transport._genai_client = client
+    set_transport(transport)
+    return transport
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "cities.snap")
+    monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "maps-secret")
+    monkeypatch.setattr(requests.Session, "get", fake_session_get)
+    set_cache(NullCache())
+    live_transport(FakeGemini())
+
+    summary = precompute.build(path, ["Houston"], ["Software Engineer"], workers=2)
+    assert not summary["failed"]
+
+    monkeypatch.setattr(requests.Session, "get", None)
+    yield path
+    set_snapshot(None)
+    set_transport(None)
+    set_cache(None)
+
+
+def test_precompute_covers_neighborhoods_places_salaries_and_market_listings(snapshot_path):
+    snapshot = Snapshot(snapshot_path)
+    kinds = {key.split(":", 1)[0] for key in snapshot.keys()}
+
+    assert kinds == {"neighborhoods", "places", "salary", "market_listings"}
+    assert "places:houston:vegan restaurant" in snapshot
+    assert snapshot.get(salary_key("Houston, TX", "software engineer", "mid")) == {"min": 88000, "max": 112000}
+
+
+def test_agents_serve_snapshot_without_going_live(snapshot_path):
+    set_snapshot(Snapshot(snapshot_path))
+    live_transport(UnreachableGemini())
+    profile = sample_profile()
+
+    lifestyle = LifestyleAgent()
+    neighborhoods = lifestyle._analyze_neighborhoods(profile)
+    # Montrose's nightlife + vegan tags overlap the profile's interests
+    assert [n.name for n in neighborhoods] == ["Montrose", "Heights"]
+    assert neighborhoods[0].match_score == 100
+
+    coords = lifestyle._get_city_coordinates(profile.city)
+    places = asyncio.run(lifestyle._search_places_by_query("gym fitness center", profile.city, coords))
+    assert places[0].name == "gym fitness center in Houston spot"
+
+    career = CareerAgent()
+    assert career._estimate_salary_range(profile, "Software Engineer") == (88000, 112000)
+    # The salary index strips seniority and numbering from titles; seniority is priced on top
+    assert career._estimate_salary_range(profile, "Senior Software Engineer #3") == (105600, 134400)
+
+
+def test_rejects_other_format_versions(tmp_path):
+    path = str(tmp_path / "old.snap")
+    write_snapshot(path, [("k", 1)])
+    with open(path, "r+b") as f:
+        f.seek(8)
+        f.write(struct.pack("<I", 99))
+
+    with pytest.raises(SnapshotError, match="version 99"):
+        Snapshot(path)
+
+
+def test_unreadable_snapshot_is_logged_and_served_live(tmp_path, monkeypatch, caplog):
+    monkeypatch.setenv("NEXTMOVE_SNAPSHOT", str(tmp_path / "missing.snap"))
+    set_snapshot(None)
+    try:
+        assert isinstance(get_snapshot(), EmptySnapshot)
+        assert "City snapshot unavailable" in caplog.text
+    finally:
+        set_snapshot(None)
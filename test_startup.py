@@ -0,0 +1,51 @@
+# test_startup.py
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import backend.startup
+from backend.main import app
+from backend.startup import StartupReport, warm_up
+
+TOKEN = "test-admin-token"
+
+
+def test_readyz_fails_until_warm_up_finishes(monkeypatch):
+    monkeypatch.delenv("NEXTMOVE_WARMUP", raising=False)
+    monkeypatch.setattr(backend.startup, "startup_report", StartupReport())
+    monkeypatch.setattr("backend.main.startup_report", backend.startup.startup_report)
+    client = TestClient(app)
+
+    async def check_while_warming():
+        # TestClient blocks, so probe from a thread while warm-up is mid-step
+        assert (await asyncio.to_thread(client.get, "/readyz")).status_code == 503
+
+    monkeypatch.setattr(backend.startup, "_warmup_steps", [("probe", check_while_warming)])
+    assert client.get("/readyz").status_code == 503
+    assert client.get("/healthz").status_code == 200
+
+    asyncio.run(warm_up())
+
+    assert client.get("/readyz").json() == {"ready": True}
+    assert "warmup.probe" in backend.startup.startup_report.phases
+
+
+def test_failing_step_is_reported_and_does_not_block_startup(monkeypatch):
+    monkeypatch.delenv("NEXTMOVE_WARMUP", raising=False)
+    monkeypatch.setenv("NEXTMOVE_ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(backend.startup, "startup_report", StartupReport())
+    monkeypatch.setattr("backend.main.startup_report", backend.startup.startup_report)
+    ran = []
+
+    def broken():
+        raise ConnectionError("cache unreachable")
+
+    monkeypatch.setattr(backend.startup, "_warmup_steps", [("broken", broken), ("after", lambda: ran.append(True))])
+    asyncio.run(warm_up())
+
+    client = TestClient(app)
+    assert ran == [True]
+    assert client.get("/readyz").status_code == 200
+    report = client.get("/debug/startup", headers={"X-Admin-Token": TOKEN}).json()
+    assert report["details"]["failed"] == {"broken": "cache unreachable"}
+    assert {"warmup.broken", "warmup.after"} <= set(report["phases"])
@@ -0,0 +1,60 @@
+# test_transport.py
+import gzip
+import os
+import time
+
+import pytest
+
+from agents.transport import Transport, CassetteMiss, RECORD, REPLAY, http_request_key, set_transport
+from conftest import sample_profile, run_pipeline, UPSTREAM_LATENCY
+
+
+def test_replay_reproduces_recorded_pipeline(cassette):
+    path, recorded = cassette
+    set_transport(Transport(mode=REPLAY, cassette_path=path))
+
+    assert run_pipeline(sample_profile()) == recorded
+    assert recorded["lifestyle"]["primary_fit"]["name"] == "Montrose"
+    assert recorded["career"]["job_recommendations"]["job_matches"][0]["company"] == "Energy Corp"
+
+
+def test_cassette_keys_exclude_credentials(cassette):
+    path, _ = cassette
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        raw = f.read()
+
+    assert "maps-secret" not in raw
+    assert "harvest-secret" not in raw
+
+
+def test_replay_miss_fails_loudly(cassette):
+    path, _ = cassette
+    set_transport(Transport(mode=REPLAY, cassette_path=path))
+
+    with pytest.raises(CassetteMiss):
+        run_pipeline(sample_profile(city="Austin, TX"))
+
+
+def test_replay_with_recorded_timing(cassette):
+    path, recorded = cassette
+
+    set_transport(Transport(mode=REPLAY, cassette_path=path, replay_timing="recorded"))
+    start = time.perf_counter()
+    assert run_pipeline(sample_profile()) == recorded
+    elapsed = time.perf_counter() - start
+
+    # Four sequential upstream calls at minimum (neighborhoods, places, listings, jobs)
+    assert elapsed >= UPSTREAM_LATENCY * 4
+
+
+def test_recording_writes_the_cassette_once_on_close(tmp_path):
+    path = str(tmp_path / "calls.json.gz")
+    transport = Transport(mode=RECORD, cassette_path=path)
+    for i in range(3):
+        transport._record(http_request_key("GET", "https://example.com", {"page": i}), {"status_code": 200, "text": ""}, 0)
+    assert not os.path.exists(path)
+
+    set_transport(transport)
+    set_transport(None)
+
+    assert len(Transport(mode=REPLAY, cassette_path=path).cassette.interactions) == 3
@@ -0,0 +1,57 @@
+# test_vectors.py
+import numpy as np
+
+from agents.lifestyle_agent.agent import LifestyleAgent
+from agents.transport import Transport, OFFLINE, set_transport
+from agents.vectors import SIMILARITY_FLOOR, VectorIndex, best_similarity, embed, relevance
+from conftest import sample_profile
+
+
+def test_related_tags_score_above_floor_and_unrelated_below():
+    index = VectorIndex(["Bouldering Gym", "Coffee Shop Cafe", "Dog Park", "Parking Garage"])
+    assert index.search(["climbing"], k=1)[0][0][0] == "bouldering gym"
+    assert index.search(["coffee"], k=1)[0][0][0] == "coffee shop cafe"
+
+    scores = best_similarity(["climbing", "coffee"], [["Bouldering Gym"], ["Parking Garage"], []], index)
+    assert scores[0] > SIMILARITY_FLOOR > scores[1]
+    assert scores[2] == 0
+    assert relevance(scores[1]) == 0
+
+
+def test_best_similarity_matches_pairwise_cosine():
+    queries = ["hiking", "live music", "art"]
+    tag_lists = [["Trail", "Park"], [], ["Art Gallery", "Museum", "Bar"], ["Concert Hall"]]
+    expected = [
+        max((float(embed(q) @ embed(t.lower())) for q in queries for t in tags), default=0)
+        for tags in tag_lists
+    ]
+    assert np.allclose(best_similarity(queries, tag_lists, VectorIndex()), expected, atol=1e-6)
+
+    # Known and unseen tags mixed; scoring must not grow the shared index
+    index = VectorIndex(["trail", "museum"])
+    assert np.allclose(best_similarity(queries, tag_lists, index), expected, atol=1e-6)
+    assert index.labels == ["trail", "museum"] and len(index.matrix) == 2
+
+
+def test_index_round_trips_through_file(tmp_path):
+    index = VectorIndex(["yoga studio", "museum"])
+    path = str(tmp_path / "tags.npz")
+    index.save(path)
+
+    loaded = VectorIndex.load(path)
+    assert loaded.labels == index.labels
+    assert np.array_equal(loaded.matrix, index.matrix)
+    assert loaded.search(["yoga"], k=1)[0][0][0] == "yoga studio"
+
+
+def test_snapshot_neighborhoods_rank_by_similar_tags():
+    set_transport(Transport(mode=OFFLINE))
+    analysis = [
+        {"name": "Midtown", "tags": ["quiet", "parks"], "match_score": 70},
+        {"name": "Montrose", "tags": ["cafes", "galleries"], "match_score": 68},
+    ]
+
+    ranked = LifestyleAgent()._rank_precomputed_neighborhoods(analysis, sample_profile(interests=["coffee", "art"]))
+
+    assert [n.name for n in ranked] == ["Montrose", "Midtown"]
+    assert ranked[0].match_score > 68